@@ -0,0 +1,30 @@
+"""add media size and checksum
+
+Revision ID: 3e9d1f7a2b64
+Revises: 8f3a6c2e5d10
+Create Date: 2025-09-26 09:41:07.552310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9d1f7a2b64'
+down_revision: Union[str, Sequence[str], None] = '8f3a6c2e5d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('media', sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('media', sa.Column('sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('media', 'sha256')
+    op.drop_column('media', 'size_bytes')
@@ -0,0 +1,28 @@
+"""add work order keyset index
+
+Revision ID: 4b7e2d9a1c3f
+Revises: c1cbd0cce396
+Create Date: 2025-09-24 10:12:31.418202
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2d9a1c3f'
+down_revision: Union[str, Sequence[str], None] = 'c1cbd0cce396'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_work_orders_created_at_id', 'work_orders', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_work_orders_created_at_id', table_name='work_orders')
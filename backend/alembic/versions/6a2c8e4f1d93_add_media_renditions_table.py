@@ -0,0 +1,44 @@
+"""add media renditions table
+
+Revision ID: 6a2c8e4f1d93
+Revises: 3e9d1f7a2b64
+Create Date: 2025-09-27 11:05:48.201734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a2c8e4f1d93'
+down_revision: Union[str, Sequence[str], None] = '3e9d1f7a2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_renditions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('media_id', sa.Integer(), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.Column('format', sa.String(length=8), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['media_id'], ['media.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('media_id', 'width', 'format', name='uq_media_renditions_media_width_format')
+    )
+    op.create_index(op.f('ix_media_renditions_id'), 'media_renditions', ['id'], unique=False)
+    op.create_index(op.f('ix_media_renditions_media_id'), 'media_renditions', ['media_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_media_renditions_media_id'), table_name='media_renditions')
+    op.drop_index(op.f('ix_media_renditions_id'), table_name='media_renditions')
+    op.drop_table('media_renditions')
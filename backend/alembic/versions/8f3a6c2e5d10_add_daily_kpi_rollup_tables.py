@@ -0,0 +1,79 @@
+"""add daily kpi rollup tables
+
+Revision ID: 8f3a6c2e5d10
+Revises: 4b7e2d9a1c3f
+Create Date: 2025-09-25 09:41:07.532118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3a6c2e5d10'
+down_revision: Union[str, Sequence[str], None] = '4b7e2d9a1c3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_work_order_status',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+    op.create_table('daily_revenue',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('invoiced', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('invoice_count', sa.Integer(), nullable=False),
+    sa.Column('collected', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('daily_service_usage',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['service_id'], ['services.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'service_id')
+    )
+    # Backfill from existing data, bucketed by UTC day like the incremental
+    # updates; afterwards rows are maintained incrementally (see
+    # app/services/rollups.py, which can also rebuild them).
+    if op.get_bind().dialect.name == "postgresql":
+        def day(column):
+            return f"date(timezone('UTC', {column}))"
+    else:
+        def day(column):
+            return f"date({column})"
+    op.execute(f"""
+        INSERT INTO daily_work_order_status (day, status, count)
+        SELECT {day('created_at')}, lower(CAST(status AS TEXT)), count(*)
+        FROM work_orders GROUP BY {day('created_at')}, lower(CAST(status AS TEXT))
+    """)
+    op.execute(f"""
+        INSERT INTO daily_revenue (day, invoiced, invoice_count, collected)
+        SELECT day, sum(invoiced), sum(invoice_count), sum(collected) FROM (
+            SELECT {day('created_at')} AS day, coalesce(total, 0) AS invoiced, 1 AS invoice_count, 0 AS collected
+            FROM invoices WHERE created_at IS NOT NULL
+            UNION ALL
+            SELECT {day('paid_at')}, 0, 0, coalesce(amount, 0)
+            FROM payments WHERE paid_at IS NOT NULL
+        ) revenue GROUP BY day
+    """)
+    op.execute(f"""
+        INSERT INTO daily_service_usage (day, service_id, count)
+        SELECT {day('w.created_at')}, s.service_id, count(*)
+        FROM work_order_services s JOIN work_orders w ON w.id = s.work_order_id
+        GROUP BY {day('w.created_at')}, s.service_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_service_usage')
+    op.drop_table('daily_revenue')
+    op.drop_table('daily_work_order_status')
@@ -0,0 +1,34 @@
+"""add work order service unit price
+
+Revision ID: a3d5f7b9c142
+Revises: c6f1a8d3e527
+Create Date: 2025-10-12 09:41:27.518630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d5f7b9c142'
+down_revision: Union[str, Sequence[str], None] = 'c6f1a8d3e527'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('work_order_services', sa.Column('unit_price', sa.Numeric(precision=12, scale=2), nullable=True))
+
+    # Backfill with the current prices, which the maintained totals were built from
+    op.execute(
+        "UPDATE work_order_services SET unit_price = "
+        "(SELECT s.base_price FROM services s WHERE s.id = work_order_services.service_id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('work_order_services', 'unit_price')
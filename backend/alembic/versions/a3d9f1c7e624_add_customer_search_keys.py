@@ -0,0 +1,117 @@
+"""add customer search keys
+
+Revision ID: a3d9f1c7e624
+Revises: f2c6a9e3b418
+Create Date: 2025-10-06 11:42:15.381027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.normalize import normalize_name, normalize_phone
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d9f1c7e624'
+down_revision: Union[str, Sequence[str], None] = 'f2c6a9e3b418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+customers = sa.table(
+    'customers',
+    sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('phone', sa.String),
+    sa.column('name_norm', sa.String), sa.column('phone_norm', sa.String),
+)
+
+
+def _backfill() -> None:
+    """Fill name_norm/phone_norm in id order, BATCH_SIZE rows per round trip."""
+    bind = op.get_bind()
+    stmt = (
+        customers.update()
+        .where(customers.c.id == sa.bindparam('_id'))
+        .values(name_norm=sa.bindparam('_name_norm'), phone_norm=sa.bindparam('_phone_norm'))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(customers.c.id, customers.c.name, customers.c.phone)
+            .where(customers.c.id > last_id)
+            .order_by(customers.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(stmt, [
+            {'_id': row.id, '_name_norm': normalize_name(row.name), '_phone_norm': normalize_phone(row.phone)}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+
+def _sqlite_fts(columns) -> None:
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{c}' for c in columns)
+    old = ', '.join(f'old.{c}' for c in columns)
+    delete_old = f"INSERT INTO customers_fts(customers_fts, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert_new = f'INSERT INTO customers_fts(rowid, {names}) VALUES (new.id, {new});'
+    op.execute(f"CREATE VIRTUAL TABLE customers_fts USING fts5({names}, content='', tokenize='trigram')")
+    op.execute(f'CREATE TRIGGER customers_fts_ai AFTER INSERT ON customers BEGIN {insert_new} END')
+    op.execute(f'CREATE TRIGGER customers_fts_ad AFTER DELETE ON customers BEGIN {delete_old} END')
+    op.execute(f'CREATE TRIGGER customers_fts_au AFTER UPDATE OF {names} ON customers BEGIN {delete_old} {insert_new} END')
+    op.execute(f'INSERT INTO customers_fts(rowid, {names}) SELECT id, {names} FROM customers')
+
+
+def _drop_sqlite_fts() -> None:
+    for suffix in ('ai', 'ad', 'au'):
+        op.execute(f'DROP TRIGGER IF EXISTS customers_fts_{suffix}')
+    op.execute('DROP TABLE IF EXISTS customers_fts')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    op.add_column('customers', sa.Column('name_norm', sa.String(), nullable=True))
+    op.add_column('customers', sa.Column('phone_norm', sa.String(length=20), nullable=True))
+
+    # The search index moves from name/phone to the normalized columns
+    if dialect == 'sqlite':
+        _drop_sqlite_fts()
+    _backfill()
+
+    op.create_index(op.f('ix_customers_name_norm'), 'customers', ['name_norm'], unique=False)
+    op.create_index(op.f('ix_customers_phone_norm'), 'customers', ['phone_norm'], unique=False)
+    if dialect == 'postgresql':
+        op.drop_index('ix_customers_name_trgm', table_name='customers')
+        op.drop_index('ix_customers_phone_trgm', table_name='customers')
+        for column in ('name_norm', 'phone_norm'):
+            op.create_index(
+                f'ix_customers_{column}_trgm', 'customers', [column], unique=False,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+            )
+    elif dialect == 'sqlite':
+        _sqlite_fts(('name_norm', 'phone_norm', 'email'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for column in ('name_norm', 'phone_norm'):
+            op.drop_index(f'ix_customers_{column}_trgm', table_name='customers')
+        for column in ('name', 'phone'):
+            op.create_index(
+                f'ix_customers_{column}_trgm', 'customers', [column], unique=False,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+            )
+    elif dialect == 'sqlite':
+        _drop_sqlite_fts()
+        _sqlite_fts(('name', 'phone', 'email'))
+    op.drop_index(op.f('ix_customers_phone_norm'), table_name='customers')
+    op.drop_index(op.f('ix_customers_name_norm'), table_name='customers')
+    op.drop_column('customers', 'phone_norm')
+    op.drop_column('customers', 'name_norm')
@@ -0,0 +1,47 @@
+"""add work order complaint search index
+
+Revision ID: b8e4c2a6d913
+Revises: a3d9f1c7e624
+Create Date: 2025-10-08 16:03:44.518290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4c2a6d913'
+down_revision: Union[str, Sequence[str], None] = 'a3d9f1c7e624'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.create_index(
+            'ix_work_orders_complaint_trgm', 'work_orders', ['complaint'], unique=False,
+            postgresql_using='gin', postgresql_ops={'complaint': 'gin_trgm_ops'}
+        )
+    elif dialect == 'sqlite':
+        delete_old = "INSERT INTO work_orders_fts(work_orders_fts, rowid, complaint) VALUES ('delete', old.id, old.complaint);"
+        insert_new = 'INSERT INTO work_orders_fts(rowid, complaint) VALUES (new.id, new.complaint);'
+        op.execute("CREATE VIRTUAL TABLE work_orders_fts USING fts5(complaint, content='', tokenize='trigram')")
+        op.execute(f'CREATE TRIGGER work_orders_fts_ai AFTER INSERT ON work_orders BEGIN {insert_new} END')
+        op.execute(f'CREATE TRIGGER work_orders_fts_ad AFTER DELETE ON work_orders BEGIN {delete_old} END')
+        op.execute(f'CREATE TRIGGER work_orders_fts_au AFTER UPDATE OF complaint ON work_orders BEGIN {delete_old} {insert_new} END')
+        op.execute('INSERT INTO work_orders_fts(rowid, complaint) SELECT id, complaint FROM work_orders')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_work_orders_complaint_trgm', table_name='work_orders')
+    elif dialect == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f'DROP TRIGGER IF EXISTS work_orders_fts_{suffix}')
+        op.execute('DROP TABLE IF EXISTS work_orders_fts')
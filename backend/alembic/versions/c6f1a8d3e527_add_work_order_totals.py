@@ -0,0 +1,51 @@
+"""add work order totals
+
+Revision ID: c6f1a8d3e527
+Revises: b8e4c2a6d913
+Create Date: 2025-10-10 11:26:09.304871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f1a8d3e527'
+down_revision: Union[str, Sequence[str], None] = 'b8e4c2a6d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _item_sum(item_type: str) -> str:
+    # Compare as text: the enum labels' case differs between databases
+    return (
+        "(SELECT COALESCE(SUM(i.qty * i.unit_price), 0) FROM work_order_items i "
+        f"WHERE i.work_order_id = work_orders.id AND lower(CAST(i.item_type AS VARCHAR)) = '{item_type}')"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('work_orders', sa.Column('items_parts_total', sa.Numeric(precision=14, scale=4), server_default='0', nullable=False))
+    op.add_column('work_orders', sa.Column('items_labor_total', sa.Numeric(precision=14, scale=4), server_default='0', nullable=False))
+    op.add_column('work_orders', sa.Column('services_total', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False))
+
+    # Backfill from the existing items and services
+    op.execute(
+        f"UPDATE work_orders SET items_parts_total = {_item_sum('part')}, "
+        f"items_labor_total = {_item_sum('labor')}, "
+        "services_total = (SELECT COALESCE(SUM(COALESCE(s.base_price, 0)), 0) "
+        "FROM work_order_services ws JOIN services s ON s.id = ws.service_id "
+        "WHERE ws.work_order_id = work_orders.id) "
+        "WHERE EXISTS (SELECT 1 FROM work_order_items i WHERE i.work_order_id = work_orders.id) "
+        "OR EXISTS (SELECT 1 FROM work_order_services ws WHERE ws.work_order_id = work_orders.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('work_orders', 'services_total')
+    op.drop_column('work_orders', 'items_labor_total')
+    op.drop_column('work_orders', 'items_parts_total')
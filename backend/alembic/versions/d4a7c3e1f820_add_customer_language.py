@@ -0,0 +1,28 @@
+"""add customer language
+
+Revision ID: d4a7c3e1f820
+Revises: b7d4e1a9c250
+Create Date: 2025-09-30 10:05:41.217384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c3e1f820'
+down_revision: Union[str, Sequence[str], None] = 'b7d4e1a9c250'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('customers', sa.Column('language', sa.String(length=8), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('customers', 'language')
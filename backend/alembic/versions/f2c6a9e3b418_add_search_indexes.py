@@ -0,0 +1,65 @@
+"""add search indexes
+
+Revision ID: f2c6a9e3b418
+Revises: e5b8d2f4a731
+Create Date: 2025-10-03 14:27:52.903162
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6a9e3b418'
+down_revision: Union[str, Sequence[str], None] = 'e5b8d2f4a731'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = {
+    'customers': ('name', 'phone', 'email'),
+    'vehicles': ('plate_no', 'vin'),
+    'parts': ('name', 'part_no', 'supplier'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                op.create_index(
+                    f'ix_{table}_{column}_trgm', table, [column], unique=False,
+                    postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+                )
+    elif dialect == 'sqlite':
+        for table, columns in SEARCH_COLUMNS.items():
+            fts = f'{table}_fts'
+            names = ', '.join(columns)
+            new = ', '.join(f'new.{c}' for c in columns)
+            old = ', '.join(f'old.{c}' for c in columns)
+            delete_old = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+            insert_new = f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});'
+            op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='', tokenize='trigram')")
+            op.execute(f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END')
+            op.execute(f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END')
+            op.execute(f'CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete_old} {insert_new} END')
+            op.execute(f'INSERT INTO {fts}(rowid, {names}) SELECT id, {names} FROM {table}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
+    elif dialect == 'sqlite':
+        for table in SEARCH_COLUMNS:
+            fts = f'{table}_fts'
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {fts}')
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..core.deps import get_db, get_current_user
-from ..core.security import verify_password, create_access_token
+from ..core.security import verify_and_update_password_async, create_access_token
 from ..db.models.user import User
 from ..db.schemas.auth import LoginRequest, LoginResponse, UserResponse
 
@@ -19,7 +19,10 @@ async def login(
     user = result.scalar_one_or_none()
     
     # Check if user exists and password is correct
-    if not user or not verify_password(login_data.password, user.password_hash):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await verify_and_update_password_async(login_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"error": {"code": "INVALID_CREDENTIALS", "message": "Invalid email or password"}},
@@ -32,6 +35,11 @@ async def login(
             detail={"error": {"code": "INACTIVE_USER", "message": "User account is disabled"}},
         )
     
+    # Transparently upgrade hashes made with an older cost setting
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    
     # Create access token
     access_token = create_access_token(
         data={"sub": str(user.id), "email": user.email, "role": user.role.value}
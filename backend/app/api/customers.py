@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import math
 
 from ..core.deps import get_db, get_current_user, require_roles
+from ..db.search import apply_search
+from ..db.writes import update_returning
 from ..db.models import User, UserRole, Customer
+from ..db.models.customer import search_key_values
 from ..db.schemas import (
     CustomerCreate, 
     CustomerUpdate, 
@@ -28,7 +31,9 @@ async def get_customers(
     
     - **page**: Page number (starts from 1)
     - **size**: Number of items per page (max 100)  
-    - **q**: Search query for name, phone, or email
+    - **q**: Search query for name, phone, or email. Names match across
+      Arabic spelling variants and phones in any format ("+967-1-234-567"
+      finds "01234567").
     """
     # Build query
     query = select(Customer)
@@ -36,13 +41,9 @@ async def get_customers(
     
     # Add search filter
     if q:
-        search_filter = or_(
-            Customer.name.ilike(f"%{q}%"),
-            Customer.phone.ilike(f"%{q}%"),
-            Customer.email.ilike(f"%{q}%")
-        )
-        query = query.where(search_filter)
-        count_query = count_query.where(search_filter)
+        dialect = db.get_bind().dialect.name
+        query = apply_search(query, Customer, q, dialect)
+        count_query = apply_search(count_query, Customer, q, dialect, rank=False)
     
     # Get total count
     total_result = await db.execute(count_query)
@@ -80,12 +81,12 @@ async def create_customer(
     - **phone**: Customer phone number  
     - **email**: Customer email address
     - **address**: Customer address
+    - **language**: Notification language, "ar" or "en"
     """
     # Create customer
     customer = Customer(**customer_data.model_dump())
     db.add(customer)
     await db.commit()
-    await db.refresh(customer)
     
     return customer
 
@@ -120,10 +121,10 @@ async def update_customer(
     
     Only provided fields will be updated. All fields are optional.
     """
-    # Get customer
-    query = select(Customer).where(Customer.id == customer_id)
-    result = await db.execute(query)
-    customer = result.scalar_one_or_none()
+    # Update fields
+    update_data = customer_data.model_dump(exclude_unset=True)
+    update_data.update(search_key_values(update_data))
+    customer = await update_returning(db, Customer, customer_id, update_data)
     
     if not customer:
         raise HTTPException(
@@ -131,13 +132,7 @@ async def update_customer(
             detail="Customer not found"
         )
     
-    # Update fields
-    update_data = customer_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(customer, field, value)
-    
     await db.commit()
-    await db.refresh(customer)
     
     return customer
 
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
@@ -8,7 +10,13 @@ import os
 from ..core.deps import get_db, get_current_user, require_roles
 from ..db.models import User, UserRole, Invoice, Payment, WorkOrder, WorkOrderItem, Media
 from ..db.schemas.invoices import InvoiceCreate, InvoiceResponse, InvoiceListResponse, PaymentCreate, PaymentResponse
-from ..services.pdf import PDFService
+from ..core.config import settings
+from ..db.writes import update_returning
+from ..services.work_order_totals import work_order_subtotal
+from ..services.pdf import (
+    invoice_snapshot, invoice_pdf_digest, invoice_pdf_path, render_invoice_pdf, RenderQueueFull,
+    store_invoice_pdf, discard_invoice_pdf, retire_invoice_pdf, sweep_invoice_pdfs
+)
 
 router = APIRouter(prefix="/invoices", tags=["Invoices"])
 
@@ -34,11 +42,10 @@ async def create_invoice(
     db: AsyncSession = Depends(get_db)
 ):
     """Create new invoice. Sales and admin only."""
-    # Check if work order exists
-    stmt = select(WorkOrder).options(
-        selectinload(WorkOrder.items),
-        selectinload(WorkOrder.services)
-    ).where(WorkOrder.id == invoice_data.work_order_id)
+    # Check if work order exists; re-read the totals, which change outside the ORM
+    stmt = select(WorkOrder).where(
+        WorkOrder.id == invoice_data.work_order_id
+    ).execution_options(populate_existing=True)
     result = await db.execute(stmt)
     work_order = result.scalar_one_or_none()
     
@@ -58,18 +65,8 @@ async def create_invoice(
             detail="Invoice already exists for this work order"
         )
     
-    # Calculate subtotal from work order items
-    subtotal = Decimal('0.00')
-    for item in work_order.items:
-        item_total = item.qty * item.unit_price
-        subtotal += item_total
-    
-    # Add services if any
-    for service in work_order.services:
-        if hasattr(service, 'price') and service.price:
-            subtotal += service.price
-        elif hasattr(service.service, 'base_price') and service.service.base_price:
-            subtotal += service.service.base_price
+    # Items and services are totalled as they are added, no need to load them
+    subtotal = work_order_subtotal(work_order)
     
     # Apply tax and discount with proper validation
     tax_rate = Decimal('0.15')  # 15% default tax
@@ -106,7 +103,6 @@ async def create_invoice(
     
     db.add(invoice)
     await db.commit()
-    await db.refresh(invoice)
     
     return invoice
 
@@ -132,17 +128,26 @@ async def get_invoice(
 @router.get("/{invoice_id}/pdf")
 async def get_invoice_pdf(
     invoice_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Generate and stream PDF for invoice."""
+    """
+    Stream the PDF for an invoice.
+    
+    Rendered PDFs are cached under the storage directory, keyed by a hash of
+    their render inputs, so payments or item changes produce a new file. The
+    hash is the ETag: If-None-Match returns 304 and Range requests are served
+    from the cached file. Superseded files are swept after
+    ``pdf_cache_grace_seconds`` (or by ``python -m app.services.pdf sweep``).
+    """
     # Get invoice with work order details
     stmt = select(Invoice).options(
         selectinload(Invoice.work_order).selectinload(WorkOrder.customer),
         selectinload(Invoice.work_order).selectinload(WorkOrder.vehicle),
         selectinload(Invoice.work_order).selectinload(WorkOrder.items),
         selectinload(Invoice.work_order).selectinload(WorkOrder.services),
-        selectinload(Invoice.work_order).selectinload(WorkOrder.media)
+        selectinload(Invoice.work_order).selectinload(WorkOrder.media).selectinload(Media.renditions)
     ).where(Invoice.id == invoice_id)
     result = await db.execute(stmt)
     invoice = result.scalar_one_or_none()
@@ -153,15 +158,57 @@ async def get_invoice_pdf(
             detail="Invoice not found"
         )
     
-    # Generate PDF
-    pdf_service = PDFService()
-    pdf_content = await pdf_service.generate_invoice_pdf(invoice)
+    snapshot = invoice_snapshot(invoice)
+    digest = invoice_pdf_digest(snapshot)
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename=invoice_{invoice_id}.pdf"
+    }
     
-    return Response(
-        content=pdf_content,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=invoice_{invoice_id}.pdf"}
-    )
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    relative_path = invoice_pdf_path(invoice_id, digest)
+    file_path = os.path.join(settings.storage_dir, relative_path)
+    if invoice.pdf_path != relative_path or not os.path.exists(file_path):
+        # Generate PDF off the event loop
+        try:
+            pdf_content = await render_invoice_pdf(snapshot)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="PDF rendering timed out"
+            )
+        except RenderQueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many PDFs are being rendered, try again shortly"
+            )
+        file_path = await store_invoice_pdf(relative_path, pdf_content)
+        
+        previous_path = invoice.pdf_path
+        if previous_path != relative_path:
+            # Only replace the path read above: a concurrent request may have
+            # stored a newer render, whose file must not be discarded
+            unchanged = Invoice.pdf_path.is_(None) if previous_path is None else Invoice.pdf_path == previous_path
+            replaced = await update_returning(db, Invoice, invoice_id, {"pdf_path": relative_path}, unchanged)
+            await db.commit()
+            if replaced is None:
+                current_path = await db.scalar(select(Invoice.pdf_path).where(Invoice.id == invoice_id))
+                if current_path != relative_path:
+                    # Nothing points at this render: don't leave it on disk
+                    await discard_invoice_pdf(relative_path)
+                    return Response(content=pdf_content, media_type="application/pdf", headers=headers)
+            else:
+                # Other requests may still be streaming the old file: the sweep
+                # removes it once the grace period has passed
+                await retire_invoice_pdf(previous_path)
+                await sweep_invoice_pdfs(db, invoice_id)
+    
+    return FileResponse(file_path, media_type="application/pdf", headers=headers)
 
 @router.post("/payments", response_model=PaymentResponse)
 async def create_payment(
@@ -215,7 +262,6 @@ async def create_payment(
     invoice.paid = new_paid_amount
     
     await db.commit()
-    await db.refresh(payment)
     
     return payment
 
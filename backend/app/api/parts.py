@@ -1,18 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, insert, update, case, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import math
 
 from ..core.deps import get_db, get_current_user, require_roles
-from ..db.models import User, UserRole
+from ..db.search import apply_search
+from ..db.writes import update_returning
+from ..services.suggest import track as suggest_track
+from ..db.models import User, UserRole, StockMovement
 from ..db.models.service import Part
 from ..db.schemas import (
     PartCreate, 
     PartUpdate, 
     PartResponse, 
     PartListResponse,
-    PartStockAdjustment
+    PartStockAdjustment,
+    StockMovementBatch,
+    StockMovementBatchResponse,
+    StockMovementResponse
 )
 
 router = APIRouter(prefix="/parts", tags=["Parts"])
@@ -45,13 +51,9 @@ async def get_parts(
     
     # Add search filter
     if q:
-        search_filter = or_(
-            Part.name.ilike(f"%{q}%"),
-            Part.part_no.ilike(f"%{q}%"),
-            Part.supplier.ilike(f"%{q}%")
-        )
-        query = query.where(search_filter)
-        count_query = count_query.where(search_filter)
+        dialect = db.get_bind().dialect.name
+        query = apply_search(query, Part, q, dialect)
+        count_query = apply_search(count_query, Part, q, dialect, rank=False)
     
     # Get total count
     total_result = await db.execute(count_query)
@@ -98,10 +100,94 @@ async def create_part(
     part = Part(**part_data.model_dump())
     db.add(part)
     await db.commit()
-    await db.refresh(part)
     
     return part
 
+@router.post("/stock-movements", response_model=StockMovementBatchResponse)
+async def apply_stock_movements(
+    batch: StockMovementBatch,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply many stock deltas (goods receipt, stocktake) in one transaction.
+    
+    - **reason**: receipt, stocktake, adjustment, damage or return
+    - **ref**: Delivery note, stocktake sheet or other reference
+    - **movements**: Up to 1000 `{part_id, delta, note}` lines
+    
+    Either every line is applied and recorded in the stock ledger, or none
+    is: unknown parts give 404 and parts whose stock would go negative at
+    any line, not just at the end of the batch, give 400 (409 if their
+    stock changed concurrently and the batch would now fit).
+    """
+    # Net delta per part, applied by a single UPDATE, and the lowest running
+    # total each part reaches along the way
+    net = {}
+    lowest = {}
+    for line in batch.movements:
+        net[line.part_id] = net.get(line.part_id, 0) + line.delta
+        lowest[line.part_id] = min(lowest.get(line.part_id, 0), net[line.part_id])
+    
+    current_stock = func.coalesce(Part.stock, 0)
+    stmt = (
+        update(Part)
+        .where(Part.id.in_(net), current_stock + case(lowest, value=Part.id, else_=0) >= 0)
+        .values(stock=current_stock + case(net, value=Part.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        rows = (await db.execute(stmt.returning(Part.id, Part.stock))).all()
+    else:
+        result = await db.execute(stmt)
+        rows = []
+        if result.rowcount == len(net):
+            rows = (await db.execute(select(Part.id, Part.stock).where(Part.id.in_(net)))).all()
+    stock = dict(rows)
+    
+    if len(stock) < len(net):
+        await db.rollback()
+        current = dict((await db.execute(select(Part.id, Part.stock).where(Part.id.in_(net)))).all())
+        missing = sorted(set(net) - set(current))
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Parts not found: {', '.join(map(str, missing))}"
+            )
+        negative = sorted(pid for pid, low in lowest.items() if (current[pid] or 0) + low < 0)
+        if not negative:
+            # Stock changed between the UPDATE and this read
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stock changed while applying the movements, please retry"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Stock movements would result in negative stock for parts: {', '.join(map(str, negative))}"
+        )
+    
+    # Ledger rows in batch order, each with the stock right after it
+    running = {pid: stock[pid] - delta for pid, delta in net.items()}
+    ledger = []
+    for line in batch.movements:
+        running[line.part_id] += line.delta
+        ledger.append({
+            "part_id": line.part_id,
+            "delta": line.delta,
+            "stock_after": running[line.part_id],
+            "reason": batch.reason.value,
+            "ref": batch.ref,
+            "note": line.note,
+            "created_by": current_user.id,
+        })
+    await db.execute(insert(StockMovement), ledger)
+    await db.commit()
+    
+    return StockMovementBatchResponse(
+        movements=len(ledger),
+        parts=[{"id": pid, "stock": stock[pid]} for pid in sorted(stock)]
+    )
+
 @router.get("/{part_id}", response_model=PartResponse)
 async def get_part(
     part_id: int,
@@ -133,10 +219,9 @@ async def update_part(
     
     Only provided fields will be updated. All fields are optional.
     """
-    # Get part
-    query = select(Part).where(Part.id == part_id)
-    result = await db.execute(query)
-    part = result.scalar_one_or_none()
+    # Update fields
+    update_data = part_data.model_dump(exclude_unset=True)
+    part = await update_returning(db, Part, part_id, update_data)
     
     if not part:
         raise HTTPException(
@@ -144,13 +229,8 @@ async def update_part(
             detail="Part not found"
         )
     
-    # Update fields
-    update_data = part_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(part, field, value)
-    
+    suggest_track(db, part)
     await db.commit()
-    await db.refresh(part)
     
     return part
 
@@ -158,42 +238,69 @@ async def update_part(
 async def adjust_part_stock(
     part_id: int,
     adjustment: PartStockAdjustment,
-    current_user: dict = Depends(get_current_user),
+    current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Adjust part stock quantity.
     
     - **delta**: Stock adjustment amount (positive to add, negative to subtract)
+    - **reason**: Ledger reason (default: adjustment)
+    - **ref**, **note**: Optional ledger reference and note
     """
-    # Get part
-    query = select(Part).where(Part.id == part_id)
-    result = await db.execute(query)
-    part = result.scalar_one_or_none()
+    # Adjust stock in one statement, refusing to go negative
+    new_stock = func.coalesce(Part.stock, 0) + adjustment.delta
+    part = await update_returning(db, Part, part_id, {"stock": new_stock}, new_stock >= 0)
     
     if not part:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Part not found"
-        )
-    
-    # Adjust stock
-    new_stock = (part.stock or 0) + adjustment.delta
-    
-    # Prevent negative stock
-    if new_stock < 0:
+        exists = await db.scalar(select(Part.id).where(Part.id == part_id))
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Part not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Stock adjustment would result in negative stock"
         )
     
-    part.stock = new_stock
-    
+    db.add(StockMovement(
+        part_id=part.id,
+        delta=adjustment.delta,
+        stock_after=part.stock,
+        reason=adjustment.reason.value,
+        ref=adjustment.ref,
+        note=adjustment.note,
+        created_by=current_user.id
+    ))
     await db.commit()
-    await db.refresh(part)
     
     return part
 
+@router.get("/{part_id}/stock-movements", response_model=list[StockMovementResponse])
+async def get_part_stock_movements(
+    part_id: int,
+    limit: int = Query(50, ge=1, le=500, description="Number of most recent movements"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a part's stock ledger, most recent first."""
+    exists = await db.scalar(select(Part.id).where(Part.id == part_id))
+    if exists is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Part not found"
+        )
+    
+    query = (
+        select(StockMovement)
+        .where(StockMovement.part_id == part_id)
+        .order_by(StockMovement.id.desc())
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return result.scalars().all()
+
 @router.delete("/{part_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_part(
     part_id: int,
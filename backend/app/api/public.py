@@ -2,7 +2,7 @@
 import os
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Form
 from fastapi.responses import HTMLResponse
@@ -19,6 +19,7 @@ from ..db.models.media import Media, MediaPhase
 from ..db.models.approval_request import ApprovalRequest
 from ..db.schemas import PublicApprovalResponse, ApprovalDecision
 from ..services.audit import log_action
+from ..services.media import pick_rendition, rendition_mime
 
 router = APIRouter(prefix="/public", tags=["Public"])
 
@@ -66,7 +67,7 @@ async def get_approval_page(
     before_photos = []
     for media in workorder.media:
         if media.phase == MediaPhase.BEFORE:
-            before_photos.append(f"/public/media/{token}/{media.path}")
+            before_photos.append(f"/public/media/{token}/{media.path}?w=480")
     
     # Format currency values
     est_parts = f"${workorder.est_parts:.2f}" if workorder.est_parts else "N/A"
@@ -171,11 +172,17 @@ async def submit_approval_decision(
 
 @router.get("/media/{token}/{path:path}")
 async def get_public_media(
+    request: Request,
     token: str,
     path: str,
+    w: Optional[int] = Query(None, ge=1, le=4096),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get media file for public approval (token-protected access to BEFORE photos)."""
+    """
+    Get media file for public approval (token-protected access to BEFORE photos).
+    
+    - **w**: Preferred image width in pixels; the smallest rendition at least this wide is served (WebP if accepted)
+    """
     # Verify token exists and is valid
     approval_query = select(ApprovalRequest).where(ApprovalRequest.token == token)
     approval_result = await db.execute(approval_query)
@@ -194,6 +201,7 @@ async def get_public_media(
         .where(Media.path == path)
         .where(Media.work_order_id == approval_request.work_order_id)
         .where(Media.phase == MediaPhase.BEFORE)  # Only allow BEFORE photos
+        .options(selectinload(Media.renditions))
     )
     media_result = await db.execute(media_query)
     media = media_result.scalar_one_or_none()
@@ -201,12 +209,19 @@ async def get_public_media(
     if not media:
         raise HTTPException(status_code=404, detail="Media not found or access denied")
     
+    from fastapi.responses import FileResponse
+    rendition = pick_rendition(media, w, request.headers.get("accept", ""))
+    if rendition and os.path.exists(os.path.join(settings.storage_dir, rendition.path)):
+        return FileResponse(
+            os.path.join(settings.storage_dir, rendition.path),
+            media_type=rendition_mime(rendition),
+            headers={"Vary": "Accept"}
+        )
+    
     # Build full file path
-    from ..core.config import settings
     file_path = os.path.join(settings.storage_dir, path)
     
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
-    from fastapi.responses import FileResponse
     return FileResponse(file_path, filename=os.path.basename(path))
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, desc
 from datetime import datetime, date
@@ -6,11 +6,23 @@ from typing import Optional, List
 from ..core.deps import get_db, get_current_user, require_roles
 from ..db.models import (
     User, UserRole, WorkOrder, WorkOrderStatus, WorkOrderService, 
-    Service, Part, Customer, Invoice
+    Service, Part, Customer, Invoice,
+    DailyWorkOrderStatus, DailyRevenue, DailyServiceUsage
 )
+from ..services.rollups import utc_today, start_of_day, utc_date
+from ..utils.pagination import encode_cursor, decode_cursor, keyset_before
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
+def _closed_days(day_column, from_date: Optional[date], to_date: Optional[date], today: date) -> list:
+    """Rollup filter for the requested range, excluding today."""
+    filters = [day_column < today]
+    if from_date:
+        filters.append(day_column >= from_date)
+    if to_date:
+        filters.append(day_column <= to_date)
+    return filters
+
 @router.get("/kpis")
 async def get_kpis(
     from_date: Optional[date] = Query(None, alias="from"),
@@ -18,47 +30,59 @@ async def get_kpis(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get KPI data for dashboards."""
+    """
+    Get KPI data for dashboards.
     
-    # Base date filter
-    date_filter = []
-    if from_date:
-        date_filter.append(WorkOrder.created_at >= from_date)
-    if to_date:
-        date_filter.append(WorkOrder.created_at <= to_date)
+    Closed days are read from the daily rollup tables; only today's rows
+    are aggregated from the raw tables.
+    """
+    today = utc_today()
+    
+    # Whether today falls in the requested range
+    include_today = (from_date is None or from_date <= today) and (to_date is None or to_date >= today)
+    today_start = start_of_day(today)
     
     # Work orders by status
+    status_counts = {}
     wo_status_query = select(
-        WorkOrder.status,
-        func.count(WorkOrder.id).label('count')
-    ).group_by(WorkOrder.status)
-    
-    if date_filter:
-        wo_status_query = wo_status_query.where(and_(*date_filter))
+        DailyWorkOrderStatus.status,
+        func.sum(DailyWorkOrderStatus.count).label('count')
+    ).where(*_closed_days(DailyWorkOrderStatus.day, from_date, to_date, today)).group_by(DailyWorkOrderStatus.status)
+    for row in (await db.execute(wo_status_query)).fetchall():
+        status_counts[row.status] = status_counts.get(row.status, 0) + int(row.count or 0)
+    
+    if include_today:
+        today_status_query = select(
+            WorkOrder.status,
+            func.count(WorkOrder.id).label('count')
+        ).where(WorkOrder.created_at >= today_start).group_by(WorkOrder.status)
+        for row in (await db.execute(today_status_query)).fetchall():
+            status_counts[row.status.value] = status_counts.get(row.status.value, 0) + row.count
     
-    wo_status_result = await db.execute(wo_status_query)
     work_orders_by_status = [
-        {"status": row.status.value, "count": row.count}
-        for row in wo_status_result.fetchall()
+        {"status": status_value, "count": count}
+        for status_value, count in status_counts.items()
+        if count
     ]
     
     # Revenue by day (from invoices)
-    revenue_query = select(
-        func.date(Invoice.created_at).label('date'),
-        func.sum(Invoice.total).label('total')
-    ).group_by(func.date(Invoice.created_at)).order_by(func.date(Invoice.created_at))
-    
-    if from_date:
-        revenue_query = revenue_query.where(Invoice.created_at >= from_date)
-    if to_date:
-        revenue_query = revenue_query.where(Invoice.created_at <= to_date)
-    
-    revenue_result = await db.execute(revenue_query)
+    revenue_query = select(DailyRevenue.day, DailyRevenue.invoiced).where(
+        *_closed_days(DailyRevenue.day, from_date, to_date, today), DailyRevenue.invoice_count > 0
+    ).order_by(DailyRevenue.day)
     revenue_by_day = [
-        {"date": str(row.date), "total": float(row.total or 0)}
-        for row in revenue_result.fetchall()
+        {"date": str(row.day), "total": float(row.invoiced or 0)}
+        for row in (await db.execute(revenue_query)).fetchall()
     ]
     
+    if include_today:
+        today_revenue_query = select(
+            func.count(Invoice.id).label('count'),
+            func.sum(Invoice.total).label('total')
+        ).where(Invoice.created_at >= today_start)
+        today_revenue = (await db.execute(today_revenue_query)).one()
+        if today_revenue.count:
+            revenue_by_day.append({"date": today.isoformat(), "total": float(today_revenue.total or 0)})
+    
     # Low stock parts
     low_stock_query = select(Part).where(
         Part.stock <= Part.min_stock
@@ -76,20 +100,32 @@ async def get_kpis(
     ]
     
     # Top services (by work order count)
-    top_services_query = select(
+    service_counts = {}
+    service_names = {}
+    rollup_services_query = select(
         Service.id,
         Service.name,
-        func.count(WorkOrderService.work_order_id).label('count')
-    ).join(WorkOrderService).join(WorkOrder).group_by(Service.id, Service.name).order_by(desc('count')).limit(10)
+        func.sum(DailyServiceUsage.count).label('count')
+    ).join(DailyServiceUsage, DailyServiceUsage.service_id == Service.id).where(*_closed_days(DailyServiceUsage.day, from_date, to_date, today)).group_by(Service.id, Service.name)
+    for row in (await db.execute(rollup_services_query)).fetchall():
+        service_names[row.id] = row.name
+        service_counts[row.id] = service_counts.get(row.id, 0) + int(row.count or 0)
+    
+    if include_today:
+        today_services_query = select(
+            Service.id,
+            Service.name,
+            func.count(WorkOrderService.work_order_id).label('count')
+        ).join(WorkOrderService).join(WorkOrder).where(WorkOrder.created_at >= today_start).group_by(Service.id, Service.name)
+        for row in (await db.execute(today_services_query)).fetchall():
+            service_names[row.id] = row.name
+            service_counts[row.id] = service_counts.get(row.id, 0) + row.count
     
-    if date_filter:
-        top_services_query = top_services_query.where(and_(*date_filter))
-    
-    top_services_result = await db.execute(top_services_query)
     top_services = [
-        {"service_id": row.id, "name": row.name, "count": row.count}
-        for row in top_services_result.fetchall()
-    ]
+        {"service_id": service_id, "name": service_names[service_id], "count": count}
+        for service_id, count in sorted(service_counts.items(), key=lambda item: item[1], reverse=True)
+        if count
+    ][:10]
     
     return {
         "work_orders_by_status": work_orders_by_status,
@@ -104,10 +140,19 @@ async def get_workorder_report(
     tech: Optional[int] = Query(None),
     from_date: Optional[date] = Query(None, alias="from"),
     to_date: Optional[date] = Query(None, alias="to"),
+    page: int = Query(1, ge=1, description="Page of the work_orders section"),
+    size: int = Query(50, ge=1, le=200, description="Page size of the work_orders section"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get work order report with filters."""
+    """
+    Get work order report with filters.
+    
+    Chart series are aggregated in SQL; the per-order **work_orders** list is
+    paginated (newest first) so the response size does not grow with the
+    date range.
+    """
     
     filters = []
     if status:
@@ -119,40 +164,76 @@ async def get_workorder_report(
     if to_date:
         filters.append(WorkOrder.created_at <= to_date)
     
-    query = select(WorkOrder).order_by(desc(WorkOrder.created_at))
-    if filters:
-        query = query.where(and_(*filters))
-    
-    result = await db.execute(query)
-    work_orders = result.scalars().all()
+    # Status distribution
+    status_query = select(
+        WorkOrder.status,
+        func.count(WorkOrder.id).label('count')
+    ).where(*filters).group_by(WorkOrder.status)
+    status_result = await db.execute(status_query)
+    by_status = [
+        {"label": row.status.value, "value": row.count}
+        for row in status_result.fetchall()
+    ]
     
-    # Format for charts
-    status_counts = {}
-    daily_counts = {}
+    # Daily distribution, by UTC day like the rollups
+    day = utc_date(WorkOrder.created_at, db.get_bind().dialect.name)
+    daily_query = select(
+        day.label('day'),
+        func.count(WorkOrder.id).label('count')
+    ).where(*filters).group_by(day).order_by(day)
+    daily_result = await db.execute(daily_query)
+    by_day = [
+        {"label": str(row.day), "value": row.count}
+        for row in daily_result.fetchall()
+    ]
     
-    for wo in work_orders:
-        # Status distribution
-        status_key = wo.status.value
-        status_counts[status_key] = status_counts.get(status_key, 0) + 1
-        
-        # Daily distribution
-        day_key = wo.created_at.date().isoformat()
-        daily_counts[day_key] = daily_counts.get(day_key, 0) + 1
+    # Paginated detail rows
+    list_query = select(
+        WorkOrder.id,
+        WorkOrder.status,
+        WorkOrder.created_at,
+        WorkOrder.customer_id,
+        WorkOrder.vehicle_id,
+        WorkOrder.final_cost
+    ).where(*filters)
+    
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        list_query = list_query.where(keyset_before(
+            WorkOrder.created_at, WorkOrder.id, cursor_created_at, cursor_id, db.bind.dialect.name
+        ))
+    else:
+        list_query = list_query.offset((page - 1) * size)
+    
+    list_query = list_query.order_by(desc(WorkOrder.created_at), desc(WorkOrder.id)).limit(size + 1)
+    list_result = await db.execute(list_query)
+    rows = list_result.fetchall()
+    
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
     
     return {
-        "total_count": len(work_orders),
-        "by_status": [{"label": k, "value": v} for k, v in status_counts.items()],
-        "by_day": [{"label": k, "value": v} for k, v in sorted(daily_counts.items())],
+        "total_count": sum(entry["value"] for entry in by_status),
+        "by_status": by_status,
+        "by_day": by_day,
+        "page": page,
+        "size": size,
+        "next_cursor": next_cursor,
         "work_orders": [
             {
-                "id": wo.id,
-                "status": wo.status.value,
-                "created_at": wo.created_at.isoformat(),
-                "customer_id": wo.customer_id,
-                "vehicle_id": wo.vehicle_id,
-                "final_cost": wo.final_cost if wo.final_cost is not None else 0.0
+                "id": row.id,
+                "status": row.status.value,
+                "created_at": row.created_at.isoformat(),
+                "customer_id": row.customer_id,
+                "vehicle_id": row.vehicle_id,
+                "final_cost": row.final_cost if row.final_cost is not None else 0.0
             }
-            for wo in work_orders
+            for row in rows
         ]
     }
 
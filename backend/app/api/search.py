@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+
+from ..core.config import settings
+from ..core.deps import get_current_user
+from ..db.models import User
+from ..db.schemas import GlobalSearchResponse
+from ..services.global_search import global_search
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+@router.get("", response_model=GlobalSearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, description="Name, phone, plate, VIN, complaint text or a work order/invoice number"),
+    limit: int = Query(5, ge=1, le=settings.global_search_max_per_group, description="Maximum hits per group"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Search customers, vehicles, work orders and invoices in one call.
+    
+    The groups are queried concurrently. Work orders and invoices also
+    match through their customer and vehicle, most recent first; an exact
+    work order or invoice number ranks first. Groups that miss the latency
+    budget are listed in `incomplete` instead of delaying the response.
+    """
+    return await global_search(q, limit)
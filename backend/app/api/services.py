@@ -5,6 +5,7 @@ from typing import Optional
 import math
 
 from ..core.deps import get_db, get_current_user, require_roles
+from ..db.writes import update_returning
 from ..db.models import User, UserRole
 from ..db.models.service import Service
 from ..db.schemas import (
@@ -101,7 +102,6 @@ async def create_service(
     service = Service(**service_data.model_dump())
     db.add(service)
     await db.commit()
-    await db.refresh(service)
     
     return service
 
@@ -136,10 +136,9 @@ async def update_service(
     
     Only provided fields will be updated. All fields are optional.
     """
-    # Get service
-    query = select(Service).where(Service.id == service_id)
-    result = await db.execute(query)
-    service = result.scalar_one_or_none()
+    # Update fields
+    update_data = service_data.model_dump(exclude_unset=True)
+    service = await update_returning(db, Service, service_id, update_data)
     
     if not service:
         raise HTTPException(
@@ -147,13 +146,7 @@ async def update_service(
             detail="Service not found"
         )
     
-    # Update fields
-    update_data = service_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(service, field, value)
-    
     await db.commit()
-    await db.refresh(service)
     
     return service
 
@@ -164,10 +157,8 @@ async def toggle_service_active(
     db: AsyncSession = Depends(get_db)
 ):
     """Toggle service active status."""
-    # Get service
-    query = select(Service).where(Service.id == service_id)
-    result = await db.execute(query)
-    service = result.scalar_one_or_none()
+    # Toggle active status
+    service = await update_returning(db, Service, service_id, {"is_active": ~Service.is_active})
     
     if not service:
         raise HTTPException(
@@ -175,11 +166,7 @@ async def toggle_service_active(
             detail="Service not found"
         )
     
-    # Toggle active status
-    service.is_active = not service.is_active
-    
     await db.commit()
-    await db.refresh(service)
     
     return service
 
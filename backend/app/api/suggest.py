@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Literal, Optional
+
+from ..core.config import settings
+from ..core.deps import get_current_user
+from ..db.models import User
+from ..db.schemas import SuggestListResponse
+from ..services.suggest import suggest_index
+
+router = APIRouter(prefix="/suggest", tags=["Suggest"])
+
+@router.get("", response_model=SuggestListResponse)
+async def suggest(
+    q: str = Query(..., min_length=1, description="Prefix of a part number, part name, plate number or VIN"),
+    types: Optional[List[Literal["part", "vehicle"]]] = Query(None, description="Restrict to these types"),
+    limit: int = Query(10, ge=1, le=settings.suggest_max_results, description="Maximum number of matches"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Typeahead for the part picker and plate lookup.
+    
+    Answered from an in-memory prefix index, without a database query:
+    exact matches first, then part numbers/plates/VINs, then names.
+    Separators and case are ignored ("abc12" finds "ABC-1234").
+    """
+    return SuggestListResponse(items=suggest_index.search(q, types, limit))
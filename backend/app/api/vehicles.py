@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import math
 
 from ..core.deps import get_db, get_current_user, require_roles
+from ..db.search import apply_search
+from ..db.writes import update_returning
+from ..services.suggest import track as suggest_track
 from ..db.models import User, UserRole, Vehicle, Customer
 from ..db.schemas import (
     VehicleCreate, 
@@ -43,12 +46,9 @@ async def get_vehicles(
     
     # Add search filter
     if q:
-        search_filter = or_(
-            Vehicle.plate_no.ilike(f"%{q}%"),
-            Vehicle.vin.ilike(f"%{q}%")
-        )
-        query = query.where(search_filter)
-        count_query = count_query.where(search_filter)
+        dialect = db.get_bind().dialect.name
+        query = apply_search(query, Vehicle, q, dialect)
+        count_query = apply_search(count_query, Vehicle, q, dialect, rank=False)
     
     # Get total count
     total_result = await db.execute(count_query)
@@ -107,7 +107,6 @@ async def create_vehicle(
     vehicle = Vehicle(**vehicle_data.model_dump())
     db.add(vehicle)
     await db.commit()
-    await db.refresh(vehicle)
     
     return vehicle
 
@@ -143,21 +142,10 @@ async def update_vehicle(
     Only provided fields will be updated. All fields are optional.
     If customer_id is provided, the customer must exist.
     """
-    # Get vehicle
-    query = select(Vehicle).where(Vehicle.id == vehicle_id)
-    result = await db.execute(query)
-    vehicle = result.scalar_one_or_none()
-    
-    if not vehicle:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found"
-        )
-    
     # If updating customer_id, verify customer exists
     update_data = vehicle_data.model_dump(exclude_unset=True)
     if "customer_id" in update_data:
-        customer_query = select(Customer).where(Customer.id == update_data["customer_id"])
+        customer_query = select(Customer.id).where(Customer.id == update_data["customer_id"])
         customer_result = await db.execute(customer_query)
         customer = customer_result.scalar_one_or_none()
         
@@ -168,11 +156,16 @@ async def update_vehicle(
             )
     
     # Update fields
-    for field, value in update_data.items():
-        setattr(vehicle, field, value)
+    vehicle = await update_returning(db, Vehicle, vehicle_id, update_data)
+    
+    if not vehicle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found"
+        )
     
+    suggest_track(db, vehicle)
     await db.commit()
-    await db.refresh(vehicle)
     
     return vehicle
 
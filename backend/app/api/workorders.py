@@ -6,11 +6,11 @@ from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, File, UploadFile, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status, File, UploadFile, Form
 from fastapi.responses import FileResponse
 from sqlalchemy import select, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import noload, selectinload
 import math
 
 from ..core.deps import get_db, get_current_user, require_roles
@@ -32,19 +32,31 @@ from ..db.schemas import (
     ApprovalRequestCreate,
     ApprovalRequestResponse
 )
+from ..db.writes import update_returning
 from ..services.audit import log_action
-from ..services.notify import notify
+from ..services.outbox import enqueue_email, enqueue_whatsapp, outbox_dispatcher
+from ..services.notification_templates import notification_templates, customer_language
+from ..services.media import (
+    save_upload, UploadTooLargeError, is_image, generate_renditions, pick_rendition, rendition_mime
+)
+from ..utils.pagination import encode_cursor, decode_cursor, keyset_before
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Work order responses include their items
+_response_options = (selectinload(WorkOrder.items),)
+
 router = APIRouter(prefix="/workorders", tags=["Work Orders"])
 
 @router.get("/", response_model=WorkOrderListResponse)
 async def get_workorders(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Page size"),
-    status: Optional[WorkOrderStatus] = Query(None, description="Filter by status"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
+    include_total: bool = Query(True, description="Include total/pages counts (runs an extra count query)"),
+    include_items: bool = Query(True, description="Include each work order's items (totals are always included)"),
+    status_filter: Optional[WorkOrderStatus] = Query(None, alias="status", description="Filter by status"),
     customer_id: Optional[int] = Query(None, description="Filter by customer ID"),
     vehicle_id: Optional[int] = Query(None, description="Filter by vehicle ID"),
     technician_id: Optional[int] = Query(None, description="Filter by technician ID (created_by)"),
@@ -56,8 +68,16 @@ async def get_workorders(
     """
     Get all work orders with pagination and filtering.
     
+    Results are ordered newest first by (created_at, id). Pass the returned
+    **next_cursor** back as **cursor** to seek to the next page without an
+    OFFSET scan; **page** is ignored in that mode.
+    
     - **page**: Page number (starts from 1)
     - **size**: Number of items per page (max 100)
+    - **cursor**: Opaque cursor for keyset pagination
+    - **include_total**: Set to false to skip the count query
+    - **include_items**: Set to false to skip loading items; the parts,
+      labor and services totals are still returned
     - **status**: Filter by work order status
     - **customer_id**: Filter by customer ID
     - **vehicle_id**: Filter by vehicle ID
@@ -65,56 +85,68 @@ async def get_workorders(
     - **date_from**: Filter by creation date from
     - **date_to**: Filter by creation date to
     """
-    # Build query
-    query = select(WorkOrder).options(selectinload(WorkOrder.items))
-    count_query = select(func.count(WorkOrder.id))
-    
-    # Add filters
-    if status:
-        query = query.where(WorkOrder.status == status)
-        count_query = count_query.where(WorkOrder.status == status)
-    
+    # Build filters
+    filters = []
+    if status_filter:
+        filters.append(WorkOrder.status == status_filter)
     if customer_id:
-        query = query.where(WorkOrder.customer_id == customer_id)
-        count_query = count_query.where(WorkOrder.customer_id == customer_id)
-    
+        filters.append(WorkOrder.customer_id == customer_id)
     if vehicle_id:
-        query = query.where(WorkOrder.vehicle_id == vehicle_id)
-        count_query = count_query.where(WorkOrder.vehicle_id == vehicle_id)
-    
+        filters.append(WorkOrder.vehicle_id == vehicle_id)
     if technician_id:
-        query = query.where(WorkOrder.created_by == technician_id)
-        count_query = count_query.where(WorkOrder.created_by == technician_id)
-    
+        filters.append(WorkOrder.created_by == technician_id)
     if date_from:
-        query = query.where(WorkOrder.created_at >= date_from)
-        count_query = count_query.where(WorkOrder.created_at >= date_from)
-    
+        filters.append(WorkOrder.created_at >= date_from)
     if date_to:
-        query = query.where(WorkOrder.created_at <= date_to)
-        count_query = count_query.where(WorkOrder.created_at <= date_to)
+        filters.append(WorkOrder.created_at <= date_to)
+    
+    items_loader = selectinload(WorkOrder.items) if include_items else noload(WorkOrder.items)
+    query = select(WorkOrder).options(items_loader).where(*filters)
     
     # Get total count
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+    total = None
+    pages = None
+    if include_total:
+        count_query = select(func.count(WorkOrder.id)).where(*filters)
+        total_result = await db.execute(count_query)
+        total = total_result.scalar()
+        pages = math.ceil(total / size) if total > 0 else 1
     
     # Apply pagination
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size).order_by(WorkOrder.id.desc())
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.where(keyset_before(
+            WorkOrder.created_at, WorkOrder.id, cursor_created_at, cursor_id, db.bind.dialect.name
+        ))
+    else:
+        query = query.offset((page - 1) * size)
+    
+    # Fetch one extra row to know whether another page exists
+    query = query.order_by(WorkOrder.created_at.desc(), WorkOrder.id.desc()).limit(size + 1)
     
     # Execute query
     result = await db.execute(query)
     workorders = result.scalars().all()
     
-    # Calculate pagination info
-    pages = math.ceil(total / size) if total > 0 else 1
+    next_cursor = None
+    if len(workorders) > size:
+        workorders = workorders[:size]
+        last = workorders[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
     
     return WorkOrderListResponse(
         items=workorders,
         total=total,
         page=page,
         size=size,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor
     )
 
 @router.post("/", response_model=WorkOrderResponse, status_code=status.HTTP_201_CREATED)
@@ -157,7 +189,8 @@ async def create_workorder(
     workorder = WorkOrder(
         **workorder_data.model_dump(),
         status=WorkOrderStatus.NEW,
-        created_by=current_user.id
+        created_by=current_user.id,
+        items=[]
     )
     db.add(workorder)
     await db.flush()
@@ -168,7 +201,6 @@ async def create_workorder(
     )
     
     await db.commit()
-    await db.refresh(workorder)
     
     return workorder
 
@@ -203,10 +235,17 @@ async def set_workorder_estimate(
     
     Automatically calculates est_total as sum of est_parts and est_labor.
     """
-    # Get work order
-    query = select(WorkOrder).where(WorkOrder.id == workorder_id)
-    result = await db.execute(query)
-    workorder = result.scalar_one_or_none()
+    # Update estimates, calculating the total from the new or current amounts
+    values = {}
+    if estimate_data.est_parts is not None:
+        values["est_parts"] = estimate_data.est_parts
+    if estimate_data.est_labor is not None:
+        values["est_labor"] = estimate_data.est_labor
+    est_parts = values.get("est_parts", func.coalesce(WorkOrder.est_parts, Decimal('0')))
+    est_labor = values.get("est_labor", func.coalesce(WorkOrder.est_labor, Decimal('0')))
+    values["est_total"] = est_parts + est_labor
+    
+    workorder = await update_returning(db, WorkOrder, workorder_id, values, options=_response_options)
     
     if not workorder:
         raise HTTPException(
@@ -214,24 +253,12 @@ async def set_workorder_estimate(
             detail="Work order not found"
         )
     
-    # Update estimates
-    if estimate_data.est_parts is not None:
-        workorder.est_parts = estimate_data.est_parts
-    if estimate_data.est_labor is not None:
-        workorder.est_labor = estimate_data.est_labor
-    
-    # Calculate total
-    est_parts = workorder.est_parts or Decimal('0')
-    est_labor = workorder.est_labor or Decimal('0')
-    workorder.est_total = est_parts + est_labor
-    
     # Log audit entry
     await log_action(
         db, current_user, "UPDATE_ESTIMATE", "work_order", workorder.id
     )
     
     await db.commit()
-    await db.refresh(workorder)
     
     return workorder
 
@@ -243,10 +270,10 @@ async def schedule_workorder(
     db: AsyncSession = Depends(get_db)
 ):
     """Set work order scheduled date/time."""
-    # Get work order
-    query = select(WorkOrder).where(WorkOrder.id == workorder_id)
-    result = await db.execute(query)
-    workorder = result.scalar_one_or_none()
+    # Update scheduled time
+    workorder = await update_returning(
+        db, WorkOrder, workorder_id, {"scheduled_at": schedule_data.scheduled_at}, options=_response_options
+    )
     
     if not workorder:
         raise HTTPException(
@@ -254,16 +281,12 @@ async def schedule_workorder(
             detail="Work order not found"
         )
     
-    # Update scheduled time
-    workorder.scheduled_at = schedule_data.scheduled_at
-    
     # Log audit entry
     await log_action(
         db, current_user, "SCHEDULE", "work_order", workorder.id
     )
     
     await db.commit()
-    await db.refresh(workorder)
     
     return workorder
 
@@ -274,35 +297,32 @@ async def start_workorder(
     db: AsyncSession = Depends(get_db)
 ):
     """Start work order (allowed only if status=ready_to_start)."""
-    # Get work order
-    query = select(WorkOrder).where(WorkOrder.id == workorder_id)
-    result = await db.execute(query)
-    workorder = result.scalar_one_or_none()
+    # Update status and started time, only from ready_to_start
+    workorder = await update_returning(
+        db, WorkOrder, workorder_id,
+        {"status": WorkOrderStatus.IN_PROGRESS, "started_at": datetime.utcnow()},
+        WorkOrder.status == WorkOrderStatus.READY_TO_START,
+        options=_response_options
+    )
     
     if not workorder:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Work order not found"
-        )
-    
-    # Check status
-    if workorder.status != WorkOrderStatus.READY_TO_START:
+        current_status = await db.scalar(select(WorkOrder.status).where(WorkOrder.id == workorder_id))
+        if current_status is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Work order not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Work order must be in 'ready_to_start' status to start. Current status: {workorder.status}"
+            detail=f"Work order must be in 'ready_to_start' status to start. Current status: {current_status}"
         )
     
-    # Update status and started time
-    workorder.status = WorkOrderStatus.IN_PROGRESS
-    workorder.started_at = datetime.utcnow()
-    
     # Log audit entry
     await log_action(
         db, current_user, "START", "work_order", workorder.id
     )
     
     await db.commit()
-    await db.refresh(workorder)
     
     return workorder
 
@@ -313,10 +333,12 @@ async def finish_workorder(
     db: AsyncSession = Depends(get_db)
 ):
     """Finish work order (set status=done, set completed_at)."""
-    # Get work order
-    query = select(WorkOrder).where(WorkOrder.id == workorder_id)
-    result = await db.execute(query)
-    workorder = result.scalar_one_or_none()
+    # Update status and completion time
+    workorder = await update_returning(
+        db, WorkOrder, workorder_id,
+        {"status": WorkOrderStatus.DONE, "completed_at": datetime.utcnow()},
+        options=_response_options
+    )
     
     if not workorder:
         raise HTTPException(
@@ -324,20 +346,16 @@ async def finish_workorder(
             detail="Work order not found"
         )
     
-    # Update status and completion time
-    workorder.status = WorkOrderStatus.DONE
-    workorder.completed_at = datetime.utcnow()
-    
     # Log audit entry
     await log_action(
         db, current_user, "FINISH", "work_order", workorder.id
     )
     
-    await db.commit()
-    await db.refresh(workorder)
+    # Queue pickup notification in the same transaction
+    await _queue_pickup_notification(workorder, db)
     
-    # Send pickup notification
-    await _send_pickup_notification(workorder, db)
+    await db.commit()
+    outbox_dispatcher.wake()
     
     return workorder
 
@@ -348,10 +366,10 @@ async def close_workorder(
     db: AsyncSession = Depends(get_db)
 ):
     """Close work order (admin only, status=closed)."""
-    # Get work order
-    query = select(WorkOrder).where(WorkOrder.id == workorder_id)
-    result = await db.execute(query)
-    workorder = result.scalar_one_or_none()
+    # Update status
+    workorder = await update_returning(
+        db, WorkOrder, workorder_id, {"status": WorkOrderStatus.CLOSED}, options=_response_options
+    )
     
     if not workorder:
         raise HTTPException(
@@ -359,16 +377,12 @@ async def close_workorder(
             detail="Work order not found"
         )
     
-    # Update status
-    workorder.status = WorkOrderStatus.CLOSED
-    
     # Log audit entry
     await log_action(
         db, current_user, "CLOSE", "work_order", workorder.id
     )
     
     await db.commit()
-    await db.refresh(workorder)
     
     return workorder
 
@@ -404,7 +418,6 @@ async def add_workorder_item(
     )
     
     await db.commit()
-    await db.refresh(item)
     
     return item
 
@@ -438,6 +451,7 @@ async def delete_workorder_item(
 @router.post("/{workorder_id}/media", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_workorder_media(
     workorder_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     phase: str = Form(..., regex="^(before|during|after)$"),
     note: Optional[str] = Form(None),
@@ -447,7 +461,7 @@ async def upload_workorder_media(
     """
     Upload media file for work order.
     
-    - **file**: Media file to upload
+    - **file**: Media file to upload (streamed to disk; 413 above the configured max size)
     - **phase**: Media phase (before|during|after)
     - **note**: Optional note about the media
     """
@@ -467,22 +481,25 @@ async def upload_workorder_media(
     file_ext = os.path.splitext(file.filename)[1] if file.filename else ""
     unique_filename = f"{timestamp}_{uuid.uuid4().hex[:8]}{file_ext}"
     
-    # Create directory structure
-    media_dir = os.path.join(settings.storage_dir, "workorders", str(workorder_id), phase)
-    os.makedirs(media_dir, exist_ok=True)
-    
-    # Save file
-    file_path = os.path.join(media_dir, unique_filename)
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Stream file to disk
+    relative_path = f"workorders/{workorder_id}/{phase}/{unique_filename}"
+    file_path = os.path.join(settings.storage_dir, relative_path)
+    try:
+        stored = await save_upload(file, file_path)
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     
     # Create media record
-    relative_path = f"workorders/{workorder_id}/{phase}/{unique_filename}"
     media = Media(
         work_order_id=workorder_id,
         path=relative_path,
         phase=MediaPhase(phase),
+        mime=stored.mime,
+        size_bytes=stored.size,
+        sha256=stored.sha256,
         note=note
     )
     db.add(media)
@@ -493,7 +510,10 @@ async def upload_workorder_media(
     )
     
     await db.commit()
-    await db.refresh(media)
+    
+    # Thumbnails are rendered after the response is sent
+    if is_image(media):
+        background_tasks.add_task(generate_renditions, media.id)
     
     # Generate URL
     media_url = f"/api/v1/media/{relative_path}"
@@ -504,18 +524,27 @@ async def upload_workorder_media(
         path=media.path,
         phase=media.phase.value,
         note=media.note,
+        mime=media.mime,
+        size_bytes=media.size_bytes,
+        sha256=media.sha256,
         url=media_url
     )
 
 @router.get("/media/{path:path}")
 async def get_media(
     path: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=4096, description="Preferred width; serves the nearest rendition"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get protected media file for internal use."""
+    """
+    Get protected media file for internal use.
+    
+    - **w**: Preferred image width in pixels; the smallest rendition at least this wide is served (WebP if accepted)
+    """
     # Verify media exists in database
-    query = select(Media).where(Media.path == path)
+    query = select(Media).options(selectinload(Media.renditions)).where(Media.path == path)
     result = await db.execute(query)
     media = result.scalar_one_or_none()
     
@@ -525,6 +554,14 @@ async def get_media(
             detail="Media not found"
         )
     
+    rendition = pick_rendition(media, w, request.headers.get("accept", ""))
+    if rendition and os.path.exists(os.path.join(settings.storage_dir, rendition.path)):
+        return FileResponse(
+            os.path.join(settings.storage_dir, rendition.path),
+            media_type=rendition_mime(rendition),
+            headers={"Vary": "Accept"}
+        )
+    
     # Build full file path
     file_path = os.path.join(settings.storage_dir, path)
     
@@ -544,10 +581,9 @@ async def update_workorder(
     db: AsyncSession = Depends(get_db)
 ):
     """Update work order basic information."""
-    # Get work order
-    query = select(WorkOrder).where(WorkOrder.id == workorder_id)
-    result = await db.execute(query)
-    workorder = result.scalar_one_or_none()
+    # Update fields
+    update_data = workorder_data.model_dump(exclude_unset=True)
+    workorder = await update_returning(db, WorkOrder, workorder_id, update_data, options=_response_options)
     
     if not workorder:
         raise HTTPException(
@@ -555,18 +591,12 @@ async def update_workorder(
             detail="Work order not found"
         )
     
-    # Update fields
-    update_data = workorder_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(workorder, field, value)
-    
     # Log audit entry
     await log_action(
         db, current_user, "UPDATE", "work_order", workorder.id
     )
     
     await db.commit()
-    await db.refresh(workorder)
     
     return workorder
 
@@ -577,10 +607,10 @@ async def request_workorder_approval(
     db: AsyncSession = Depends(get_db)
 ):
     """Engineer request approval for work order (change status to awaiting_approval)."""
-    # Get work order
-    query = select(WorkOrder).where(WorkOrder.id == workorder_id)
-    result = await db.execute(query)
-    workorder = result.scalar_one_or_none()
+    # Update status to awaiting approval
+    workorder = await update_returning(
+        db, WorkOrder, workorder_id, {"status": WorkOrderStatus.AWAITING_APPROVAL}, options=_response_options
+    )
     
     if not workorder:
         raise HTTPException(
@@ -588,16 +618,12 @@ async def request_workorder_approval(
             detail="Work order not found"
         )
     
-    # Update status to awaiting approval
-    workorder.status = WorkOrderStatus.AWAITING_APPROVAL
-    
     # Log audit entry
     await log_action(
         db, current_user, "REQUEST_APPROVAL", "work_order", workorder.id
     )
     
     await db.commit()
-    await db.refresh(workorder)
     
     return workorder
 
@@ -638,11 +664,11 @@ async def send_approval_to_customer(
         db, current_user, f"SEND_APPROVAL_{approval_data.sent_via.value.upper()}", "work_order", workorder_id
     )
     
-    await db.commit()
-    await db.refresh(approval_request)
+    # Queue approval notification in the same transaction
+    await _queue_approval_notification(workorder, approval_request, db)
     
-    # Send approval notification
-    await _send_approval_notification(workorder, approval_request, db)
+    await db.commit()
+    outbox_dispatcher.wake()
     
     return approval_request
 
@@ -675,15 +701,11 @@ async def delete_workorder(
 
 
 # Helper functions for notifications
-async def _send_approval_notification(workorder: WorkOrder, approval_request: ApprovalRequest, db: AsyncSession):
-    """Send approval notification to customer."""
+async def _queue_approval_notification(workorder: WorkOrder, approval_request: ApprovalRequest, db: AsyncSession):
+    """Queue approval notification to customer in the outbox."""
     try:
-        # Get customer with related data
-        customer_query = (
-            select(Customer)
-            .options(selectinload(Customer.vehicles))
-            .where(Customer.id == workorder.customer_id)
-        )
+        # Get customer
+        customer_query = select(Customer).where(Customer.id == workorder.customer_id)
         customer_result = await db.execute(customer_query)
         customer = customer_result.scalar_one_or_none()
         
@@ -705,77 +727,38 @@ async def _send_approval_notification(workorder: WorkOrder, approval_request: Ap
         protocol = 'https' if not domain.startswith('localhost') else 'http'
         approval_url = f"{protocol}://{domain}/public/approve/{approval_request.token}"
         
-        # Format estimates
-        est_total = f"${workorder.est_total:.2f}" if workorder.est_total else "TBD"
         vehicle_info = f"{vehicle.year} {vehicle.make} {vehicle.model} ({vehicle.plate_no})"
+        language = customer_language(customer)
+        context = {
+            "customer_name": customer.name,
+            "vehicle": vehicle_info,
+            "work_order_id": workorder.id,
+            "complaint": workorder.complaint,
+            "est_total": workorder.est_total,
+            "approval_url": approval_url,
+        }
         
         # Send notification based on channel
         if approval_request.sent_via == ApprovalChannel.EMAIL:
             if customer.email:
-                subject = f"Service Approval Required - Work Order #{workorder.id}"
-                html = f"""
-                <html>
-                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2 style="color: #007bff;">Yemen Hybrid Service Center</h2>
-                    <h3>Service Approval Required</h3>
-                    
-                    <p>Dear {customer.name},</p>
-                    
-                    <p>Your vehicle service estimate is ready for approval:</p>
-                    
-                    <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <p><strong>Vehicle:</strong> {vehicle_info}</p>
-                        <p><strong>Work Order #:</strong> {workorder.id}</p>
-                        <p><strong>Issue:</strong> {workorder.complaint or 'Service required'}</p>
-                        <p><strong>Total Estimate:</strong> <span style="font-size: 18px; color: #007bff;">{est_total}</span></p>
-                    </div>
-                    
-                    <p>Please click the link below to review the details and approve or decline the service:</p>
-                    
-                    <p style="text-align: center; margin: 30px 0;">
-                        <a href="{approval_url}" style="background: #007bff; color: white; padding: 15px 30px; text-decoration: none; border-radius: 5px; font-weight: bold;">
-                            Review & Approve Service
-                        </a>
-                    </p>
-                    
-                    <p><small>This link will expire in 24 hours. If you have any questions, please contact us.</small></p>
-                    
-                    <p>Best regards,<br>Yemen Hybrid Service Center</p>
-                </body>
-                </html>
-                """
-                await notify.send_email(customer.email, subject, html)
+                message = notification_templates.render("approval_email", language, context)
+                enqueue_email(db, customer.email, message.subject, message.body, "work_order", workorder.id)
             else:
                 logger.warning(f"Customer {customer.id} has no email address for approval notification")
         
         elif approval_request.sent_via == ApprovalChannel.WHATSAPP:
             if customer.phone:
-                text = f"""
-🔧 *Yemen Hybrid Service Center*
-
-Dear {customer.name},
-
-Your vehicle service estimate is ready for approval:
-
-*Vehicle:* {vehicle_info}
-*Work Order #:* {workorder.id}
-*Issue:* {workorder.complaint or 'Service required'}
-*Total Estimate:* {est_total}
-
-Please review and approve: {approval_url}
-
-This link expires in 24 hours.
-                """.strip()
-                await notify.send_whatsapp(customer.phone, text)
+                message = notification_templates.render("approval_whatsapp", language, context)
+                enqueue_whatsapp(db, customer.phone, message.body, entity="work_order", entity_id=workorder.id)
             else:
                 logger.warning(f"Customer {customer.id} has no phone number for WhatsApp notification")
     
     except Exception as e:
-        logger.error(f"Failed to send approval notification for work order {workorder.id}: {str(e)}")
+        logger.error(f"Failed to queue approval notification for work order {workorder.id}: {str(e)}")
 
 
-async def _send_pickup_notification(workorder: WorkOrder, db: AsyncSession):
-    """Send pickup notification to customer with AFTER photos."""
+async def _queue_pickup_notification(workorder: WorkOrder, db: AsyncSession):
+    """Queue pickup notification to customer with AFTER photos in the outbox."""
     try:
         # Get customer
         customer_query = select(Customer).where(Customer.id == workorder.customer_id)
@@ -810,69 +793,27 @@ async def _send_pickup_notification(workorder: WorkOrder, db: AsyncSession):
         after_photo_urls = [f"{protocol}://{domain}/api/v1/workorders/media/{media.path}" for media in after_media]
         
         vehicle_info = f"{vehicle.year} {vehicle.make} {vehicle.model} ({vehicle.plate_no})"
-        final_cost = f"${workorder.final_cost:.2f}" if workorder.final_cost else "Final cost TBD"
+        language = customer_language(customer)
+        context = {
+            "customer_name": customer.name,
+            "vehicle": vehicle_info,
+            "work_order_id": workorder.id,
+            "complaint": workorder.complaint,
+            "final_cost": workorder.final_cost,
+            "photo_urls": after_photo_urls,
+        }
         
         # Send email notification
         if customer.email:
-            subject = f"Service Complete - Ready for Pickup #{workorder.id}"
-            photo_html = ""
-            if after_photo_urls:
-                photo_html = "<h3>Service Completion Photos:</h3><div style='display: flex; flex-wrap: wrap; gap: 10px;'>"
-                for url in after_photo_urls:
-                    photo_html += f"<img src='{url}' style='width: 200px; height: 150px; object-fit: cover; border-radius: 5px;'>"
-                photo_html += "</div>"
-            
-            html = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <h2 style="color: #28a745;">Yemen Hybrid Service Center</h2>
-                <h3>🎉 Service Complete - Ready for Pickup!</h3>
-                
-                <p>Dear {customer.name},</p>
-                
-                <p>Great news! Your vehicle service has been completed and is ready for pickup:</p>
-                
-                <div style="background: #e7f3ff; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #28a745;">
-                    <p><strong>Vehicle:</strong> {vehicle_info}</p>
-                    <p><strong>Work Order #:</strong> {workorder.id}</p>
-                    <p><strong>Service:</strong> {workorder.complaint or 'Service completed'}</p>
-                    <p><strong>Final Cost:</strong> <span style="font-size: 18px; color: #28a745;">{final_cost}</span></p>
-                </div>
-                
-                {photo_html}
-                
-                <p>Please contact us to schedule your pickup or visit us during business hours.</p>
-                
-                <p>Thank you for choosing Yemen Hybrid Service Center!</p>
-                
-                <p>Best regards,<br>Yemen Hybrid Service Center</p>
-            </body>
-            </html>
-            """
-            await notify.send_email(customer.email, subject, html)
+            message = notification_templates.render("pickup_email", language, context)
+            enqueue_email(db, customer.email, message.subject, message.body, "work_order", workorder.id)
         
         # Send WhatsApp notification
         if customer.phone:
-            text = f"""
-🎉 *Yemen Hybrid Service Center*
-
-Dear {customer.name},
-
-Great news! Your vehicle service is complete and ready for pickup:
-
-*Vehicle:* {vehicle_info}
-*Work Order #:* {workorder.id}
-*Service:* {workorder.complaint or 'Service completed'}
-*Final Cost:* {final_cost}
-
-Please contact us to schedule pickup or visit during business hours.
-
-Thank you for choosing Yemen Hybrid! 🚗✨
-            """.strip()
-            
-            await notify.send_whatsapp(customer.phone, text, after_photo_urls)
+            message = notification_templates.render("pickup_whatsapp", language, context)
+            enqueue_whatsapp(db, customer.phone, message.body, after_photo_urls, "work_order", workorder.id)
     
     except Exception as e:
-        logger.error(f"Failed to send pickup notification for work order {workorder.id}: {str(e)}")
+        logger.error(f"Failed to queue pickup notification for work order {workorder.id}: {str(e)}")
 
 
@@ -25,27 +25,111 @@ class Settings(BaseSettings):
             return self.database_url.replace("sqlite+pysqlite://", "sqlite+aiosqlite://", 1)
         return self.database_url
     
+    # Connection pool (ignored for in-memory SQLite, which uses a single shared connection)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_pool_warmup_connections: int = 2
+    
+    # Statement caches: SQLAlchemy's compiled-SQL cache, and asyncpg's per-connection
+    # prepared statements (set the latter to 0 behind PgBouncer in transaction mode)
+    db_query_cache_size: int = 500
+    db_statement_cache_size: int = 256
+    
+    # SQLite tuning, applied to each new connection
+    sqlite_wal: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 32768
+    
+    # Deployment environment ("production" disables debug headers and console notification drivers)
+    environment: str = "development"
+    
     # JWT
     jwt_secret: str = "devsecret"
     jwt_algorithm: str = "HS256"
     jwt_expire_hours: int = 24
     
+    # Password hashing
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    
+    # Authenticated user cache (0 disables)
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_size: int = 1024
+    
     # CORS - Allow all origins for Replit environment
     allowed_origins: str = "*"
     
     # Storage
     storage_dir: str = "./storage"
+    media_max_upload_bytes: int = 500 * 1024 * 1024
+    media_upload_chunk_bytes: int = 1024 * 1024
+    media_rendition_widths: List[int] = [200, 480, 1024]
+    media_rendition_workers: int = 2
+    
+    # Invoice PDF rendering (0 workers renders on a thread instead of a process pool)
+    pdf_render_workers: int = 2
+    pdf_render_timeout_seconds: float = 30.0
+    # Renders waiting for a worker beyond this are rejected with 503
+    pdf_render_max_queued: int = 16
+    # Superseded cached PDFs are kept this long for requests still streaming them
+    pdf_cache_grace_seconds: float = 300.0
     
     # Email
     smtp_host: str = ""
     smtp_port: int = 587
     smtp_user: str = ""
     smtp_pass: str = ""
+    smtp_starttls: bool = True
+    smtp_pool_size: int = 2
+    smtp_timeout_seconds: float = 30.0
+    smtp_noop_after_seconds: float = 30.0
     
     # WhatsApp
     whatsapp_sid: str = ""
     whatsapp_token: str = ""
     whatsapp_from: str = ""
+    whatsapp_api_base: str = "https://api.twilio.com"
+    whatsapp_timeout_seconds: float = 15.0
+    whatsapp_max_concurrency: int = 8
+    whatsapp_rate_per_second: float = 10.0
+    whatsapp_burst: int = 10
+    
+    # Notification outbox (the dispatcher can also run as its own worker)
+    outbox_dispatcher_enabled: bool = True
+    outbox_poll_interval_seconds: float = 2.0
+    outbox_batch_size: int = 20
+    outbox_max_attempts: int = 8
+    outbox_backoff_base_seconds: float = 10.0
+    outbox_backoff_max_seconds: float = 3600.0
+    outbox_lease_seconds: float = 300.0
+    
+    # Logging (request_log_sample_rate applies to 2xx responses only)
+    log_level: str = "INFO"
+    request_log_sample_rate: float = 1.0
+    
+    # Statements repeated this many times in one request are logged as likely N+1s (0 disables)
+    query_repeat_warn_threshold: int = 10
+    
+    # Notification templates (used when a customer has no language set)
+    notification_default_language: str = "en"
+    
+    # Typeahead index (per process; reloaded to pick up other processes' writes)
+    suggest_index_refresh_seconds: float = 300.0
+    suggest_max_results: int = 25
+    
+    # Global search: groups still running after the budget are dropped from the response
+    global_search_budget_ms: float = 300.0
+    global_search_max_per_group: int = 20
+    
+    # Customer phone normalization: country code assumed for national numbers
+    phone_default_country_code: str = "967"
+    
+    @property
+    def is_production(self) -> bool:
+        return self.environment.lower() in ("production", "prod")
     
     @property
     def cors_origins(self) -> List[str]:
@@ -4,12 +4,32 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from .security import verify_token
+from .user_cache import user_cache, UserSnapshot
 from ..db.session import get_db
 from ..db.models import User, UserRole
 
 security = HTTPBearer()
 optional_security = HTTPBearer(auto_error=False)
 
+async def _load_user_snapshot(payload: dict, db: AsyncSession) -> Optional[UserSnapshot]:
+    """Resolve the token subject to a user snapshot, from cache or database."""
+    user_id = int(payload["sub"])
+    iat = payload.get("iat")
+    
+    snapshot = user_cache.get(user_id, iat)
+    if snapshot is not None:
+        return snapshot
+    
+    # Fetch user from database
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if user is None:
+        return None
+    
+    snapshot = UserSnapshot.from_user(user)
+    user_cache.put(snapshot, iat)
+    return snapshot
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
@@ -28,25 +48,22 @@ async def get_current_user(
     if payload is None:
         raise credentials_exception
     
-    user_id = payload.get("sub")
-    if user_id is None:
+    if payload.get("sub") is None:
         raise credentials_exception
     
-    # Fetch user from database
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    snapshot = await _load_user_snapshot(payload, db)
     
-    if user is None:
+    if snapshot is None:
         raise credentials_exception
     
     # Check if user is active
-    if not user.is_active:
+    if not snapshot.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"error": {"code": "INACTIVE_USER", "message": "User account is disabled"}},
         )
     
-    return user
+    return snapshot.to_user()
 
 async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
@@ -60,18 +77,15 @@ async def get_current_user_optional(
     if payload is None:
         return None
     
-    user_id = payload.get("sub")
-    if user_id is None:
+    if payload.get("sub") is None:
         return None
     
-    # Fetch user from database
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    snapshot = await _load_user_snapshot(payload, db)
     
-    if user is None or not user.is_active:
+    if snapshot is None or not snapshot.is_active:
         return None
     
-    return user
+    return snapshot.to_user()
 
 
 def require_roles(*allowed_roles: UserRole):
@@ -83,4 +97,4 @@ def require_roles(*allowed_roles: UserRole):
                 detail={"error": {"code": "INSUFFICIENT_PERMISSIONS", "message": f"Access denied. Required roles: {[role.value for role in allowed_roles]}"}},
             )
         return current_user
-    return role_checker
\ No newline at end of file
+    return role_checker
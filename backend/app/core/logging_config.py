@@ -0,0 +1,71 @@
+"""Structured, non-blocking logging.
+
+Records are formatted as one JSON object per line on the calling thread and
+handed to a ``QueueHandler``; a ``QueueListener`` thread does the actual
+stream I/O, so a slow stdout or disk never stalls the event loop. Pass
+structured data with ``logger.info("...", extra={"fields": {...}})``.
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from .config import settings
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: timestamp, level, message, module plus ``fields``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.name,
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: Optional[str] = None, stream=None) -> QueueListener:
+    """Route the root logger through a queue to a stream handler. Safe to call twice."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(logging.Formatter("%(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    # QueueHandler.prepare() formats the record before queueing it
+    handler = QueueHandler(log_queue)
+    handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level or settings.log_level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
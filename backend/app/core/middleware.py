@@ -0,0 +1,178 @@
+"""ASGI middleware."""
+import logging
+import random
+from time import perf_counter_ns
+from typing import Optional
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from .config import settings
+from .metrics import http_requests_total, http_request_duration_seconds
+from ..db.query_stats import QueryStats, request_query_stats, server_timing_header
+
+logger = logging.getLogger("app.requests")
+query_logger = logging.getLogger("app.queries")
+
+INTERNAL_ERROR_BODY = {"error": {"code": "INTERNAL_ERROR", "message": "Internal server error"}}
+
+
+class RequestLoggingMiddleware:
+    """
+    Log one structured record per HTTP request: method, path, status, client
+    and duration. Successful (2xx) requests are sampled at ``sample_rate``;
+    everything else is always logged. Unhandled errors are logged with their
+    traceback and answered with a JSON 500 if no response has started.
+
+    A plain ASGI callable rather than BaseHTTPMiddleware, so the request body
+    and streamed responses pass straight through.
+    """
+
+    def __init__(self, app, sample_rate: Optional[float] = None):
+        self.app = app
+        self.sample_rate = settings.request_log_sample_rate if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter_ns()
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            self._log(scope, status_code or 500, start, exc_info=True)
+            if status_code is not None:
+                raise
+            response = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content=INTERNAL_ERROR_BODY
+            )
+            await response(scope, receive, send)
+            return
+
+        self._log(scope, status_code or 500, start)
+
+    def _log(self, scope, status_code: int, start: int, exc_info: bool = False) -> None:
+        if 200 <= status_code < 300 and not exc_info:
+            if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+                return
+        if exc_info or status_code >= 500:
+            level = logging.ERROR
+        elif status_code >= 400:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+
+        client = scope.get("client")
+        query = scope.get("query_string", b"")
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": query.decode("latin-1") if query else None,
+            "status_code": status_code,
+            "duration_ms": round((perf_counter_ns() - start) / 1_000_000, 3),
+            "client_ip": client[0] if client else "unknown",
+        }
+        logger.log(level, "request", extra={"fields": fields}, exc_info=exc_info)
+
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, e.g. ``/api/v1/workorders/{workorder_id}``."""
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Count and time HTTP requests by method, route template and status. Using
+    the template keeps label cardinality bounded; requests that match no
+    route (404s, static mounts) share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter_ns()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_template(scope)
+            method = scope["method"]
+            http_requests_total.inc(method=method, route=route, status=status_code)
+            http_request_duration_seconds.observe(
+                (perf_counter_ns() - start) / 1_000_000_000, method=method, route=route
+            )
+
+
+class QueryStatsMiddleware:
+    """
+    Give each HTTP request its own QueryStats. Outside production the totals
+    are returned in a ``Server-Timing`` header; statements repeated at least
+    ``settings.query_repeat_warn_threshold`` times are logged as likely N+1s.
+    """
+
+    def __init__(self, app, server_timing: Optional[bool] = None):
+        self.app = app
+        self.server_timing = (not settings.is_production) if server_timing is None else server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request_query_stats() as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start" and self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing_header(stats).encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._warn_repeats(scope, stats)
+
+    @staticmethod
+    def _warn_repeats(scope, stats: QueryStats) -> None:
+        threshold = settings.query_repeat_warn_threshold
+        if threshold <= 0:
+            return
+        repeated = stats.repeated(threshold)
+        if repeated:
+            sql, n = repeated[0]
+            query_logger.warning(
+                "Repeated SQL statement",
+                extra={"fields": {
+                    "method": scope["method"], "path": scope["path"],
+                    "queries": stats.count, "repeats": n, "statement": sql[:500],
+                }}
+            )
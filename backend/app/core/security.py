@@ -1,12 +1,15 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 import jwt
 from jwt import PyJWTError as JWTError
 from passlib.context import CryptContext
 from .config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Hashes made with fewer rounds than configured are
+# reported as needing an update, so raising the cost rehashes on next login.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -16,15 +19,70 @@ def get_password_hash(password: str) -> str:
     """Generate password hash."""
     return pwd_context.hash(password)
 
+# Dedicated pool so bcrypt never runs on the event loop or starves the
+# default executor. bcrypt releases the GIL, so threads scale with cores.
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_in_flight = 0
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            thread_name_prefix="password-hash"
+        )
+    return _hash_executor
+
+async def _run_hashing(func, *args):
+    global _hash_in_flight
+    _hash_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_in_flight -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool."""
+    return await _run_hashing(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the hashing pool, returning a new hash if the stored one is outdated."""
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """Generate password hash on the hashing pool."""
+    return await _run_hashing(pwd_context.hash, password)
+
+def hashing_queue_depth() -> int:
+    """Number of hashing jobs waiting for a free worker."""
+    return max(0, _hash_in_flight - settings.password_hash_workers)
+
+def hashing_stats() -> dict:
+    """Hashing pool gauges."""
+    return {
+        "workers": settings.password_hash_workers,
+        "in_flight": _hash_in_flight,
+        "queued": hashing_queue_depth(),
+    }
+
+def shutdown_hash_executor() -> None:
+    """Stop the hashing pool (called on application shutdown)."""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
+    issued_at = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(hours=settings.jwt_expire_hours)
+        expire = issued_at + timedelta(hours=settings.jwt_expire_hours)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": issued_at})
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
@@ -0,0 +1,137 @@
+"""In-process cache of authenticated user snapshots."""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple, Hashable
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .config import settings
+from ..db.models import User, UserRole
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """The user fields request handlers need after authentication."""
+    id: int
+    role: UserRole
+    is_active: bool
+    full_name: str
+    email: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            role=user.role,
+            is_active=user.is_active,
+            full_name=user.full_name,
+            email=user.email,
+        )
+
+    def to_user(self) -> User:
+        """Build a detached User so dependants keep receiving a User instance."""
+        return User(
+            id=self.id,
+            role=self.role,
+            is_active=self.is_active,
+            full_name=self.full_name,
+            email=self.email,
+        )
+
+
+class UserCache:
+    """TTL + LRU cache of user snapshots keyed by (user id, token iat)."""
+
+    def __init__(self, ttl_seconds: float = 60, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[int, Hashable], Tuple[float, UserSnapshot]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: int, iat: Hashable = None) -> Optional[UserSnapshot]:
+        """Return a fresh snapshot or None, counting the hit/miss."""
+        key = (user_id, iat)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, snapshot: UserSnapshot, iat: Hashable = None) -> None:
+        """Store a snapshot, evicting the least recently used entry when full."""
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return
+        key = (snapshot.id, iat)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop every cached snapshot of a user, whatever token it came from."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+user_cache = UserCache(
+    ttl_seconds=settings.user_cache_ttl_seconds,
+    max_size=settings.user_cache_max_size,
+)
+
+
+# Invalidate on role/active changes or deletes. Ids are collected at flush
+# time and only dropped once the transaction commits, so a concurrent request
+# cannot re-cache the old row between the flush and the commit. Other worker
+# processes pick up the change when their entry's TTL expires.
+_PENDING_KEY = "user_cache_invalidate"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if state.attrs.role.history.has_changes() or state.attrs.is_active.history.has_changes():
+                pending.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            pending.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_users(session):
+    session.info.pop(_PENDING_KEY, None)
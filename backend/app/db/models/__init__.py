@@ -3,22 +3,29 @@ from .user import User, UserRole
 from .customer import Customer
 from .vehicle import Vehicle
 from .work_order import WorkOrder, WorkOrderItem, WorkOrderService, WorkOrderStatus, ItemType
-from .media import Media, MediaPhase
+from .media import Media, MediaPhase, MediaRendition
 from .service import Service, Part
 from .invoice import Invoice, Payment
 from .booking import Booking
 from .audit_log import AuditLog
 from .approval_request import ApprovalRequest, ApprovalChannel
+from .rollup import DailyWorkOrderStatus, DailyRevenue, DailyServiceUsage
+from .notification_outbox import NotificationOutbox, OutboxStatus
+from .stock_movement import StockMovement, StockMovementReason
+from .. import search  # noqa: F401  (creates the search indexes with create_all)
 
 __all__ = [
     "User", "UserRole",
     "Customer",
     "Vehicle", 
     "WorkOrder", "WorkOrderItem", "WorkOrderService", "WorkOrderStatus", "ItemType",
-    "Media", "MediaPhase",
+    "Media", "MediaPhase", "MediaRendition",
     "Service", "Part",
     "Invoice", "Payment",
     "Booking",
     "AuditLog",
-    "ApprovalRequest", "ApprovalChannel"
+    "ApprovalRequest", "ApprovalChannel",
+    "DailyWorkOrderStatus", "DailyRevenue", "DailyServiceUsage",
+    "NotificationOutbox", "OutboxStatus",
+    "StockMovement", "StockMovementReason"
 ]
\ No newline at end of file
@@ -1,8 +1,27 @@
 """Customer model."""
 from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from ..base import Base
+from ...utils.normalize import normalize_name, normalize_phone
+
+# Source column -> (search key column, normalizer)
+SEARCH_KEYS = {
+    "name": ("name_norm", normalize_name),
+    "phone": ("phone_norm", normalize_phone),
+}
+
+
+def search_key_values(values: dict) -> dict:
+    """
+    The ``name_norm``/``phone_norm`` values implied by ``values``. Bulk
+    UPDATEs bypass the validators below, so they add these themselves.
+    """
+    return {
+        key: normalize(values[source])
+        for source, (key, normalize) in SEARCH_KEYS.items()
+        if source in values
+    }
 
 
 class Customer(Base):
@@ -14,9 +33,18 @@ class Customer(Base):
     phone = Column(String)
     email = Column(String)
     address = Column(String)
+    language = Column(String(8))  # Notification language ("ar" or "en"); None uses the default
+    name_norm = Column(String, index=True)  # normalize_name(name), for search
+    phone_norm = Column(String(20), index=True)  # normalize_phone(phone): E.164 digits
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     vehicles = relationship("Vehicle", back_populates="customer", cascade="all, delete-orphan")
     work_orders = relationship("WorkOrder", back_populates="customer")
-    bookings = relationship("Booking", back_populates="customer")
\ No newline at end of file
+    bookings = relationship("Booking", back_populates="customer")
+
+    @validates("name", "phone")
+    def _set_search_key(self, source, value):
+        key, normalize = SEARCH_KEYS[source]
+        setattr(self, key, normalize(value))
+        return value
@@ -1,5 +1,5 @@
 """Media model."""
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Enum, DateTime, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -22,8 +22,31 @@ class Media(Base):
     phase = Column(Enum(MediaPhase), nullable=False)
     path = Column(String, nullable=False)
     mime = Column(String)
+    size_bytes = Column(BigInteger)
+    sha256 = Column(String(64))
     note = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    work_order = relationship("WorkOrder", back_populates="media")
\ No newline at end of file
+    work_order = relationship("WorkOrder", back_populates="media")
+    renditions = relationship("MediaRendition", back_populates="media", cascade="all, delete-orphan")
+
+
+class MediaRendition(Base):
+    """Resized copy of an image media file."""
+    __tablename__ = "media_renditions"
+    __table_args__ = (
+        UniqueConstraint("media_id", "width", "format", name="uq_media_renditions_media_width_format"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    media_id = Column(Integer, ForeignKey("media.id", ondelete="CASCADE"), nullable=False, index=True)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    format = Column(String(8), nullable=False)
+    path = Column(String, nullable=False)
+    size_bytes = Column(BigInteger)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    media = relationship("Media", back_populates="renditions")
\ No newline at end of file
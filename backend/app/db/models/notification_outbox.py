@@ -0,0 +1,36 @@
+"""Notification outbox model."""
+import enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from ..base import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    """Outbox message status enum (stored as its value)."""
+    PENDING = "pending"
+    SENT = "sent"
+    DEAD = "dead"
+
+
+class NotificationOutbox(Base):
+    """Email/WhatsApp message queued in the same transaction as the change that caused it."""
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(String(16), nullable=False)  # email | whatsapp
+    recipient = Column(String, nullable=False)
+    subject = Column(String)
+    body = Column(Text, nullable=False)
+    media_urls = Column(JSON)
+    entity = Column(String)
+    entity_id = Column(Integer)
+    status = Column(String(16), nullable=False, default=OutboxStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('ix_notification_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
@@ -0,0 +1,31 @@
+"""Daily rollup models for dashboard KPIs."""
+from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, Date
+from ..base import Base
+
+
+class DailyWorkOrderStatus(Base):
+    """Work orders created per day, bucketed by their current status."""
+    __tablename__ = "daily_work_order_status"
+
+    day = Column(Date, primary_key=True)
+    status = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class DailyRevenue(Base):
+    """Invoiced totals by invoice day and collected payments by payment day."""
+    __tablename__ = "daily_revenue"
+
+    day = Column(Date, primary_key=True)
+    invoiced = Column(Numeric(14, 2), nullable=False, default=0)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    collected = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+class DailyServiceUsage(Base):
+    """Services attached to work orders, by work order creation day."""
+    __tablename__ = "daily_service_usage"
+
+    day = Column(Date, primary_key=True)
+    service_id = Column(Integer, ForeignKey("services.id", ondelete="CASCADE"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
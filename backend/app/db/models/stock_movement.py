@@ -0,0 +1,29 @@
+"""Stock movement ledger model."""
+import enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from ..base import Base
+
+
+class StockMovementReason(str, enum.Enum):
+    """Why a part's stock changed (stored as its value)."""
+    RECEIPT = "receipt"
+    STOCKTAKE = "stocktake"
+    ADJUSTMENT = "adjustment"
+    DAMAGE = "damage"
+    RETURN = "return"
+
+
+class StockMovement(Base):
+    """One applied stock delta, with the part's stock right after it."""
+    __tablename__ = "stock_movements"
+
+    id = Column(Integer, primary_key=True, index=True)
+    part_id = Column(Integer, ForeignKey("parts.id", ondelete="CASCADE"), nullable=False, index=True)
+    delta = Column(Integer, nullable=False)
+    stock_after = Column(Integer, nullable=False)
+    reason = Column(String(16), nullable=False, default=StockMovementReason.ADJUSTMENT.value)
+    ref = Column(String)  # delivery note, stocktake sheet, ...
+    note = Column(Text)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -35,6 +35,11 @@ class WorkOrder(Base):
     est_labor = Column(Numeric(12, 2))
     est_total = Column(Numeric(12, 2))
     final_cost = Column(Numeric(12, 2))
+    # Maintained by app.services.work_order_totals; item totals are the exact
+    # sum of qty * unit_price, rounded only when invoiced
+    items_parts_total = Column(Numeric(14, 4), nullable=False, default=0, server_default="0")
+    items_labor_total = Column(Numeric(14, 4), nullable=False, default=0, server_default="0")
+    services_total = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
     warranty_text = Column(Text)
     notes = Column(Text)
     scheduled_at = Column(DateTime(timezone=True))
@@ -55,6 +60,7 @@ class WorkOrder(Base):
 
     __table_args__ = (
         Index('ix_work_orders_status', 'status'),
+        Index('ix_work_orders_created_at_id', 'created_at', 'id'),
     )
 
 
@@ -80,6 +86,8 @@ class WorkOrderService(Base):
     id = Column(Integer, primary_key=True, index=True)
     work_order_id = Column(Integer, ForeignKey("work_orders.id", ondelete="CASCADE"), nullable=False)
     service_id = Column(Integer, ForeignKey("services.id", ondelete="CASCADE"), nullable=False)
+    # The service's base_price when it was added; kept once the work order is closed or invoiced
+    unit_price = Column(Numeric(12, 2))
 
     # Relationships
     work_order = relationship("WorkOrder", back_populates="services")
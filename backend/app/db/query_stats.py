@@ -0,0 +1,128 @@
+"""Per-request SQL statement counting and timing.
+
+Engine events record every statement into the ``QueryStats`` of the current
+request (a context variable set by ``QueryStatsMiddleware`` in
+``app.core.middleware``) and into any active ``track_queries()`` blocks,
+which tests use for query budgets.
+Statements are fingerprinted by their SQL text, so the same statement run
+over and over - the usual N+1 shape - shows up as one repeated fingerprint.
+"""
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))+\s*\)")
+_STARTED_AT = "query_stats_started_at"
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize SQL text so executions of the same statement compare equal."""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    # selectinload / IN queries differ only by the number of bound parameters
+    return _IN_LIST.sub("(...)", statement)
+
+
+@dataclass
+class QueryStats:
+    """Statements executed within one request or ``track_queries()`` block."""
+    count: int = 0
+    total_ns: int = 0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, duration_ns: int) -> None:
+        self.count += 1
+        self.total_ns += duration_ns
+        self.fingerprints[fingerprint(statement)] += 1
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_ns / 1_000_000
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """Fingerprints executed at least ``threshold`` times, most frequent first."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} statements in {self.total_ms:.1f}ms"]
+        lines.extend(f"  {n}x {sql[:200]}" for sql, n in self.fingerprints.most_common())
+        return "\n".join(lines)
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+_trackers: List[QueryStats] = []
+_trackers_lock = threading.Lock()
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _request_stats.get()
+
+
+@contextmanager
+def request_query_stats() -> Iterator[QueryStats]:
+    """Make a fresh QueryStats current for the duration of one request."""
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect every statement run on an instrumented engine, from any thread, while active."""
+    stats = QueryStats()
+    with _trackers_lock:
+        _trackers.append(stats)
+    try:
+        yield stats
+    finally:
+        with _trackers_lock:
+            _trackers.remove(stats)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED_AT, []).append(perf_counter_ns())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get(_STARTED_AT)
+    if not started:
+        return
+    duration = perf_counter_ns() - started.pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if _trackers:
+        with _trackers_lock:
+            for tracker in _trackers:
+                tracker.record(statement, duration)
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get(_STARTED_AT) if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Attach the statement hooks to an (async or sync) engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def server_timing_header(stats: QueryStats) -> str:
+    repeated = sum(n for _, n in stats.repeated())
+    return f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries, {repeated} repeated"'
@@ -3,12 +3,17 @@ from .auth import LoginRequest, LoginResponse, UserResponse
 from .customers import CustomerCreate, CustomerUpdate, CustomerResponse, CustomerListResponse
 from .vehicles import VehicleCreate, VehicleUpdate, VehicleResponse, VehicleListResponse
 from .services import ServiceCreate, ServiceUpdate, ServiceResponse, ServiceListResponse
-from .parts import PartCreate, PartUpdate, PartResponse, PartListResponse, PartStockAdjustment
+from .parts import (
+    PartCreate, PartUpdate, PartResponse, PartListResponse, PartStockAdjustment,
+    StockMovementLine, StockMovementBatch, StockMovementBatchResponse, StockMovementResponse
+)
 from .workorders import (
     WorkOrderCreate, WorkOrderUpdate, WorkOrderResponse, WorkOrderListResponse,
     WorkOrderEstimate, WorkOrderSchedule, WorkOrderItemCreate, WorkOrderItemResponse,
     MediaUploadResponse, AuditLogResponse
 )
+from .suggest import SuggestionResponse, SuggestListResponse
+from .search import SearchHit, SearchGroup, GlobalSearchResponse
 from .approvals import (
     ApprovalRequestCreate, ApprovalRequestResponse, PublicApprovalResponse, ApprovalDecision
 )
@@ -19,8 +24,11 @@ __all__ = [
     "VehicleCreate", "VehicleUpdate", "VehicleResponse", "VehicleListResponse", 
     "ServiceCreate", "ServiceUpdate", "ServiceResponse", "ServiceListResponse",
     "PartCreate", "PartUpdate", "PartResponse", "PartListResponse", "PartStockAdjustment",
+    "StockMovementLine", "StockMovementBatch", "StockMovementBatchResponse", "StockMovementResponse",
     "WorkOrderCreate", "WorkOrderUpdate", "WorkOrderResponse", "WorkOrderListResponse",
     "WorkOrderEstimate", "WorkOrderSchedule", "WorkOrderItemCreate", "WorkOrderItemResponse",
     "MediaUploadResponse", "AuditLogResponse",
+    "SuggestionResponse", "SuggestListResponse",
+    "SearchHit", "SearchGroup", "GlobalSearchResponse",
     "ApprovalRequestCreate", "ApprovalRequestResponse", "PublicApprovalResponse", "ApprovalDecision"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 """Customer schemas for API operations."""
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr
 
@@ -10,6 +10,7 @@ class CustomerBase(BaseModel):
     phone: Optional[str] = None
     email: Optional[EmailStr] = None
     address: Optional[str] = None
+    language: Optional[Literal["ar", "en"]] = None
 
 
 class CustomerCreate(CustomerBase):
@@ -23,6 +24,7 @@ class CustomerUpdate(BaseModel):
     phone: Optional[str] = None
     email: Optional[EmailStr] = None
     address: Optional[str] = None
+    language: Optional[Literal["ar", "en"]] = None
 
 
 class CustomerResponse(CustomerBase):
@@ -1,7 +1,10 @@
 """Part schemas for API operations."""
 from typing import Optional
+from datetime import datetime
 from decimal import Decimal
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from ..models.stock_movement import StockMovementReason
 
 
 class PartBase(BaseModel):
@@ -36,6 +39,9 @@ class PartUpdate(BaseModel):
 class PartStockAdjustment(BaseModel):
     """Part stock adjustment schema."""
     delta: int  # positive for adding stock, negative for removing
+    reason: StockMovementReason = StockMovementReason.ADJUSTMENT
+    ref: Optional[str] = None
+    note: Optional[str] = None
 
 
 class PartResponse(PartBase):
@@ -52,4 +58,46 @@ class PartListResponse(BaseModel):
     total: int
     page: int
     size: int
-    pages: int
\ No newline at end of file
+    pages: int
+
+
+class StockMovementLine(BaseModel):
+    """One delta within a bulk stock movement."""
+    part_id: int
+    delta: int
+    note: Optional[str] = None
+
+
+class StockMovementBatch(BaseModel):
+    """Bulk stock movement (goods receipt, stocktake), applied all-or-nothing."""
+    reason: StockMovementReason
+    ref: Optional[str] = None
+    movements: list[StockMovementLine] = Field(min_length=1, max_length=1000)
+
+
+class PartStockLevel(BaseModel):
+    """A part's stock after a movement."""
+    id: int
+    stock: int
+
+
+class StockMovementBatchResponse(BaseModel):
+    """Result of a bulk stock movement."""
+    movements: int
+    parts: list[PartStockLevel]
+
+
+class StockMovementResponse(BaseModel):
+    """Stock movement ledger entry."""
+    id: int
+    part_id: int
+    delta: int
+    stock_after: int
+    reason: StockMovementReason
+    ref: Optional[str] = None
+    note: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
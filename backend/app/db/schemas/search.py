@@ -0,0 +1,25 @@
+"""Global search schemas."""
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    """One matching record, with display text."""
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    status: Optional[str] = None
+
+
+class SearchGroup(BaseModel):
+    """Ranked hits of one entity type."""
+    type: Literal["customers", "vehicles", "work_orders", "invoices"]
+    items: list[SearchHit]
+
+
+class GlobalSearchResponse(BaseModel):
+    """Search results grouped by entity type."""
+    query: str
+    groups: list[SearchGroup]
+    incomplete: list[str] = []  # groups that missed the latency budget or failed
+    took_ms: float
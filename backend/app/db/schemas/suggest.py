@@ -0,0 +1,19 @@
+"""Typeahead suggestion schemas."""
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+
+class SuggestionResponse(BaseModel):
+    """One typeahead match."""
+    type: Literal["part", "vehicle"]
+    id: int
+    label: str
+    detail: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SuggestListResponse(BaseModel):
+    """Typeahead matches, best first."""
+    items: list[SuggestionResponse]
@@ -69,6 +69,9 @@ class WorkOrderResponse(WorkOrderBase):
     est_labor: Optional[Decimal] = None
     est_total: Optional[Decimal] = None
     final_cost: Optional[Decimal] = None
+    items_parts_total: Decimal = Decimal("0")
+    items_labor_total: Decimal = Decimal("0")
+    services_total: Decimal = Decimal("0")
     warranty_text: Optional[str] = None
     scheduled_at: Optional[datetime] = None
     started_at: Optional[datetime] = None
@@ -84,10 +87,11 @@ class WorkOrderResponse(WorkOrderBase):
 class WorkOrderListResponse(BaseModel):
     """Work order list response with pagination."""
     items: List[WorkOrderResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class MediaUploadResponse(BaseModel):
@@ -97,6 +101,9 @@ class MediaUploadResponse(BaseModel):
     path: str
     phase: str
     note: Optional[str] = None
+    mime: Optional[str] = None
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None
     url: str
 
     class Config:
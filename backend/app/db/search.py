@@ -0,0 +1,144 @@
+"""Indexed substring search for customer, vehicle, part and work order lookups.
+
+``ilike('%q%')`` cannot use a B-tree index, so each table's searchable
+columns get a trigram index instead:
+
+- PostgreSQL: ``pg_trgm`` GIN indexes, which serve ``ILIKE '%q%'`` directly;
+  matches are ranked by ``word_similarity``.
+- SQLite: a contentless FTS5 table with the trigram tokenizer, kept in sync
+  by triggers; matches are ranked by bm25.
+
+Customers are searched on their normalized name and phone columns, so the
+query is normalized the same way per column (``QUERY_KEYS``).
+
+Queries shorter than a trigram can't use either index and fall back to
+ILIKE. The DDL is created by the migration and, for ``create_all``
+databases (tests, scratch setups), by the metadata listeners below.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import column, event, false, func, literal_column, or_, select, table, text
+from sqlalchemy.sql import Select
+
+from .base import Base
+from ..utils.normalize import normalize_name, phone_search_key
+
+# Table name -> searchable columns
+SEARCH_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "customers": ("name_norm", "phone_norm", "email"),
+    "vehicles": ("plate_no", "vin"),
+    "parts": ("name", "part_no", "supplier"),
+    "work_orders": ("complaint",),
+}
+
+# Column -> the query's search term for that column (None: don't search it)
+QUERY_KEYS: Dict[str, Callable[[str], Optional[str]]] = {
+    "name_norm": normalize_name,
+    "phone_norm": phone_search_key,
+}
+
+MIN_TRIGRAM_QUERY = 3
+
+
+def fts_table_name(tablename: str) -> str:
+    return f"{tablename}_fts"
+
+
+def sqlite_search_ddl(tablename: str) -> List[str]:
+    """FTS5 table plus insert/update/delete triggers for one table."""
+    columns = SEARCH_COLUMNS[tablename]
+    fts = fts_table_name(tablename)
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert_new = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tablename} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tablename} BEGIN {delete_old} END",
+        # Only the indexed columns: stock changes on parts don't touch the index
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {tablename} "
+        f"BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {fts}(rowid, {names}) SELECT id, {names} FROM {tablename}",
+    ]
+
+
+def postgresql_search_ddl(tablename: str) -> List[str]:
+    """pg_trgm GIN index per searchable column."""
+    return ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+        f"CREATE INDEX IF NOT EXISTS ix_{tablename}_{c}_trgm ON {tablename} USING gin ({c} gin_trgm_ops)"
+        for c in SEARCH_COLUMNS[tablename]
+    ]
+
+
+def _phrase(term: str) -> str:
+    """An FTS5 phrase: matches the term as a contiguous substring."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _fts_query(terms: Dict[str, str]) -> str:
+    """``{col col} : "term" OR ...``, one column filter per distinct term."""
+    by_term: Dict[str, List[str]] = {}
+    for name, term in terms.items():
+        by_term.setdefault(term, []).append(name)
+    return " OR ".join(f"{{{' '.join(names)}}} : {_phrase(term)}" for term, names in by_term.items())
+
+
+def apply_search(stmt: Select, model, q: str, dialect: str, rank: bool = True) -> Select:
+    """
+    Restrict ``stmt`` (a select over ``model``) to rows whose searchable
+    columns contain ``q``, case-insensitively. With ``rank``, best matches
+    are ordered first; add a tie-breaking order after calling this.
+    """
+    terms = {}
+    for name in SEARCH_COLUMNS[model.__tablename__]:
+        term = QUERY_KEYS.get(name, str.strip)(q)
+        if term:
+            terms[name] = term
+    if not terms:
+        return stmt.where(false())
+
+    if dialect == "sqlite" and all(len(term) >= MIN_TRIGRAM_QUERY for term in terms.values()):
+        fts = table(fts_table_name(model.__tablename__), column("rowid"), column("rank"))
+        matches = (
+            select(fts.c.rowid.label("id"), fts.c.rank.label("rank"))
+            .where(literal_column(fts.name).op("MATCH")(_fts_query(terms)))
+            .subquery()
+        )
+        stmt = stmt.join_from(model, matches, matches.c.id == model.id)
+        return stmt.order_by(matches.c.rank) if rank else stmt
+
+    columns = model.__table__.c
+    stmt = stmt.where(or_(*(columns[name].ilike(f"%{term}%") for name, term in terms.items())))
+    if rank and dialect == "postgresql":
+        similarity = func.greatest(*(func.word_similarity(term, columns[name]) for name, term in terms.items()))
+        stmt = stmt.order_by(similarity.desc())
+    return stmt
+
+
+def search_ids(model, q: str, dialect: str) -> Select:
+    """Ids of the ``model`` rows matching ``q``, for use in ``IN (...)``."""
+    return apply_search(select(model.id), model, q, dialect, rank=False)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_indexes(target, connection, tables=(), **kw):
+    dialect = connection.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        return
+    for t in tables:
+        if t.name not in SEARCH_COLUMNS:
+            continue
+        ddl = sqlite_search_ddl(t.name) if dialect == "sqlite" else postgresql_search_ddl(t.name)
+        for statement in ddl:
+            connection.execute(text(statement))
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_search_tables(target, connection, tables=(), **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for t in tables:
+        if t.name in SEARCH_COLUMNS:
+            connection.execute(text(f"DROP TABLE IF EXISTS {fts_table_name(t.name)}"))
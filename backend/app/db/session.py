@@ -1,13 +1,113 @@
+import asyncio
+import logging
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 from ..core.config import settings
+from ..core.metrics import registry
+from .query_stats import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def engine_options(database_url: str) -> dict:
+    """Pool and driver arguments for ``create_async_engine`` from settings."""
+    url = make_url(database_url)
+    options = {
+        "echo": False,
+        "future": True,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "query_cache_size": settings.db_query_cache_size,
+    }
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_recycle=settings.db_pool_recycle_seconds,
+        )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            # SQLAlchemy's prepared statement cache and asyncpg's own
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """WAL lets readers run alongside the writer; NORMAL sync is durable enough under WAL."""
+    cursor = dbapi_connection.cursor()
+    try:
+        if settings.sqlite_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+    finally:
+        cursor.close()
+
 
 # Create async engine
-engine = create_async_engine(
-    settings.async_database_url,
-    echo=False,
-    future=True
-)
+engine = create_async_engine(settings.async_database_url, **engine_options(settings.async_database_url))
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+instrument_engine(engine)
+
+
+def _pool_stat(name: str):
+    """Read a pool counter at scrape time (pools such as NullPool don't keep them)."""
+    def read():
+        stat = getattr(engine.pool, name, None)
+        return stat() if callable(stat) else None
+    return read
+
+
+registry.gauge("db_pool_size", "Configured connection pool size.", _pool_stat("size"))
+registry.gauge("db_pool_checked_out", "Connections currently checked out of the pool.", _pool_stat("checkedout"))
+registry.gauge("db_pool_checked_in", "Idle connections in the pool.", _pool_stat("checkedin"))
+# QueuePool.overflow() is negative while the pool is not yet full
+registry.gauge("db_pool_overflow", "Connections open beyond the pool size.",
+               lambda: max(0, _pool_stat("overflow")() or 0))
+
+
+async def warm_up_pool(connections: Optional[int] = None) -> int:
+    """
+    Open connections up front (called at startup) so the first requests after
+    a deploy don't each pay connection setup. Returns how many were opened.
+    """
+    if connections is None:
+        connections = settings.db_pool_warmup_connections
+    connections = min(connections, settings.db_pool_size)
+    if connections <= 0:
+        return 0
+
+    async def open_connection():
+        conn = await engine.connect()
+        try:
+            await conn.execute(text("SELECT 1"))
+        except BaseException:
+            await conn.close()
+            raise
+        return conn
+
+    # Hold them all at once so the pool creates distinct connections
+    results = await asyncio.gather(*(open_connection() for _ in range(connections)), return_exceptions=True)
+    opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    for conn in opened:
+        await conn.close()
+    if len(opened) < connections:
+        error = next(result for result in results if isinstance(result, BaseException))
+        logger.warning(f"Database pool warm-up opened {len(opened)}/{connections} connections: {error}")
+    return len(opened)
+
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -0,0 +1,87 @@
+"""Single-round-trip write helpers."""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T")
+
+# Core UPDATEs skip ORM mapper events; model -> [(watched columns, hook)]
+_update_hooks: Dict[type, List[Tuple[frozenset, Callable]]] = {}
+
+
+def on_update(model, *columns: str):
+    """
+    Register ``hook(connection, old, new)`` to run when ``update_returning``
+    writes any of ``columns`` on ``model``: the counterpart of an ORM
+    ``after_update`` listener for these writes. ``old`` is a row of the
+    watched columns' values before the UPDATE, ``new`` the updated object.
+    """
+    def register(hook):
+        _update_hooks.setdefault(model, []).append((frozenset(columns), hook))
+        return hook
+    return register
+
+
+async def update_returning(
+    db: AsyncSession,
+    model: Type[T],
+    ident: Any,
+    values: dict,
+    *conditions,
+    options: Sequence = ()
+) -> Optional[T]:
+    """
+    Apply ``values`` to the row with primary key ``ident`` and return it as an
+    up-to-date ORM object, or None when no row matched ``ident`` and
+    ``conditions``.
+
+    Uses ``UPDATE ... RETURNING`` so the response needs no refresh SELECT;
+    values may be SQL expressions (``Part.stock + 5``) and conditions make the
+    write conditional (``WorkOrder.status == ...``). Loader ``options`` such as
+    ``selectinload`` are applied to the returned object. On databases without
+    UPDATE RETURNING (SQLite before 3.35) it updates, then selects.
+
+    Writes to columns watched by an ``on_update`` hook first read (and lock)
+    the old values, then run the hooks in the same transaction.
+    """
+    pk = model.__mapper__.primary_key[0]
+    where = (pk == ident, *conditions)
+    if not values:
+        result = await db.execute(
+            select(model).where(*where).options(*options).execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    hooks = [(columns, hook) for columns, hook in _update_hooks.get(model, ()) if columns & values.keys()]
+    if not hooks:
+        return await _update(db, model, pk, ident, where, values, options)
+
+    watched = sorted(set().union(*(columns for columns, _ in hooks)))
+    table = model.__table__
+    old = (await db.execute(
+        select(*(table.c[name] for name in watched)).where(*where).with_for_update()
+    )).first()
+    if old is None:
+        return None
+    obj = await _update(db, model, pk, ident, where, values, options)
+    if obj is not None:
+        await db.run_sync(lambda session: [hook(session.connection(), old, obj) for _, hook in hooks])
+    return obj
+
+
+async def _update(db: AsyncSession, model, pk, ident, where, values: dict, options: Sequence):
+    stmt = update(model).where(*where).values(**values)
+    if db.get_bind().dialect.update_returning:
+        result = await db.execute(
+            stmt.returning(model).options(*options).execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    result = await db.execute(stmt.execution_options(synchronize_session=False))
+    if result.rowcount == 0:
+        return None
+    result = await db.execute(
+        select(model).where(pk == ident).options(*options).execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
@@ -3,24 +3,29 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
-import time
 import os
 
 from .core.config import settings
-from .db.session import engine
+from .core.logging_config import setup_logging
+from .core.middleware import RequestLoggingMiddleware, MetricsMiddleware, QueryStatsMiddleware, INTERNAL_ERROR_BODY
+from .core.metrics import registry as metrics_registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .db.session import engine, warm_up_pool
 from .db.base import Base
+from .core.security import shutdown_hash_executor
+from .services.pdf import shutdown_render_executor
+from .services.media import shutdown_rendition_executor
+from .services.outbox import outbox_dispatcher
+from .services.notify import notify
+from .services.notification_templates import notification_templates
+from .services.suggest import suggest_index
 
 # Import all routers
-from .api import auth, customers, vehicles, services, parts, workorders, media, invoices, reports, notifications, approvals, public
+from .api import auth, customers, vehicles, services, parts, workorders, media, invoices, reports, notifications, approvals, public, suggest, search
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='{"timestamp": "%(asctime)s", "level": "%(levelname)s", "message": "%(message)s", "module": "%(name)s"}',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
@@ -32,10 +37,34 @@ async def lifespan(app: FastAPI):
     # Create storage directory
     os.makedirs(settings.storage_dir, exist_ok=True)
     
+    # Open pooled database connections before traffic arrives
+    await warm_up_pool()
+    
+    # Compile notification templates once, before the first message is queued
+    notification_templates.load()
+    
+    # Build the typeahead index and keep reloading it in the background; an
+    # unreachable database must not stop startup, the reloads retry it
+    try:
+        await suggest_index.load()
+    except Exception:
+        logger.exception("Suggest index load failed at startup")
+    suggest_index.start()
+    
+    # Deliver queued notifications in-process unless a separate worker does
+    if settings.outbox_dispatcher_enabled:
+        outbox_dispatcher.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down FastAPI application")
+    await outbox_dispatcher.stop()
+    await suggest_index.stop()
+    await notify.aclose()
+    shutdown_hash_executor()
+    shutdown_render_executor()
+    shutdown_rendition_executor()
     await engine.dispose()
 
 # Create FastAPI app
@@ -55,32 +84,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests."""
-    start_time = time.time()
-    
-    # Log request
-    client_ip = request.client.host if request.client else "unknown"
-    logger.info(f'{{"method": "{request.method}", "url": "{request.url}", "client_ip": "{client_ip}"}}')
-    
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        # Log response
-        logger.info(f'{{"method": "{request.method}", "url": "{request.url}", "status_code": {response.status_code}, "process_time": {process_time:.4f}}}')
-        
-        return response
-    except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(f'{{"method": "{request.method}", "url": "{request.url}", "error": "{str(e)}", "process_time": {process_time:.4f}}}')
-        
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"error": {"code": "INTERNAL_ERROR", "message": "Internal server error"}}
-        )
+# Per-request SQL stats, per-route request metrics, then request logging
+# (outermost, so it times everything below it)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestLoggingMiddleware)
 
 # Root endpoint
 @app.get("/")
@@ -99,6 +107,12 @@ async def health_check():
     """Health check endpoint."""
     return {"ok": True}
 
+# Metrics endpoint (Prometheus text format)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request, database pool, notification and PDF render metrics."""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1")
@@ -112,6 +126,8 @@ app.include_router(invoices.router, prefix="/api/v1")
 app.include_router(reports.router, prefix="/api/v1")
 app.include_router(notifications.router, prefix="/api/v1")
 app.include_router(approvals.router, prefix="/api/v1")
+app.include_router(suggest.router, prefix="/api/v1")
+app.include_router(search.router, prefix="/api/v1")
 app.include_router(public.router)  # No prefix for public endpoints
 
 # Mount static files for storage if directory exists
@@ -127,11 +143,15 @@ if os.path.exists(flutter_build_dir):
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler with consistent error format."""
-    logger.error(f'{{"url": "{request.url}", "method": "{request.method}", "error": "{str(exc)}", "type": "{type(exc).__name__}"}}')
+    logger.error(
+        "Unhandled exception",
+        extra={"fields": {"method": request.method, "path": request.url.path, "type": type(exc).__name__}},
+        exc_info=exc
+    )
     
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={"error": {"code": "INTERNAL_ERROR", "message": "Internal server error"}}
+        content=INTERNAL_ERROR_BODY
     )
 
 if __name__ == "__main__":
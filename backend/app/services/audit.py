@@ -12,7 +12,12 @@ async def log_action(
     entity_id: int,
     attachment_url: str = None
 ):
-    """Log an action to the audit log."""
+    """
+    Log an action to the audit log.
+    
+    The entry is only added to the session: it is inserted by the caller's
+    next flush or commit, in the same batch as the change it records.
+    """
     audit_entry = AuditLog(
         actor_id=user.id,
         action=action,
@@ -20,6 +25,5 @@ async def log_action(
         entity_id=entity_id,
         attachment_url=attachment_url
     )
-    db.add(audit_entry)
-    await db.flush()  # Don't commit, let the calling function handle that
+    db.add(audit_entry)  # Don't flush or commit, let the calling function handle that
     return audit_entry
\ No newline at end of file
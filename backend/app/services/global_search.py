@@ -0,0 +1,192 @@
+"""Cross-entity search: customers, vehicles, work orders and invoices at once.
+
+Each group runs as its own query on its own pooled connection, all
+concurrently, so the response takes as long as the slowest group rather
+than the sum. Groups still running when the latency budget is spent are
+cancelled and reported as incomplete instead of holding up the others.
+
+Work orders and invoices also match through their customer and vehicle,
+so "ABC-123" or "Ali" finds the car's recent work orders in one call.
+Short numbers ("#42") are taken as work order/invoice numbers only; as
+text they would match half the phone numbers.
+"""
+import asyncio
+import logging
+import re
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import case, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..db.models import Customer, Vehicle, WorkOrder, Invoice
+from ..db.schemas import GlobalSearchResponse, SearchGroup, SearchHit
+from ..db.search import MIN_TRIGRAM_QUERY, apply_search, search_ids
+from ..db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# "123", "#123", "WO-123", "INV 123"
+_NUMBER = re.compile(r"^\s*(?:#|wo|inv)?[\s-]*(\d{1,9})\s*$", re.IGNORECASE)
+
+# (db, text query or None, number or None, dialect, limit) -> hits
+GroupQuery = Callable[[AsyncSession, Optional[str], Optional[int], str, int], Awaitable[List[SearchHit]]]
+
+
+def parse_number(q: str) -> Optional[int]:
+    match = _NUMBER.match(q)
+    return int(match.group(1)) if match else None
+
+
+async def _customers(db, q, number, dialect, limit) -> List[SearchHit]:
+    if q is None:
+        return []
+    stmt = apply_search(select(Customer.id, Customer.name, Customer.phone), Customer, q, dialect)
+    rows = (await db.execute(stmt.order_by(Customer.id).limit(limit))).all()
+    return [SearchHit(id=row.id, title=row.name, subtitle=row.phone) for row in rows]
+
+
+async def _vehicles(db, q, number, dialect, limit) -> List[SearchHit]:
+    if q is None:
+        return []
+    stmt = apply_search(
+        select(Vehicle.id, Vehicle.plate_no, Vehicle.make, Vehicle.model, Customer.name.label("owner"))
+        .join(Customer, Customer.id == Vehicle.customer_id),
+        Vehicle, q, dialect
+    )
+    rows = (await db.execute(stmt.order_by(Vehicle.id).limit(limit))).all()
+    return [
+        SearchHit(id=row.id, title=row.plate_no, subtitle=f"{row.make} {row.model} · {row.owner}")
+        for row in rows
+    ]
+
+
+async def _work_orders(db, q, number, dialect, limit) -> List[SearchHit]:
+    matches = []
+    if q is not None:
+        matches += [
+            WorkOrder.id.in_(search_ids(WorkOrder, q, dialect)),
+            WorkOrder.vehicle_id.in_(search_ids(Vehicle, q, dialect)),
+            WorkOrder.customer_id.in_(search_ids(Customer, q, dialect)),
+        ]
+    exact = WorkOrder.id == number if number is not None else None
+    if exact is not None:
+        matches.append(exact)
+    if not matches:
+        return []
+    stmt = (
+        select(WorkOrder.id, WorkOrder.status, WorkOrder.complaint, Vehicle.plate_no, Customer.name.label("customer"))
+        .join(Vehicle, Vehicle.id == WorkOrder.vehicle_id)
+        .join(Customer, Customer.id == WorkOrder.customer_id)
+        .where(or_(*matches))
+    )
+    # An exact id first, then the most recent
+    if exact is not None:
+        stmt = stmt.order_by(case((exact, 0), else_=1))
+    rows = (await db.execute(stmt.order_by(WorkOrder.created_at.desc(), WorkOrder.id.desc()).limit(limit))).all()
+    return [
+        SearchHit(
+            id=row.id,
+            title=f"#{row.id} {row.plate_no} · {row.customer}",
+            subtitle=row.complaint,
+            status=getattr(row.status, "value", row.status)
+        )
+        for row in rows
+    ]
+
+
+async def _invoices(db, q, number, dialect, limit) -> List[SearchHit]:
+    matches = []
+    if q is not None:
+        matches += [
+            WorkOrder.vehicle_id.in_(search_ids(Vehicle, q, dialect)),
+            WorkOrder.customer_id.in_(search_ids(Customer, q, dialect)),
+        ]
+    exact = None
+    if number is not None:
+        exact = or_(Invoice.id == number, Invoice.work_order_id == number)
+        matches.append(exact)
+    if not matches:
+        return []
+    stmt = (
+        select(Invoice.id, Invoice.work_order_id, Invoice.total, Customer.name.label("customer"))
+        .join(WorkOrder, WorkOrder.id == Invoice.work_order_id)
+        .join(Customer, Customer.id == WorkOrder.customer_id)
+        .where(or_(*matches))
+    )
+    if exact is not None:
+        stmt = stmt.order_by(case((exact, 0), else_=1))
+    rows = (await db.execute(stmt.order_by(Invoice.id.desc()).limit(limit))).all()
+    return [
+        SearchHit(
+            id=row.id,
+            title=f"Invoice #{row.id} · {row.customer}",
+            subtitle=f"Work order #{row.work_order_id} · {row.total if row.total is not None else '-'}"
+        )
+        for row in rows
+    ]
+
+
+GROUPS: Dict[str, GroupQuery] = {
+    "customers": _customers,
+    "vehicles": _vehicles,
+    "work_orders": _work_orders,
+    "invoices": _invoices,
+}
+
+
+async def _run_group(
+    query: GroupQuery, q: Optional[str], number: Optional[int], limit: int, session_factory
+) -> List[SearchHit]:
+    async with session_factory() as db:
+        return await query(db, q, number, db.get_bind().dialect.name, limit)
+
+
+async def global_search(
+    q: str,
+    limit: int = 5,
+    budget_ms: Optional[float] = None,
+    groups: Optional[Dict[str, GroupQuery]] = None,
+    session_factory=None
+) -> GlobalSearchResponse:
+    """Run every group concurrently and return what finished within the budget."""
+    start = perf_counter()
+    budget_ms = settings.global_search_budget_ms if budget_ms is None else budget_ms
+    groups = GROUPS if groups is None else groups
+    session_factory = session_factory or AsyncSessionLocal
+    number = parse_number(q)
+    text = q if number is None or len(str(number)) >= MIN_TRIGRAM_QUERY else None
+
+    tasks = {
+        name: asyncio.create_task(_run_group(query, text, number, limit, session_factory))
+        for name, query in groups.items()
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=budget_ms / 1000)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    incomplete = []
+    for name, task in tasks.items():
+        if task in pending:
+            incomplete.append(name)
+            continue
+        if task.exception() is not None:
+            logger.error(
+                "Search group failed",
+                extra={"fields": {"group": name}},
+                exc_info=task.exception()
+            )
+            incomplete.append(name)
+            continue
+        results.append(SearchGroup(type=name, items=task.result()))
+
+    return GlobalSearchResponse(
+        query=q,
+        groups=results,
+        incomplete=incomplete,
+        took_ms=round((perf_counter() - start) * 1000, 2)
+    )
@@ -0,0 +1,236 @@
+"""Media file storage and image renditions."""
+import argparse
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import posixpath
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+import anyio
+from fastapi import UploadFile
+from PIL import Image, ImageOps
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from ..core.config import settings
+from ..db.models import Media, MediaRendition
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds ``settings.media_max_upload_bytes``."""
+
+
+@dataclass
+class StoredUpload:
+    """A file written to the media store."""
+    size: int
+    sha256: str
+    mime: Optional[str]
+
+
+def guess_mime(file: UploadFile) -> Optional[str]:
+    """Use the client's content type unless it is missing or generic."""
+    content_type = (file.content_type or "").split(";")[0].strip().lower()
+    if content_type and content_type != "application/octet-stream":
+        return content_type
+    guessed, _ = mimetypes.guess_type(file.filename or "")
+    return guessed or content_type or None
+
+
+async def save_upload(file: UploadFile, path: str, max_bytes: Optional[int] = None) -> StoredUpload:
+    """
+    Stream an upload to ``path`` in fixed-size chunks, hashing as it goes.
+
+    The file is written to a temporary name next to ``path`` and renamed once
+    complete, so a failed or oversized upload never leaves a partial file.
+    Raises UploadTooLargeError past ``max_bytes``.
+    """
+    if max_bytes is None:
+        max_bytes = settings.media_max_upload_bytes
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(f"File exceeds maximum size of {max_bytes} bytes")
+
+    chunk_size = settings.media_upload_chunk_bytes
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+    await anyio.to_thread.run_sync(lambda: os.makedirs(os.path.dirname(path), exist_ok=True))
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as out:
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds maximum size of {max_bytes} bytes")
+                digest.update(chunk)
+                await out.write(chunk)
+        await anyio.to_thread.run_sync(os.replace, tmp_path, path)
+    except BaseException:
+        await anyio.to_thread.run_sync(_remove_if_exists, tmp_path)
+        raise
+
+    return StoredUpload(size=size, sha256=digest.hexdigest(), mime=guess_mime(file))
+
+
+def _remove_if_exists(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Renditions: downscaled WebP and JPEG copies of uploaded photos, stored next
+# to the original under renditions/. Pillow releases the GIL while decoding,
+# resizing and encoding, so a small thread pool keeps them off the event loop.
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_rendition_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_rendition_executor() -> ThreadPoolExecutor:
+    global _rendition_executor
+    if _rendition_executor is None:
+        _rendition_executor = ThreadPoolExecutor(
+            max_workers=settings.media_rendition_workers,
+            thread_name_prefix="media-rendition"
+        )
+    return _rendition_executor
+
+
+def shutdown_rendition_executor() -> None:
+    """Stop the rendition pool (called on application shutdown)."""
+    global _rendition_executor
+    if _rendition_executor is not None:
+        _rendition_executor.shutdown(wait=False, cancel_futures=True)
+        _rendition_executor = None
+
+
+def is_image(media) -> bool:
+    mime = media.mime or mimetypes.guess_type(media.path)[0] or ""
+    return mime.startswith("image/") and mime != "image/svg+xml"
+
+
+def rendition_path(media_path: str, width: int, fmt: str) -> str:
+    """Storage-relative path of one rendition of ``media_path``."""
+    directory, filename = posixpath.split(media_path)
+    stem = os.path.splitext(filename)[0]
+    return posixpath.join(directory, "renditions", f"{stem}_w{width}.{RENDITION_FORMATS[fmt][1]}")
+
+
+def render_image_renditions(media_path: str, widths: List[int], storage_dir: Optional[str] = None) -> List[dict]:
+    """
+    Write WebP and JPEG renditions of an image for each width narrower than
+    the original, returning the MediaRendition column values.
+    """
+    storage_dir = storage_dir or settings.storage_dir
+    renditions = []
+    with Image.open(os.path.join(storage_dir, media_path)) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        for width in sorted(set(widths)):
+            if width >= image.width:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+            for fmt, (pil_format, _, options) in RENDITION_FORMATS.items():
+                path = rendition_path(media_path, width, fmt)
+                full_path = os.path.join(storage_dir, path)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                frame = resized.convert("RGB") if pil_format == "JPEG" and has_alpha else resized
+                tmp_path = f"{full_path}.{uuid.uuid4().hex}.part"
+                frame.save(tmp_path, pil_format, **options)
+                os.replace(tmp_path, full_path)
+                renditions.append({
+                    "width": width,
+                    "height": height,
+                    "format": fmt,
+                    "path": path,
+                    "size_bytes": os.path.getsize(full_path),
+                })
+    return renditions
+
+
+async def generate_renditions(media_id: int) -> int:
+    """Render and record the renditions of one media row. Returns how many were written."""
+    from ..db.session import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Media).options(selectinload(Media.renditions)).where(Media.id == media_id)
+            )
+            media = result.scalar_one_or_none()
+            if media is None or not is_image(media):
+                return 0
+
+            loop = asyncio.get_running_loop()
+            rendered = await loop.run_in_executor(
+                _get_rendition_executor(), render_image_renditions,
+                media.path, list(settings.media_rendition_widths), settings.storage_dir
+            )
+            existing = {(r.width, r.format): r for r in media.renditions}
+            for values in rendered:
+                rendition = existing.get((values["width"], values["format"]))
+                if rendition is None:
+                    media.renditions.append(MediaRendition(**values))
+                else:
+                    for key, value in values.items():
+                        setattr(rendition, key, value)
+            await db.commit()
+            return len(rendered)
+    except Exception:
+        logger.exception(f"Failed to generate renditions for media {media_id}")
+        return 0
+
+
+def pick_rendition(media, width: Optional[int], accept: str = "") -> Optional[MediaRendition]:
+    """
+    The smallest rendition at least ``width`` pixels wide, in WebP when the
+    client accepts it. None means the original is the nearest match.
+    """
+    if not width:
+        return None
+    fmt = "webp" if "image/webp" in (accept or "") else "jpeg"
+    candidates = sorted((r for r in media.renditions if r.format == fmt), key=lambda r: r.width)
+    for rendition in candidates:
+        if rendition.width >= width:
+            return rendition
+    return None
+
+
+def rendition_mime(rendition: MediaRendition) -> str:
+    return "image/webp" if rendition.format == "webp" else "image/jpeg"
+
+
+async def _main(args) -> None:
+    from ..db.session import AsyncSessionLocal, engine
+
+    async with AsyncSessionLocal() as db:
+        query = select(Media.id).order_by(Media.id)
+        if args.missing:
+            query = query.where(~Media.renditions.any())
+        media_ids = (await db.execute(query)).scalars().all()
+    total = 0
+    for media_id in media_ids:
+        total += await generate_renditions(media_id)
+    shutdown_rendition_executor()
+    await engine.dispose()
+    print(f"Wrote {total} renditions for {len(media_ids)} media files")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Media maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    renditions = subparsers.add_parser("renditions", help="Generate image renditions for existing media")
+    renditions.add_argument("--missing", action="store_true", help="Only media without renditions")
+    asyncio.run(_main(parser.parse_args()))
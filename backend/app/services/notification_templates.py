@@ -0,0 +1,107 @@
+"""Localized notification templates.
+
+Each message has one template per channel and language under
+``templates/notifications``, named ``{message}_{channel}.{language}.{ext}``
+(for example ``approval_email.ar.html``). The registry compiles all of them
+once at startup; rendering is then a single call on a small context dict.
+Email templates export their subject with ``{% set subject = ... %}``.
+"""
+import logging
+import os
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, select_autoescape
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "templates", "notifications"
+)
+SUPPORTED_LANGUAGES = ("ar", "en")
+
+_TEMPLATE_NAME = re.compile(r"^(?P<name>\w+)\.(?P<language>[a-z]{2})\.(?:html|txt)$")
+_ARABIC_SCRIPT = re.compile(r"[؀-ۿ]")
+
+
+@dataclass
+class RenderedMessage:
+    subject: Optional[str]
+    body: str
+
+
+def money(value) -> Optional[str]:
+    """Format an amount as dollars, or None when it is not set."""
+    if not value:
+        return None
+    return f"${Decimal(value):.2f}"
+
+
+def customer_language(customer) -> str:
+    """
+    The customer's notification language: their stored preference, else
+    Arabic for names written in Arabic script, else the configured default.
+    """
+    language = getattr(customer, "language", None)
+    if language in SUPPORTED_LANGUAGES:
+        return language
+    if _ARABIC_SCRIPT.search(getattr(customer, "name", None) or ""):
+        return "ar"
+    return settings.notification_default_language
+
+
+class NotificationTemplates:
+    """Compiled notification templates keyed by (name, language)."""
+
+    def __init__(self, directory: str = TEMPLATE_DIR):
+        self.directory = directory
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(["html"]),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=False,
+        )
+        self.env.filters["money"] = money
+        self._templates: Dict[Tuple[str, str], Template] = {}
+
+    def load(self) -> int:
+        """Compile every template in the directory. Returns how many were loaded."""
+        templates = {}
+        for filename in sorted(os.listdir(self.directory)):
+            match = _TEMPLATE_NAME.match(filename)
+            if match:
+                key = (match.group("name"), match.group("language"))
+                templates[key] = self.env.get_template(filename)
+        self._templates = templates
+        logger.info(f"Compiled {len(templates)} notification templates")
+        return len(templates)
+
+    def get(self, name: str, language: str) -> Template:
+        """The template for ``language``, falling back to the default language."""
+        if not self._templates:
+            self.load()
+        template = self._templates.get((name, language))
+        if template is None:
+            template = self._templates.get((name, settings.notification_default_language))
+        if template is None:
+            raise KeyError(f"No notification template {name!r}")
+        return template
+
+    def render(self, name: str, language: str, context: dict) -> RenderedMessage:
+        """Render one message, returning its subject (if any) and body."""
+        module = self.get(name, language).make_module(context)
+        subject = getattr(module, "subject", None)
+        return RenderedMessage(
+            subject=str(subject).strip() if subject is not None else None,
+            body=str(module).strip()
+        )
+
+
+notification_templates = NotificationTemplates()
@@ -1,10 +1,18 @@
 """Notification service coordinator."""
 import logging
 import asyncio
-from typing import List, Optional
+import queue
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import List, Optional, Tuple
 from abc import ABC, abstractmethod
 
+import httpx
+
 from ..core.config import settings
+from ..core.metrics import notifications_sent_total
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +21,25 @@ class EmailDriver(ABC):
     @abstractmethod
     async def send_email(self, to: str, subject: str, html: str) -> bool:
         pass
+    
+    async def send_many(self, messages: List[Tuple[str, str, str]]) -> List[bool]:
+        """Send (to, subject, html) messages concurrently; results keep the input order."""
+        return list(await asyncio.gather(*(self.send_email(*message) for message in messages)))
+    
+    def close(self) -> None:
+        pass
 
 class WhatsAppDriver(ABC):
     @abstractmethod
     async def send_whatsapp(self, to: str, text: str, media_urls: List[str] = None) -> bool:
         pass
+    
+    async def send_whatsapp_many(self, messages: List[Tuple[str, str, List[str]]]) -> List[bool]:
+        """Send (to, text, media_urls) messages; results keep the input order."""
+        return list(await asyncio.gather(*(self.send_whatsapp(*message) for message in messages)))
+    
+    async def aclose(self) -> None:
+        pass
 
 # Console drivers for development
 class ConsoleEmailDriver(EmailDriver):
@@ -38,75 +60,248 @@ class ConsoleWhatsAppDriver(WhatsAppDriver):
         return True
 
 # Real drivers for production
+class SMTPConnectionPool:
+    """
+    Long-lived, authenticated SMTP sessions shared by a bounded executor.
+
+    Each executor thread checks out a session, sends and returns it, so at
+    most ``size`` sessions exist. Sessions idle longer than ``noop_after``
+    seconds are probed with NOOP before reuse, and a session that fails is
+    replaced once before the send is reported as failed.
+    """
+
+    def __init__(self, host: str, port: int, user: str = "", password: str = "",
+                 size: int = 2, starttls: bool = True, timeout: float = 30.0, noop_after: float = 30.0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = size
+        self.starttls = starttls
+        self.timeout = timeout
+        self.noop_after = noop_after
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp")
+        self.connects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.ehlo()
+        if self.starttls:
+            server.starttls()
+            server.ehlo()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        self.connects += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.noop_after:
+                return server
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except Exception:
+                pass
+            self._close(server)
+
+    def _checkin(self, server: smtplib.SMTP) -> None:
+        self._idle.put((server, time.monotonic()))
+
+    def _send_blocking(self, msg: EmailMessage) -> None:
+        server = self._checkout()
+        try:
+            server.send_message(msg)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+            # The server answered, so the session is fine and only this message
+            # was rejected, unless it also hung up (421). These subclass
+            # OSError: keep this clause before the stale-session one.
+            if server.sock is None:
+                self._resend(msg)
+                return
+            self._checkin(server)
+            raise
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Stale session: retry once on a fresh connection
+            self._close(server)
+            self._resend(msg)
+            return
+        except Exception:
+            self._close(server)
+            raise
+        self._checkin(server)
+
+    def _resend(self, msg: EmailMessage) -> None:
+        server = self._connect()
+        try:
+            server.send_message(msg)
+        except Exception:
+            self._close(server)
+            raise
+        self._checkin(server)
+
+    async def send(self, msg: EmailMessage) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._send_blocking, msg)
+
+    def close(self) -> None:
+        """Shut down the executor and close idle sessions."""
+        self._executor.shutdown(wait=False)
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(server)
+
+
 class SMTPEmailDriver(EmailDriver):
-    def __init__(self):
+    def __init__(self, pool: Optional[SMTPConnectionPool] = None):
         self.smtp_host = settings.smtp_host
         self.smtp_port = settings.smtp_port
         self.smtp_user = settings.smtp_user
         self.smtp_pass = settings.smtp_pass
+        self.pool = pool or SMTPConnectionPool(
+            self.smtp_host, self.smtp_port, self.smtp_user, self.smtp_pass,
+            size=settings.smtp_pool_size,
+            starttls=settings.smtp_starttls,
+            timeout=settings.smtp_timeout_seconds,
+            noop_after=settings.smtp_noop_after_seconds
+        )
+    
+    def _build_message(self, to: str, subject: str, html: str) -> EmailMessage:
+        msg = EmailMessage()
+        msg['Subject'] = subject
+        msg['From'] = self.smtp_user
+        msg['To'] = to
+        msg.set_content(html, subtype='html')
+        return msg
     
     async def send_email(self, to: str, subject: str, html: str) -> bool:
         try:
-            def _send_smtp():
-                import smtplib
-                from email.mime.text import MIMEText
-                from email.mime.multipart import MIMEMultipart
-                
-                msg = MIMEMultipart('alternative')
-                msg['Subject'] = subject
-                msg['From'] = self.smtp_user
-                msg['To'] = to
-                
-                html_part = MIMEText(html, 'html')
-                msg.attach(html_part)
-                
-                with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.smtp_user, self.smtp_pass)
-                    server.send_message(msg)
-            
-            # Run SMTP in thread pool to avoid blocking event loop
-            await asyncio.get_event_loop().run_in_executor(None, _send_smtp)
-            
+            await self.pool.send(self._build_message(to, subject, html))
             logger.info(f"📧 Email sent successfully to {to}")
             return True
         except Exception as e:
             logger.error(f"📧 Failed to send email to {to}: {str(e)}")
             return False
+    
+    def close(self) -> None:
+        self.pool.close()
+
+class TokenBucket:
+    """
+    Async token bucket: ``rate`` sends per second with bursts of ``capacity``.
+
+    Tokens are reserved synchronously (the balance may go negative) and the
+    caller sleeps off its debt, so no lock is needed on a single event loop.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _reserve(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
 
 class TwilioWhatsAppDriver(WhatsAppDriver):
-    def __init__(self):
+    """
+    Sends through the Twilio Messages REST API with one pooled, keep-alive
+    HTTP client per process, throttled to the sender's rate limit.
+    """
+
+    def __init__(self, api_base: Optional[str] = None):
         self.account_sid = settings.whatsapp_sid
         self.auth_token = settings.whatsapp_token
         self.from_number = settings.whatsapp_from
+        self.api_base = (api_base or settings.whatsapp_api_base).rstrip("/")
+        self.max_concurrency = settings.whatsapp_max_concurrency
+        self.throttle = TokenBucket(settings.whatsapp_rate_per_second, settings.whatsapp_burst)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        # httpx connection pools belong to one event loop
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                auth=(self.account_sid, self.auth_token),
+                timeout=settings.whatsapp_timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._client_loop = loop
+        return self._client
     
     async def send_whatsapp(self, to: str, text: str, media_urls: List[str] = None) -> bool:
+        await self.throttle.acquire()
         try:
-            def _send_twilio():
-                from twilio.rest import Client
-                
-                client = Client(self.account_sid, self.auth_token)
-                
-                message_params = {
-                    'from_': f'whatsapp:{self.from_number}',
-                    'to': f'whatsapp:{to}',
-                    'body': text
-                }
-                
-                if media_urls:
-                    message_params['media_url'] = media_urls
-                
-                message = client.messages.create(**message_params)
-                return message.sid
+            data = {
+                'From': f'whatsapp:{self.from_number}',
+                'To': f'whatsapp:{to}',
+                'Body': text
+            }
+            if media_urls:
+                data['MediaUrl'] = list(media_urls)
             
-            # Run Twilio in thread pool to avoid blocking event loop
-            message_sid = await asyncio.get_event_loop().run_in_executor(None, _send_twilio)
+            response = await self._get_client().post(
+                f"/2010-04-01/Accounts/{self.account_sid}/Messages.json", data=data
+            )
+            response.raise_for_status()
+            message_sid = response.json().get('sid')
             
             logger.info(f"📱 WhatsApp message sent successfully to {to}, SID: {message_sid}")
             return True
         except Exception as e:
             logger.error(f"📱 Failed to send WhatsApp message to {to}: {str(e)}")
             return False
+    
+    async def send_whatsapp_many(self, messages: List[Tuple[str, str, List[str]]]) -> List[bool]:
+        """Send (to, text, media_urls) messages with at most max_concurrency in flight."""
+        limit = asyncio.Semaphore(self.max_concurrency)
+        
+        async def _send(to: str, text: str, media_urls: List[str] = None) -> bool:
+            async with limit:
+                return await self.send_whatsapp(to, text, media_urls)
+        
+        return list(await asyncio.gather(*(_send(*message) for message in messages)))
+    
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 # Main notification service
 class NotificationService:
@@ -152,15 +347,60 @@ class NotificationService:
         env = getattr(settings, 'environment', 'development').lower()
         return env in ('production', 'prod')
     
+    @staticmethod
+    def _count(channel: str, driver, results: List[Optional[bool]]) -> None:
+        """Count send results by channel, driver and outcome (None means the driver raised)."""
+        name = type(driver).__name__.replace("EmailDriver", "").replace("WhatsAppDriver", "").lower()
+        for ok in results:
+            outcome = "error" if ok is None else "sent" if ok else "failed"
+            notifications_sent_total.inc(channel=channel, driver=name, outcome=outcome)
+    
     async def send_email(self, to: str, subject: str, html: str) -> bool:
         """Send email notification."""
-        return await self.email_driver.send_email(to, subject, html)
+        try:
+            ok = await self.email_driver.send_email(to, subject, html)
+        except Exception:
+            self._count("email", self.email_driver, [None])
+            raise
+        self._count("email", self.email_driver, [ok])
+        return ok
+    
+    async def send_email_many(self, messages: List[Tuple[str, str, str]]) -> List[bool]:
+        """Send a batch of (to, subject, html) emails over the driver's pooled sessions."""
+        try:
+            results = await self.email_driver.send_many(messages)
+        except Exception:
+            self._count("email", self.email_driver, [None] * len(messages))
+            raise
+        self._count("email", self.email_driver, results)
+        return results
     
     async def send_whatsapp(self, to: str, text: str, media_urls: List[str] = None) -> bool:
         """Send WhatsApp notification."""
         if media_urls is None:
             media_urls = []
-        return await self.whatsapp_driver.send_whatsapp(to, text, media_urls)
+        try:
+            ok = await self.whatsapp_driver.send_whatsapp(to, text, media_urls)
+        except Exception:
+            self._count("whatsapp", self.whatsapp_driver, [None])
+            raise
+        self._count("whatsapp", self.whatsapp_driver, [ok])
+        return ok
+    
+    async def send_whatsapp_many(self, messages: List[Tuple[str, str, List[str]]]) -> List[bool]:
+        """Send a batch of (to, text, media_urls) WhatsApp messages, throttled by the driver."""
+        try:
+            results = await self.whatsapp_driver.send_whatsapp_many(messages)
+        except Exception:
+            self._count("whatsapp", self.whatsapp_driver, [None] * len(messages))
+            raise
+        self._count("whatsapp", self.whatsapp_driver, results)
+        return results
+    
+    async def aclose(self) -> None:
+        """Release pooled driver connections (called on application shutdown)."""
+        self.email_driver.close()
+        await self.whatsapp_driver.aclose()
 
 # Singleton instance
-notify = NotificationService()
\ No newline at end of file
+notify = NotificationService()
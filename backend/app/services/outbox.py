@@ -0,0 +1,234 @@
+"""Transactional notification outbox.
+
+Handlers queue messages with ``enqueue_email`` / ``enqueue_whatsapp`` on
+their own session, so a message exists exactly when the change that caused
+it commits, and the request never waits on SMTP or Twilio. ``OutboxDispatcher``
+drains the table with retries, exponential backoff and dead-lettering. It
+runs inside the API process by default, or on its own:
+
+    python -m app.services.outbox run
+    python -m app.services.outbox requeue-dead
+"""
+import argparse
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..db.models import NotificationOutbox, OutboxStatus
+from ..db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_email(
+    db: AsyncSession,
+    to: str,
+    subject: str,
+    html: str,
+    entity: str = None,
+    entity_id: int = None
+) -> NotificationOutbox:
+    """Queue an email. Don't commit, let the calling function handle that."""
+    message = NotificationOutbox(
+        channel="email", recipient=to, subject=subject, body=html,
+        entity=entity, entity_id=entity_id,
+        status=OutboxStatus.PENDING.value, attempts=0, next_attempt_at=utcnow()
+    )
+    db.add(message)
+    return message
+
+
+def enqueue_whatsapp(
+    db: AsyncSession,
+    to: str,
+    text: str,
+    media_urls: List[str] = None,
+    entity: str = None,
+    entity_id: int = None
+) -> NotificationOutbox:
+    """Queue a WhatsApp message. Don't commit, let the calling function handle that."""
+    message = NotificationOutbox(
+        channel="whatsapp", recipient=to, body=text, media_urls=media_urls or [],
+        entity=entity, entity_id=entity_id,
+        status=OutboxStatus.PENDING.value, attempts=0, next_attempt_at=utcnow()
+    )
+    db.add(message)
+    return message
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds to wait after the ``attempts``-th failure: capped exponential with jitter."""
+    delay = min(
+        settings.outbox_backoff_max_seconds,
+        settings.outbox_backoff_base_seconds * (2 ** max(attempts - 1, 0))
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class OutboxDispatcher:
+    """Claims due outbox rows in batches and sends them through the notification service."""
+
+    def __init__(self, session_factory=None, sender=None):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self._sender = sender
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def sender(self):
+        if self._sender is None:
+            from .notify import notify
+            self._sender = notify
+        return self._sender
+
+    def wake(self) -> None:
+        """Skip the rest of the poll interval (call after committing new messages)."""
+        self._wakeup.set()
+
+    async def _claim(self, db: AsyncSession) -> List[NotificationOutbox]:
+        """
+        Lease a batch of due messages by pushing their next attempt past the
+        lease. A dispatcher that dies mid-send leaves them to be retried once
+        the lease expires; SKIP LOCKED keeps concurrent dispatchers apart.
+        """
+        now = utcnow()
+        result = await db.execute(
+            select(NotificationOutbox)
+            .where(NotificationOutbox.status == OutboxStatus.PENDING.value)
+            .where(NotificationOutbox.next_attempt_at <= now)
+            .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+            .limit(settings.outbox_batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        messages = list(result.scalars().all())
+        lease_until = now + timedelta(seconds=settings.outbox_lease_seconds)
+        for message in messages:
+            message.attempts += 1
+            message.next_attempt_at = lease_until
+        await db.commit()
+        return messages
+
+    async def _send(self, message: NotificationOutbox) -> Optional[str]:
+        """Send one message, returning None on success or an error description."""
+        try:
+            if message.channel == "email":
+                ok = await self.sender.send_email(message.recipient, message.subject or "", message.body)
+            elif message.channel == "whatsapp":
+                ok = await self.sender.send_whatsapp(message.recipient, message.body, message.media_urls or [])
+            else:
+                return f"Unknown channel {message.channel!r}"
+        except Exception as e:
+            return str(e) or e.__class__.__name__
+        return None if ok else "Driver reported failure"
+
+    async def dispatch_once(self) -> int:
+        """Send one batch of due messages. Returns how many were attempted."""
+        async with self.session_factory() as db:
+            messages = await self._claim(db)
+            if not messages:
+                return 0
+
+            errors = await asyncio.gather(*(self._send(message) for message in messages))
+
+            now = utcnow()
+            for message, error in zip(messages, errors):
+                if error is None:
+                    message.status = OutboxStatus.SENT.value
+                    message.sent_at = now
+                    message.last_error = None
+                elif message.attempts >= settings.outbox_max_attempts:
+                    message.status = OutboxStatus.DEAD.value
+                    message.last_error = error
+                    logger.error(
+                        f"Outbox message {message.id} ({message.channel} to {message.recipient}) "
+                        f"dead-lettered after {message.attempts} attempts: {error}"
+                    )
+                else:
+                    message.next_attempt_at = now + timedelta(seconds=backoff_delay(message.attempts))
+                    message.last_error = error
+                    logger.warning(f"Outbox message {message.id} attempt {message.attempts} failed: {error}")
+            await db.commit()
+            return len(messages)
+
+    async def run(self) -> None:
+        """Drain the outbox until stopped, polling when it is empty."""
+        self._stopping = False
+        while not self._stopping:
+            try:
+                attempted = await self.dispatch_once()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                attempted = 0
+            if attempted >= settings.outbox_batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.outbox_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> asyncio.Task:
+        """Run the dispatcher as a background task on the current loop."""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=settings.outbox_poll_interval_seconds + 5)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+            self._task = None
+
+
+outbox_dispatcher = OutboxDispatcher()
+
+
+async def requeue_dead(db: AsyncSession) -> int:
+    """Move dead-lettered messages back to pending with a fresh attempt budget."""
+    result = await db.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.status == OutboxStatus.DEAD.value)
+        .values(status=OutboxStatus.PENDING.value, attempts=0, next_attempt_at=utcnow())
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def _main(args) -> None:
+    from ..db.session import engine
+
+    if args.command == "run":
+        logger.info("Outbox dispatcher started")
+        try:
+            await outbox_dispatcher.run()
+        finally:
+            await engine.dispose()
+    elif args.command == "requeue-dead":
+        async with AsyncSessionLocal() as db:
+            count = await requeue_dead(db)
+        await engine.dispose()
+        print(f"Requeued {count} dead-lettered messages")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Notification outbox")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("run", help="Run the dispatcher as a standalone worker")
+    subparsers.add_parser("requeue-dead", help="Retry dead-lettered messages")
+    asyncio.run(_main(parser.parse_args()))
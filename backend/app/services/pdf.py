@@ -1,9 +1,20 @@
 """PDF generation service."""
+import argparse
+import asyncio
+import hashlib
 import io
+import json
+import mimetypes
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
 import os
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
 
 # Import settings
 try:
@@ -12,8 +23,15 @@ except ImportError:
     # Fallback if settings not available
     class Settings:
         storage_dir = "./storage"
+        pdf_render_workers = 0
+        pdf_render_timeout_seconds = 30.0
+        pdf_render_max_queued = 16
+        pdf_cache_grace_seconds = 300.0
     settings = Settings()
 
+from ..core.metrics import registry, pdf_render_duration_seconds
+from ..db.models import Invoice
+
 from reportlab.lib.pagesizes import A4, letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_RIGHT, TA_LEFT, TA_CENTER
@@ -23,6 +41,7 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib import colors
+from sqlalchemy import select
 
 # Import Arabic text processing
 try:
@@ -33,66 +52,72 @@ except ImportError:
     ARABIC_SUPPORT = False
 
 
-class PDFService:
-    def __init__(self):
-        """Initialize PDF service with Arabic font support."""
-        self.setup_arabic_fonts()
-        
-    def setup_arabic_fonts(self):
-        """Setup Arabic fonts for PDF generation."""
+# Font registration and stylesheets are process-wide: TTF parsing and
+# getSampleStyleSheet() cost more than laying out a typical invoice.
+FONT_PATHS = [
+    ('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'),
+    ('/System/Library/Fonts/Arial.ttf', '/System/Library/Fonts/Arial Bold.ttf'),  # macOS
+    ('C:\\Windows\\Fonts\\arial.ttf', 'C:\\Windows\\Fonts\\arialbd.ttf'),  # Windows
+    ('/usr/share/fonts/TTF/DejaVuSans.ttf', '/usr/share/fonts/TTF/DejaVuSans-Bold.ttf'),  # Some Linux
+]
+
+_setup_lock = threading.Lock()
+_fonts_ready = False
+_arabic_font = 'Helvetica'
+_arabic_bold_font = 'Helvetica-Bold'
+_styles = None
+_shared_service = None
+
+
+def setup_arabic_fonts():
+    """Register the Arabic fonts once per process and return (regular, bold) font names."""
+    global _fonts_ready, _arabic_font, _arabic_bold_font
+    if _fonts_ready:
+        return _arabic_font, _arabic_bold_font
+
+    with _setup_lock:
+        if _fonts_ready:
+            return _arabic_font, _arabic_bold_font
         try:
-            # Try to register a system Arabic font
-            # You may need to adjust the path based on your system
-            font_paths = [
-                '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-                '/System/Library/Fonts/Arial.ttf',  # macOS
-                'C:\\Windows\\Fonts\\arial.ttf',  # Windows
-                '/usr/share/fonts/TTF/DejaVuSans.ttf',  # Some Linux
-            ]
-            
-            for font_path in font_paths:
+            for font_path, bold_path in FONT_PATHS:
                 if os.path.exists(font_path):
                     pdfmetrics.registerFont(TTFont('Arabic', font_path))
+                    _arabic_font = _arabic_bold_font = 'Arabic'
+                    if os.path.exists(bold_path):
+                        pdfmetrics.registerFont(TTFont('Arabic-Bold', bold_path))
+                        _arabic_bold_font = 'Arabic-Bold'
                     break
             else:
                 # Fallback to default font
                 print("Warning: No Arabic font found, using default font")
         except Exception as e:
             print(f"Warning: Could not register Arabic font: {e}")
-    
-    def process_arabic_text(self, text: str) -> str:
-        """Process Arabic text for proper RTL display."""
-        if not ARABIC_SUPPORT or not text:
-            return text
-        
-        try:
-            # Import modules locally to avoid unbound issues
-            import arabic_reshaper
-            from bidi.algorithm import get_display
-            
-            # Reshape Arabic text and apply bidi algorithm
-            reshaped_text = arabic_reshaper.reshape(text)
-            bidi_text = get_display(reshaped_text)
-            # Ensure we return a string
-            return str(bidi_text) if bidi_text else text
-        except Exception as e:
-            print(f"Warning: Arabic text processing failed: {e}")
-            return text
-    
-    def get_styles(self):
-        """Get paragraph styles for PDF."""
+        _fonts_ready = True
+    return _arabic_font, _arabic_bold_font
+
+
+def get_styles():
+    """Get the shared paragraph styles for PDFs. Treat the result as read-only."""
+    global _styles
+    if _styles is not None:
+        return _styles
+
+    arabic_font, _ = setup_arabic_fonts()
+    with _setup_lock:
+        if _styles is not None:
+            return _styles
         styles = getSampleStyleSheet()
-        
+
         # Arabic RTL style
         styles.add(ParagraphStyle(
             name='ArabicRTL',
             parent=styles['Normal'],
-            fontName='Arabic' if 'Arabic' in pdfmetrics.getRegisteredFontNames() else 'Helvetica',
+            fontName=arabic_font,
             fontSize=12,
             alignment=TA_RIGHT,
             wordWrap='LTR'
         ))
-        
+
         # Header style
         styles.add(ParagraphStyle(
             name='Header',
@@ -102,7 +127,15 @@ class PDFService:
             alignment=TA_CENTER,
             spaceAfter=20
         ))
-        
+
+        # Header style with Arabic font
+        styles.add(ParagraphStyle(
+            name='ArabicHeader',
+            parent=styles['Header'],
+            fontName=arabic_font,
+            alignment=TA_CENTER
+        ))
+
         # Invoice details style
         styles.add(ParagraphStyle(
             name='InvoiceDetails',
@@ -110,11 +143,226 @@ class PDFService:
             fontSize=10,
             alignment=TA_LEFT
         ))
+
+        _styles = styles
+    return _styles
+
+
+def reset_pdf_caches():
+    """Forget cached fonts, styles and the shared service (for tests and benchmarks)."""
+    global _fonts_ready, _arabic_font, _arabic_bold_font, _styles, _shared_service
+    with _setup_lock:
+        _fonts_ready = False
+        _arabic_font = 'Helvetica'
+        _arabic_bold_font = 'Helvetica-Bold'
+        _styles = None
+        _shared_service = None
+
+
+def get_pdf_service() -> "PDFService":
+    """Return the process-wide PDF renderer, creating it on first use."""
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = PDFService()
+    return _shared_service
+
+
+# Photos are drawn 2 inches wide; a JPEG rendition of this width keeps them
+# sharp in print without embedding multi-megabyte originals.
+PHOTO_RENDITION_WIDTH = 480
+
+
+def _photo_path(media) -> str:
+    renditions = getattr(media, 'renditions', None) or []
+    candidates = sorted((r for r in renditions if r.format == 'jpeg'), key=lambda r: r.width)
+    for rendition in candidates:
+        if rendition.width >= PHOTO_RENDITION_WIDTH:
+            return rendition.path
+    return media.path
+
+
+def invoice_snapshot(invoice) -> dict:
+    """
+    Copy what the invoice PDF needs into plain picklable data.
+
+    The invoice must have its work order, customer, vehicle, items and media
+    (with renditions) loaded; the snapshot can then be rendered in another
+    process.
+    """
+    work_order = getattr(invoice, 'work_order', None)
+    customer = getattr(work_order, 'customer', None) if work_order else None
+    vehicle = getattr(work_order, 'vehicle', None) if work_order else None
+    items = getattr(work_order, 'items', None) if work_order else None
+    media = (getattr(work_order, 'media', None) if work_order else None) or []
+    return {
+        'id': invoice.id,
+        'created_at': invoice.created_at,
+        'work_order_id': invoice.work_order_id,
+        'customer': {'name': customer.name, 'phone': customer.phone} if customer else None,
+        'vehicle': {'make': vehicle.make, 'model': vehicle.model, 'plate_no': vehicle.plate_no} if vehicle else None,
+        'items': [
+            {'name': item.name, 'qty': item.qty, 'unit_price': item.unit_price}
+            for item in items
+        ] if items is not None else None,
+        'photos': [
+            _photo_path(m) for m in media
+            if (m.mime or mimetypes.guess_type(m.path)[0] or '').startswith('image/')
+        ],
+        'subtotal': invoice.subtotal,
+        'discount': invoice.discount,
+        'tax': invoice.tax,
+        'total': invoice.total,
+        'paid': invoice.paid,
+    }
+
+
+# Bump when the invoice layout changes so cached PDFs are re-rendered.
+INVOICE_TEMPLATE_VERSION = 1
+
+
+def invoice_pdf_digest(snapshot: dict) -> str:
+    """Content hash of everything that affects the rendered invoice."""
+    payload = json.dumps(
+        {'template': INVOICE_TEMPLATE_VERSION, 'invoice': snapshot},
+        sort_keys=True, default=str, separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def invoice_pdf_path(invoice_id: int, digest: str) -> str:
+    """Storage-relative path of a cached invoice PDF."""
+    return f"invoices/{invoice_id}/{digest}.pdf"
+
+
+def _write_file_atomic(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+async def store_invoice_pdf(relative_path: str, content: bytes) -> str:
+    """Write a rendered invoice under storage_dir and return its absolute path."""
+    path = os.path.join(settings.storage_dir, relative_path)
+    await asyncio.to_thread(_write_file_atomic, path, content)
+    return path
+
+
+async def discard_invoice_pdf(relative_path: Optional[str]) -> None:
+    """Remove a cached PDF no request was given, ignoring files that are already gone."""
+    if not relative_path:
+        return
+    try:
+        await asyncio.to_thread(os.remove, os.path.join(settings.storage_dir, relative_path))
+    except FileNotFoundError:
+        pass
+
+
+async def retire_invoice_pdf(relative_path: Optional[str]) -> None:
+    """
+    Mark a superseded cached PDF for the sweep. Requests may still be
+    streaming it, so it is only stamped with the time it was replaced and
+    removed once ``pdf_cache_grace_seconds`` have passed.
+    """
+    if not relative_path:
+        return
+    try:
+        await asyncio.to_thread(os.utime, os.path.join(settings.storage_dir, relative_path))
+    except FileNotFoundError:
+        pass
+
+
+def _sweep_invoice_dir(directory: str, keep: Optional[str], cutoff: float) -> int:
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(directory, name)
+        if not name.endswith(".pdf") or path == keep:
+            continue
+        try:
+            if os.path.getmtime(path) <= cutoff:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+async def sweep_invoice_pdfs(db, invoice_id: Optional[int] = None, grace_seconds: Optional[float] = None) -> int:
+    """
+    Remove cached PDFs that are not their invoice's current ``pdf_path`` and
+    have not been touched for ``grace_seconds`` (default
+    ``settings.pdf_cache_grace_seconds``); returns how many were removed.
+    Sweeps one invoice's directory, or every invoice's with no ``invoice_id``.
+    """
+    if grace_seconds is None:
+        grace_seconds = settings.pdf_cache_grace_seconds
+    root = os.path.join(settings.storage_dir, "invoices")
+    query = select(Invoice.id, Invoice.pdf_path)
+    if invoice_id is not None:
+        query = query.where(Invoice.id == invoice_id)
+        names = [str(invoice_id)]
+    else:
+        names = await asyncio.to_thread(lambda: os.listdir(root) if os.path.isdir(root) else [])
+    stored = {row.id: row.pdf_path for row in (await db.execute(query)).all()}
+    cutoff = time.time() - grace_seconds
+
+    def sweep() -> int:
+        removed = 0
+        for name in names:
+            if not name.isdigit():
+                continue
+            keep = stored.get(int(name))
+            removed += _sweep_invoice_dir(
+                os.path.join(root, name), os.path.join(settings.storage_dir, keep) if keep else None, cutoff
+            )
+        return removed
+
+    return await asyncio.to_thread(sweep)
+
+
+class PDFService:
+    def __init__(self):
+        """Initialize PDF service with Arabic font support."""
+        self.arabic_font, self.arabic_bold_font = setup_arabic_fonts()
+
+    def setup_arabic_fonts(self):
+        """Setup Arabic fonts for PDF generation."""
+        self.arabic_font, self.arabic_bold_font = setup_arabic_fonts()
+    
+    def process_arabic_text(self, text: str) -> str:
+        """Process Arabic text for proper RTL display."""
+        if not ARABIC_SUPPORT or not text:
+            return text
         
-        return styles
+        try:
+            # Import modules locally to avoid unbound issues
+            import arabic_reshaper
+            from bidi.algorithm import get_display
+            
+            # Reshape Arabic text and apply bidi algorithm
+            reshaped_text = arabic_reshaper.reshape(text)
+            bidi_text = get_display(reshaped_text)
+            # Ensure we return a string
+            return str(bidi_text) if bidi_text else text
+        except Exception as e:
+            print(f"Warning: Arabic text processing failed: {e}")
+            return text
+    
+    def get_styles(self):
+        """Get paragraph styles for PDF."""
+        return get_styles()
     
     async def generate_invoice_pdf(self, invoice) -> bytes:
-        """Generate PDF for invoice with Arabic support."""
+        """Generate PDF for invoice with Arabic support (renders on the calling thread)."""
+        return self.build_invoice_pdf(invoice_snapshot(invoice))
+
+    def build_invoice_pdf(self, snapshot: dict) -> bytes:
+        """Render an invoice snapshot (see ``invoice_snapshot``) to PDF bytes."""
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72,
                               topMargin=72, bottomMargin=18)
@@ -125,40 +373,37 @@ class PDFService:
         
         # Header with Arabic font
         header_text = "Yemen Hybrid Service Center\nفاتورة خدمة"
-        arabic_header_style = ParagraphStyle(
-            name='ArabicHeader',
-            parent=styles['Header'],
-            fontName='Arabic' if 'Arabic' in pdfmetrics.getRegisteredFontNames() else 'Helvetica',
-            alignment=TA_CENTER
-        )
-        story.append(Paragraph(self.process_arabic_text(header_text), arabic_header_style))
+        story.append(Paragraph(self.process_arabic_text(header_text), styles['ArabicHeader']))
         story.append(Spacer(1, 20))
         
         # Invoice information
+        invoice_id = str(snapshot['id'])
+        invoice_date = snapshot['created_at'].strftime('%Y-%m-%d') if snapshot['created_at'] else ''
+        work_order_id = str(snapshot['work_order_id'])
         invoice_info = [
-            ['Invoice ID:', str(invoice.id), 'رقم الفاتورة:', str(invoice.id)],
-            ['Date:', invoice.created_at.strftime('%Y-%m-%d'), 'التاريخ:', invoice.created_at.strftime('%Y-%m-%d')],
-            ['Work Order:', str(invoice.work_order_id), 'أمر العمل:', str(invoice.work_order_id)]
+            ['Invoice ID:', invoice_id, 'رقم الفاتورة:', invoice_id],
+            ['Date:', invoice_date, 'التاريخ:', invoice_date],
+            ['Work Order:', work_order_id, 'أمر العمل:', work_order_id]
         ]
         
-        if hasattr(invoice, 'work_order') and invoice.work_order:
-            if hasattr(invoice.work_order, 'customer') and invoice.work_order.customer:
-                customer = invoice.work_order.customer
-                invoice_info.extend([
-                    ['Customer:', customer.name, 'العميل:', self.process_arabic_text(customer.name)],
-                    ['Phone:', customer.phone or '', 'الهاتف:', customer.phone or ''],
-                ])
-            
-            if hasattr(invoice.work_order, 'vehicle') and invoice.work_order.vehicle:
-                vehicle = invoice.work_order.vehicle
-                invoice_info.extend([
-                    ['Vehicle:', f"{vehicle.make} {vehicle.model}", 'المركبة:', self.process_arabic_text(f"{vehicle.make} {vehicle.model}")],
-                    ['Plate:', vehicle.plate_number or '', 'اللوحة:', vehicle.plate_number or '']
-                ])
+        customer = snapshot['customer']
+        if customer:
+            invoice_info.extend([
+                ['Customer:', customer['name'], 'العميل:', self.process_arabic_text(customer['name'])],
+                ['Phone:', customer['phone'] or '', 'الهاتف:', customer['phone'] or ''],
+            ])
+        
+        vehicle = snapshot['vehicle']
+        if vehicle:
+            vehicle_name = f"{vehicle['make']} {vehicle['model']}"
+            invoice_info.extend([
+                ['Vehicle:', vehicle_name, 'المركبة:', self.process_arabic_text(vehicle_name)],
+                ['Plate:', vehicle['plate_no'] or '', 'اللوحة:', vehicle['plate_no'] or '']
+            ])
         
         # Create table for invoice info with Arabic font
         info_table = Table(invoice_info, colWidths=[2*cm, 4*cm, 2*cm, 4*cm])
-        arabic_font = 'Arabic' if 'Arabic' in pdfmetrics.getRegisteredFontNames() else 'Helvetica'
+        arabic_font = self.arabic_font
         info_table.setStyle(TableStyle([
             ('FONTNAME', (0, 0), (1, -1), 'Helvetica'),  # English columns
             ('FONTNAME', (2, 0), (3, -1), arabic_font),   # Arabic columns
@@ -172,22 +417,21 @@ class PDFService:
         story.append(Spacer(1, 20))
         
         # Work order items table
-        if hasattr(invoice, 'work_order') and invoice.work_order and hasattr(invoice.work_order, 'items'):
+        if snapshot['items'] is not None:
             items_data = [['Item / البند', 'Qty / الكمية', 'Unit Price / سعر الوحدة', 'Total / المجموع']]
             
-            for item in invoice.work_order.items:
-                item_total = item.qty * item.unit_price
+            for item in snapshot['items']:
+                item_total = item['qty'] * item['unit_price']
                 items_data.append([
-                    self.process_arabic_text(item.name),
-                    str(item.qty),
-                    f"{item.unit_price:.2f}",
+                    self.process_arabic_text(item['name']),
+                    str(item['qty']),
+                    f"{item['unit_price']:.2f}",
                     f"{item_total:.2f}"
                 ])
             
             items_table = Table(items_data, colWidths=[6*cm, 2*cm, 3*cm, 3*cm])
-            arabic_font = 'Arabic' if 'Arabic' in pdfmetrics.getRegisteredFontNames() else 'Helvetica'
             items_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (-1, 0), arabic_font + '-Bold' if arabic_font == 'Arabic' else 'Helvetica-Bold'),
+                ('FONTNAME', (0, 0), (-1, 0), self.arabic_bold_font),
                 ('FONTNAME', (0, 1), (-1, -1), arabic_font),
                 ('FONTSIZE', (0, 0), (-1, -1), 10),
                 ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
@@ -202,13 +446,15 @@ class PDFService:
             story.append(Spacer(1, 20))
         
         # Financial summary
+        total = snapshot['total']
+        paid = snapshot['paid'] or Decimal('0.00')
         financial_data = [
-            ['Subtotal / المجموع الفرعي:', f"{invoice.subtotal:.2f}"],
-            ['Discount / الخصم:', f"{invoice.discount:.2f}" if invoice.discount else "0.00"],
-            ['Tax / الضريبة:', f"{invoice.tax:.2f}" if invoice.tax else "0.00"],
-            ['Total / المجموع الإجمالي:', f"{invoice.total:.2f}"],
-            ['Paid / المدفوع:', f"{invoice.paid:.2f}" if invoice.paid else "0.00"],
-            ['Balance / الرصيد:', f"{(invoice.total - (invoice.paid or Decimal('0.00'))):.2f}"]
+            ['Subtotal / المجموع الفرعي:', f"{snapshot['subtotal']:.2f}"],
+            ['Discount / الخصم:', f"{snapshot['discount']:.2f}" if snapshot['discount'] else "0.00"],
+            ['Tax / الضريبة:', f"{snapshot['tax']:.2f}" if snapshot['tax'] else "0.00"],
+            ['Total / المجموع الإجمالي:', f"{total:.2f}"],
+            ['Paid / المدفوع:', f"{paid:.2f}"],
+            ['Balance / الرصيد:', f"{(total - paid):.2f}"]
         ]
         
         financial_table = Table(financial_data, colWidths=[8*cm, 4*cm])
@@ -236,44 +482,43 @@ class PDFService:
             print(f"Warning: Could not load workshop logo: {e}")
         
         # Add after-photos if available with proper image thumbnails
-        if hasattr(invoice, 'work_order') and invoice.work_order and hasattr(invoice.work_order, 'media'):
-            media_files = [m for m in invoice.work_order.media if m.file_type == 'image']
-            if media_files:
-                story.append(Paragraph(self.process_arabic_text("Service Photos / صور الخدمة"), styles['ArabicRTL']))
-                
-                # Create thumbnails table
-                thumbnail_data = []
-                for i in range(0, len(media_files[:4]), 2):  # Process 2 images per row
-                    row = []
-                    for j in range(2):
-                        if i + j < len(media_files):
-                            media = media_files[i + j]
-                            try:
-                                # Attempt to load and resize image
-                                storage_dir = getattr(settings, 'storage_dir', './storage')
-                                img_path = os.path.join(storage_dir, media.file_path)
-                                if os.path.exists(img_path):
-                                    thumbnail = Image(img_path, width=2*inch, height=1.5*inch)
-                                    row.append(thumbnail)
-                                else:
-                                    row.append(Paragraph(f"Image: {media.file_path}", styles['Normal']))
-                            except Exception as e:
-                                print(f"Warning: Could not load image {media.file_path}: {e}")
-                                row.append(Paragraph(f"Image: {media.file_path}", styles['Normal']))
-                        else:
-                            row.append("")
-                    if row:
-                        thumbnail_data.append(row)
-                
-                if thumbnail_data:
-                    thumbnail_table = Table(thumbnail_data, colWidths=[6*cm, 6*cm])
-                    thumbnail_table.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ]))
-                    story.append(thumbnail_table)
-                    story.append(Spacer(1, 20))
+        media_files = snapshot['photos']
+        if media_files:
+            story.append(Paragraph(self.process_arabic_text("Service Photos / صور الخدمة"), styles['ArabicRTL']))
+            
+            # Create thumbnails table
+            thumbnail_data = []
+            for i in range(0, len(media_files[:4]), 2):  # Process 2 images per row
+                row = []
+                for j in range(2):
+                    if i + j < len(media_files):
+                        media_path = media_files[i + j]
+                        try:
+                            # Attempt to load and resize image
+                            storage_dir = getattr(settings, 'storage_dir', './storage')
+                            img_path = os.path.join(storage_dir, media_path)
+                            if os.path.exists(img_path):
+                                thumbnail = Image(img_path, width=2*inch, height=1.5*inch)
+                                row.append(thumbnail)
+                            else:
+                                row.append(Paragraph(f"Image: {media_path}", styles['Normal']))
+                        except Exception as e:
+                            print(f"Warning: Could not load image {media_path}: {e}")
+                            row.append(Paragraph(f"Image: {media_path}", styles['Normal']))
+                    else:
+                        row.append("")
+                if row:
+                    thumbnail_data.append(row)
+            
+            if thumbnail_data:
+                thumbnail_table = Table(thumbnail_data, colWidths=[6*cm, 6*cm])
+                thumbnail_table.setStyle(TableStyle([
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ]))
+                story.append(thumbnail_table)
+                story.append(Spacer(1, 20))
         
         # Footer
         story.append(Spacer(1, 50))
@@ -303,4 +548,158 @@ class PDFService:
         
         doc.build(story)
         buffer.seek(0)
-        return buffer.getvalue()
\ No newline at end of file
+        return buffer.getvalue()
+
+
+# Invoice rendering is CPU-bound (layout, Arabic shaping, image embedding), so
+# it runs in a process pool and only the snapshot and PDF bytes cross the
+# boundary. With pdf_render_workers = 0 it runs on a thread instead.
+_render_executor: Optional[ProcessPoolExecutor] = None
+_render_in_flight = 0
+_render_timeouts = 0
+_render_rejected = 0
+_render_recycles = 0
+
+
+class RenderQueueFull(Exception):
+    """More invoice renders are waiting than ``pdf_render_max_queued`` allows."""
+
+
+def _warm_render_worker() -> None:
+    """Register fonts and build styles when a pool process starts."""
+    get_pdf_service()
+
+
+def _render_invoice_in_worker(snapshot: dict) -> bytes:
+    return get_pdf_service().build_invoice_pdf(snapshot)
+
+
+def _get_render_executor() -> ProcessPoolExecutor:
+    global _render_executor
+    if _render_executor is None:
+        # spawn: forking a process that already runs event-loop and driver
+        # threads can deadlock the child
+        _render_executor = ProcessPoolExecutor(
+            max_workers=settings.pdf_render_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_render_worker
+        )
+    return _render_executor
+
+
+def _recycle_render_executor(executor: ProcessPoolExecutor) -> None:
+    """
+    Replace the pool and kill its processes, one of which is stuck on an
+    abandoned render. Other renders on it fail with BrokenProcessPool and are
+    resubmitted to the new pool by render_invoice_pdf.
+    """
+    global _render_executor, _render_recycles
+    if _render_executor is executor:
+        _render_executor = None
+        _render_recycles += 1
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False)
+    for process in processes:
+        process.terminate()
+
+
+async def render_invoice_pdf(snapshot: dict, timeout: Optional[float] = None) -> bytes:
+    """
+    Render an invoice snapshot off the event loop.
+
+    Raises asyncio.TimeoutError when rendering takes longer than ``timeout``
+    (default ``settings.pdf_render_timeout_seconds``); a worker still busy
+    with the render is terminated and the pool replaced, so abandoned renders
+    cannot pile up and starve later ones. On the thread fallback the render
+    cannot be stopped and finishes in the background. Raises RenderQueueFull
+    instead of queueing when ``settings.pdf_render_max_queued`` renders are
+    already waiting for a worker.
+    """
+    global _render_in_flight, _render_timeouts, _render_rejected
+    if timeout is None:
+        timeout = settings.pdf_render_timeout_seconds
+    if render_queue_depth() >= settings.pdf_render_max_queued:
+        _render_rejected += 1
+        pdf_render_duration_seconds.observe(0, outcome="rejected")
+        raise RenderQueueFull()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    _render_in_flight += 1
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        while True:
+            if settings.pdf_render_workers > 0:
+                executor = _get_render_executor()
+                job = executor.submit(_render_invoice_in_worker, snapshot)
+                future = asyncio.wrap_future(job)
+            else:
+                executor = job = None
+                future = loop.run_in_executor(None, _render_invoice_in_worker, snapshot)
+            try:
+                pdf = await asyncio.wait_for(future, timeout=max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                _render_timeouts += 1
+                outcome = "timeout"
+                # A render that never left the queue holds no worker
+                if job is not None and not job.cancel():
+                    _recycle_render_executor(executor)
+                raise
+            except BrokenProcessPool:
+                if executor is _render_executor:
+                    # A worker died on its own: start over with a fresh pool next time
+                    _recycle_render_executor(executor)
+                    raise
+                # Recycled by another render's timeout: resubmit to the new pool
+                continue
+            outcome = "ok"
+            return pdf
+    finally:
+        _render_in_flight -= 1
+        pdf_render_duration_seconds.observe(time.perf_counter() - start, outcome=outcome)
+
+
+def render_queue_depth() -> int:
+    """Number of invoice renders waiting for a free worker."""
+    return max(0, _render_in_flight - max(settings.pdf_render_workers, 1))
+
+
+def render_stats() -> dict:
+    """PDF render pool gauges."""
+    return {
+        "workers": settings.pdf_render_workers,
+        "in_flight": _render_in_flight,
+        "queued": render_queue_depth(),
+        "timeouts": _render_timeouts,
+        "rejected": _render_rejected,
+        "recycles": _render_recycles,
+    }
+
+
+registry.gauge("pdf_render_in_flight", "Invoice PDF renders running or queued.", lambda: _render_in_flight)
+registry.gauge("pdf_render_queued", "Invoice PDF renders waiting for a free worker.", render_queue_depth)
+
+
+def shutdown_render_executor() -> None:
+    """Stop the render pool (called on application shutdown)."""
+    global _render_executor
+    if _render_executor is not None:
+        _render_executor.shutdown(wait=False, cancel_futures=True)
+        _render_executor = None
+
+
+async def _main(args) -> None:
+    from ..db.session import AsyncSessionLocal, engine
+
+    async with AsyncSessionLocal() as db:
+        removed = await sweep_invoice_pdfs(db, grace_seconds=args.grace)
+    await engine.dispose()
+    print(f"Removed {removed} superseded invoice PDFs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Invoice PDF cache maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sweep = subparsers.add_parser("sweep", help="Remove cached PDFs that are no longer an invoice's current file")
+    sweep.add_argument("--grace", type=float, default=None, help="Seconds a superseded file is kept (default: setting)")
+    asyncio.run(_main(parser.parse_args()))
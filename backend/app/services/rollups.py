@@ -0,0 +1,331 @@
+"""Daily KPI rollup maintenance.
+
+Rollup rows are adjusted incrementally by mapper events on the same
+connection (and therefore transaction) as the write that caused them.
+``update_returning`` writes are covered by ``on_update`` hooks. Other
+writes that bypass the ORM, such as DB-level cascades or bulk UPDATEs,
+are not seen; run the rebuild command to resynchronise:
+
+    python -m app.services.rollups rebuild [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import event, inspect, literal_column, select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.models import (
+    WorkOrder, WorkOrderStatus, WorkOrderService, Invoice, Payment,
+    DailyWorkOrderStatus, DailyRevenue, DailyServiceUsage
+)
+from ..db.writes import on_update
+
+logger = logging.getLogger(__name__)
+
+
+def utc_today() -> date:
+    """The current rollup day; rollups are bucketed by UTC date."""
+    return datetime.now(timezone.utc).date()
+
+
+def start_of_day(day: date) -> datetime:
+    """The start of a rollup day, as an aware UTC timestamp."""
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def utc_date(value, dialect: str):
+    """SQL expression for the UTC date of a timestamp expression."""
+    if dialect == "postgresql":
+        # A literal, so GROUP BY matches the selected expression
+        return func.date(func.timezone(literal_column("'UTC'"), value))
+    # SQLite keeps timestamps as naive UTC (its now() is UTC)
+    return func.date(value)
+
+
+def _today(connection):
+    # Rows inserted now get their timestamp from the database's now(), so
+    # bucket them by the UTC date of that same clock.
+    return utc_date(func.now(), connection.dialect.name)
+
+
+def _insert_day(connection, target, column):
+    """
+    The rollup day of a new row: the UTC date of the timestamp it was given
+    (imports, seeds), or of the database's now() when the server default
+    filled it.
+    """
+    value = inspect(target).dict.get(column.key)
+    return _as_day(value) if value is not None else _today(connection)
+
+
+def _as_day(value) -> Optional[date]:
+    """The UTC date of a loaded timestamp; naive values are taken as UTC."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
+
+
+def _loaded_or_fetch(connection, target, column):
+    """Read an attribute without triggering a lazy load mid-flush."""
+    state = inspect(target)
+    if column.key in state.dict:
+        return state.dict[column.key]
+    table = column.class_
+    return connection.execute(select(column).where(table.id == target.id)).scalar()
+
+
+def _upsert(connection, model, keys: dict, deltas: dict) -> None:
+    """Add ``deltas`` to the rollup row identified by ``keys``, creating it if needed."""
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(model).values(**keys, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: getattr(model, name) + getattr(stmt.excluded, name) for name in deltas}
+        )
+        connection.execute(stmt)
+        return
+
+    where = [getattr(model, name) == value for name, value in keys.items()]
+    result = connection.execute(
+        update(model).where(*where).values(
+            **{name: getattr(model, name) + value for name, value in deltas.items()}
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(model.__table__.insert().values(**keys, **deltas))
+
+
+def _bump_status(connection, day, status, delta: int) -> None:
+    if day is None or status is None:
+        return
+    status_value = status.value if isinstance(status, WorkOrderStatus) else status
+    _upsert(connection, DailyWorkOrderStatus, {"day": day, "status": status_value}, {"count": delta})
+
+
+def _bump_revenue(connection, day, invoiced=Decimal("0"), invoice_count: int = 0, collected=Decimal("0")) -> None:
+    if day is None:
+        return
+    _upsert(
+        connection, DailyRevenue, {"day": day},
+        {"invoiced": invoiced or Decimal("0"), "invoice_count": invoice_count, "collected": collected or Decimal("0")}
+    )
+
+
+def _bump_service(connection, work_order_id: int, service_id: int, delta: int) -> None:
+    # The rollup day is the parent work order's creation day
+    created_at = connection.execute(
+        select(WorkOrder.created_at).where(WorkOrder.id == work_order_id)
+    ).scalar()
+    day = _as_day(created_at)
+    if day is None:
+        return
+    _upsert(connection, DailyServiceUsage, {"day": day, "service_id": service_id}, {"count": delta})
+
+
+# Work orders
+
+@event.listens_for(WorkOrder, "after_insert")
+def _work_order_inserted(mapper, connection, target):
+    status = inspect(target).dict.get("status") or WorkOrderStatus.NEW
+    _bump_status(connection, _insert_day(connection, target, WorkOrder.created_at), status, 1)
+
+
+@event.listens_for(WorkOrder, "after_update")
+def _work_order_updated(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if not history.has_changes() or not history.deleted:
+        return
+    day = _as_day(_loaded_or_fetch(connection, target, WorkOrder.created_at))
+    _bump_status(connection, day, history.deleted[0], -1)
+    _bump_status(connection, day, target.status, 1)
+
+
+@on_update(WorkOrder, "status")
+def _work_order_status_written(connection, old, new):
+    # Status changes made with update_returning (the workorders endpoints)
+    if old.status == new.status:
+        return
+    day = _as_day(new.created_at)
+    _bump_status(connection, day, old.status, -1)
+    _bump_status(connection, day, new.status, 1)
+
+
+@event.listens_for(WorkOrder, "before_delete")
+def _work_order_deleted(mapper, connection, target):
+    day = _as_day(_loaded_or_fetch(connection, target, WorkOrder.created_at))
+    _bump_status(connection, day, _loaded_or_fetch(connection, target, WorkOrder.status), -1)
+
+
+@event.listens_for(WorkOrderService, "after_insert")
+def _work_order_service_inserted(mapper, connection, target):
+    _bump_service(connection, target.work_order_id, target.service_id, 1)
+
+
+@event.listens_for(WorkOrderService, "before_delete")
+def _work_order_service_deleted(mapper, connection, target):
+    _bump_service(connection, target.work_order_id, target.service_id, -1)
+
+
+# Invoices and payments
+
+@event.listens_for(Invoice, "after_insert")
+def _invoice_inserted(mapper, connection, target):
+    day = _insert_day(connection, target, Invoice.created_at)
+    _bump_revenue(connection, day, invoiced=inspect(target).dict.get("total"), invoice_count=1)
+
+
+@event.listens_for(Invoice, "after_update")
+def _invoice_updated(mapper, connection, target):
+    history = inspect(target).attrs.total.history
+    if not history.has_changes() or not history.deleted:
+        return
+    delta = (target.total or Decimal("0")) - (history.deleted[0] or Decimal("0"))
+    day = _as_day(_loaded_or_fetch(connection, target, Invoice.created_at))
+    _bump_revenue(connection, day, invoiced=delta)
+
+
+@event.listens_for(Invoice, "before_delete")
+def _invoice_deleted(mapper, connection, target):
+    day = _as_day(_loaded_or_fetch(connection, target, Invoice.created_at))
+    total = _loaded_or_fetch(connection, target, Invoice.total) or Decimal("0")
+    _bump_revenue(connection, day, invoiced=-total, invoice_count=-1)
+
+
+@event.listens_for(Payment, "after_insert")
+def _payment_inserted(mapper, connection, target):
+    day = _insert_day(connection, target, Payment.paid_at)
+    _bump_revenue(connection, day, collected=inspect(target).dict.get("amount"))
+
+
+@event.listens_for(Payment, "after_update")
+def _payment_updated(mapper, connection, target):
+    history = inspect(target).attrs.amount.history
+    if not history.has_changes() or not history.deleted:
+        return
+    delta = (target.amount or Decimal("0")) - (history.deleted[0] or Decimal("0"))
+    day = _as_day(_loaded_or_fetch(connection, target, Payment.paid_at))
+    _bump_revenue(connection, day, collected=delta)
+
+
+@event.listens_for(Payment, "before_delete")
+def _payment_deleted(mapper, connection, target):
+    day = _as_day(_loaded_or_fetch(connection, target, Payment.paid_at))
+    amount = _loaded_or_fetch(connection, target, Payment.amount) or Decimal("0")
+    _bump_revenue(connection, day, collected=-amount)
+
+
+# Rebuild / backfill
+
+def _day_range(column, from_day: Optional[date], to_day: Optional[date]) -> list:
+    filters = []
+    if from_day:
+        filters.append(column >= start_of_day(from_day))
+    if to_day:
+        filters.append(column < start_of_day(to_day + timedelta(days=1)))
+    return filters
+
+
+def _rollup_range(column, from_day: Optional[date], to_day: Optional[date]) -> list:
+    filters = []
+    if from_day:
+        filters.append(column >= from_day)
+    if to_day:
+        filters.append(column <= to_day)
+    return filters
+
+
+async def rebuild_rollups(db: AsyncSession, from_day: Optional[date] = None, to_day: Optional[date] = None) -> dict:
+    """Recompute rollup rows for ``[from_day, to_day]`` (all history by default) from raw tables."""
+    dialect = db.get_bind().dialect.name
+
+    # Work orders per status per day
+    wo_day = utc_date(WorkOrder.created_at, dialect)
+    status_rows = (await db.execute(
+        select(wo_day.label("day"), WorkOrder.status, func.count(WorkOrder.id).label("count"))
+        .where(*_day_range(WorkOrder.created_at, from_day, to_day))
+        .group_by(wo_day, WorkOrder.status)
+    )).fetchall()
+
+    # Revenue per day
+    revenue = {}
+    inv_day = utc_date(Invoice.created_at, dialect)
+    for row in (await db.execute(
+        select(inv_day.label("day"), func.coalesce(func.sum(Invoice.total), 0).label("total"), func.count(Invoice.id).label("count"))
+        .where(*_day_range(Invoice.created_at, from_day, to_day))
+        .group_by(inv_day)
+    )).fetchall():
+        entry = revenue.setdefault(str(row.day), {"invoiced": Decimal("0"), "invoice_count": 0, "collected": Decimal("0")})
+        entry["invoiced"] = Decimal(str(row.total))
+        entry["invoice_count"] = row.count
+    pay_day = utc_date(Payment.paid_at, dialect)
+    for row in (await db.execute(
+        select(pay_day.label("day"), func.coalesce(func.sum(Payment.amount), 0).label("total"))
+        .where(*_day_range(Payment.paid_at, from_day, to_day))
+        .group_by(pay_day)
+    )).fetchall():
+        entry = revenue.setdefault(str(row.day), {"invoiced": Decimal("0"), "invoice_count": 0, "collected": Decimal("0")})
+        entry["collected"] = Decimal(str(row.total))
+
+    # Service usage per day
+    service_rows = (await db.execute(
+        select(wo_day.label("day"), WorkOrderService.service_id, func.count(WorkOrderService.id).label("count"))
+        .join(WorkOrder, WorkOrderService.work_order_id == WorkOrder.id)
+        .where(*_day_range(WorkOrder.created_at, from_day, to_day))
+        .group_by(wo_day, WorkOrderService.service_id)
+    )).fetchall()
+
+    for model in (DailyWorkOrderStatus, DailyRevenue, DailyServiceUsage):
+        await db.execute(delete(model).where(*_rollup_range(model.day, from_day, to_day)))
+
+    if status_rows:
+        await db.execute(DailyWorkOrderStatus.__table__.insert(), [
+            {"day": date.fromisoformat(str(row.day)), "status": row.status.value, "count": row.count}
+            for row in status_rows
+        ])
+    if revenue:
+        await db.execute(DailyRevenue.__table__.insert(), [
+            {"day": date.fromisoformat(day), **values} for day, values in revenue.items()
+        ])
+    if service_rows:
+        await db.execute(DailyServiceUsage.__table__.insert(), [
+            {"day": date.fromisoformat(str(row.day)), "service_id": row.service_id, "count": row.count}
+            for row in service_rows
+        ])
+
+    await db.commit()
+    return {
+        "work_order_status_rows": len(status_rows),
+        "revenue_rows": len(revenue),
+        "service_usage_rows": len(service_rows),
+    }
+
+
+async def _main(args) -> None:
+    from ..db.session import AsyncSessionLocal, engine
+
+    async with AsyncSessionLocal() as db:
+        counts = await rebuild_rollups(db, args.from_day, args.to_day)
+    await engine.dispose()
+    print(f"Rebuilt rollups: {counts}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daily KPI rollup maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild = subparsers.add_parser("rebuild", help="Recompute rollups from raw tables (backfill)")
+    rebuild.add_argument("--from", dest="from_day", type=date.fromisoformat, default=None)
+    rebuild.add_argument("--to", dest="to_day", type=date.fromisoformat, default=None)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,247 @@
+"""In-memory typeahead index over parts and vehicles.
+
+Each process keeps one sorted array of ``(key, priority, type, id)`` rows
+and answers prefix queries with a binary search, so ``/suggest`` never
+touches the database. Keys are folded with ``normalize_name`` and stripped
+of separators, so "abc12" finds plate "ABC-1234" and "hb1" finds "HB-100".
+Names are also keyed from every word, so "batt" finds "Hybrid Battery".
+
+The index is loaded at startup and kept current from committed ORM
+changes (session events below); bulk UPDATEs, which skip the flush, call
+``track()``. A periodic reload picks up writes made by other processes.
+"""
+import asyncio
+import logging
+import re
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db.models import Vehicle
+from ..db.models.service import Part
+from ..db.session import AsyncSessionLocal
+from ..utils.normalize import normalize_name
+
+logger = logging.getLogger(__name__)
+
+PART = "part"
+VEHICLE = "vehicle"
+
+# Key priorities: identifiers rank above names, whole names above later words
+CODE, NAME, WORD = 0, 1, 2
+MAX_NAME_WORDS = 8
+SCAN_FACTOR = 20
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+Ref = Tuple[str, int]
+Key = Tuple[str, int, str, int]
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    type: str
+    id: int
+    label: str
+    detail: Optional[str] = None
+
+
+def fold(text: Optional[str]) -> str:
+    """Search key form of an identifier, name or query."""
+    return _SEPARATORS.sub("", normalize_name(text) or "")
+
+
+def _name_keys(name: Optional[str]) -> List[Tuple[str, int]]:
+    words = [_SEPARATORS.sub("", word) for word in (normalize_name(name) or "").split()]
+    return [("".join(words[i:]), NAME if i == 0 else WORD) for i in range(min(len(words), MAX_NAME_WORDS))]
+
+
+def part_entry(part) -> Tuple[Suggestion, List[Tuple[str, int]]]:
+    keys = [(fold(part.part_no), CODE)] + _name_keys(part.name)
+    return Suggestion(PART, part.id, part.name, part.part_no), keys
+
+
+def vehicle_entry(vehicle) -> Tuple[Suggestion, List[Tuple[str, int]]]:
+    keys = [(fold(vehicle.plate_no), CODE), (fold(vehicle.vin), CODE)]
+    detail = " · ".join(filter(None, [f"{vehicle.make or ''} {vehicle.model or ''}".strip(), vehicle.vin]))
+    return Suggestion(VEHICLE, vehicle.id, vehicle.plate_no, detail or None), keys
+
+
+ENTRY_BUILDERS = {Part: part_entry, Vehicle: vehicle_entry}
+
+
+class SuggestIndex:
+    """Sorted-array prefix index of parts and vehicles."""
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self._keys: List[Key] = []
+        self._entries: Dict[Ref, Tuple[Suggestion, List[Key]]] = {}
+        self._lock = threading.Lock()
+        # Changes applied while a reload is reading the tables, replayed after the swap
+        self._during_load: Optional[List[Tuple[Ref, Optional[tuple]]]] = None
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _rows(suggestion: Suggestion, keys: Iterable[Tuple[str, int]]) -> List[Key]:
+        return sorted({(key, priority, suggestion.type, suggestion.id) for key, priority in keys if key})
+
+    def _put(self, ref: Ref, entry: Optional[tuple]) -> None:
+        old = self._entries.pop(ref, None)
+        if old is not None:
+            for row in old[1]:
+                i = bisect_left(self._keys, row)
+                if i < len(self._keys) and self._keys[i] == row:
+                    del self._keys[i]
+        if entry is not None:
+            suggestion, keys = entry
+            rows = self._rows(suggestion, keys)
+            for row in rows:
+                insort(self._keys, row)
+            self._entries[ref] = (suggestion, rows)
+
+    def apply(self, changes: Sequence[Tuple[Ref, Optional[tuple]]]) -> None:
+        """Upsert ``(ref, (suggestion, keys))`` or remove ``(ref, None)`` entries."""
+        with self._lock:
+            for ref, entry in changes:
+                self._put(ref, entry)
+            if self._during_load is not None:
+                self._during_load.extend(changes)
+
+    def replace(self, entries: Iterable[tuple]) -> None:
+        """Swap in a complete set of ``(suggestion, keys)`` entries."""
+        new_entries = {}
+        new_keys = []
+        for suggestion, keys in entries:
+            rows = self._rows(suggestion, keys)
+            new_entries[(suggestion.type, suggestion.id)] = (suggestion, rows)
+            new_keys.extend(rows)
+        new_keys.sort()
+        with self._lock:
+            self._entries, self._keys = new_entries, new_keys
+            self.loaded = True
+
+    def _rebuild(self, parts, vehicles) -> None:
+        self.replace([part_entry(row) for row in parts] + [vehicle_entry(row) for row in vehicles])
+
+    async def load(self) -> int:
+        """(Re)build from the database; returns the number of entries."""
+        with self._lock:
+            self._during_load = []
+        try:
+            async with self.session_factory() as db:
+                parts = (await db.execute(select(Part.id, Part.name, Part.part_no))).all()
+                vehicles = (await db.execute(
+                    select(Vehicle.id, Vehicle.plate_no, Vehicle.vin, Vehicle.make, Vehicle.model)
+                )).all()
+            # Building keys for a large catalogue takes a while: keep it off the event loop
+            await asyncio.to_thread(self._rebuild, parts, vehicles)
+        finally:
+            with self._lock:
+                replay, self._during_load = self._during_load, None
+                for ref, entry in replay or ():
+                    self._put(ref, entry)
+        return len(self)
+
+    def search(self, q: str, types: Optional[Sequence[str]] = None, limit: int = 10) -> List[Suggestion]:
+        """Top ``limit`` entries with a key starting with ``q``: exact, identifier, shorter keys first."""
+        prefix = fold(q)
+        if not prefix or limit <= 0:
+            return []
+        best: Dict[Ref, tuple] = {}
+        with self._lock:
+            i = bisect_left(self._keys, (prefix,))
+            end = min(len(self._keys), i + limit * SCAN_FACTOR)
+            while i < end:
+                key, priority, kind, ident = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                i += 1
+                if types and kind not in types:
+                    end = min(len(self._keys), end + 1)
+                    continue
+                rank = (key != prefix, priority, len(key), ident)
+                ref = (kind, ident)
+                if ref not in best or rank < best[ref][0]:
+                    best[ref] = (rank, self._entries[ref][0])
+        return [suggestion for _, suggestion in sorted(best.values(), key=lambda item: item[0])[:limit]]
+
+    async def run(self, interval: float) -> None:
+        """Reload every ``interval`` seconds until stopped."""
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("Suggest index reload failed")
+
+    def start(self, interval: Optional[float] = None) -> Optional[asyncio.Task]:
+        """Reload periodically in the background (0 disables)."""
+        interval = settings.suggest_index_refresh_seconds if interval is None else interval
+        if interval <= 0:
+            return None
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self.run(interval))
+        return self._task
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+suggest_index = SuggestIndex()
+
+
+# Stage entries at flush time and apply them once the transaction commits,
+# so rolled-back writes never show up in suggestions.
+_PENDING_KEY = "suggest_index_changes"
+
+
+def _stage(session: Session, obj, removed: bool = False) -> None:
+    build = ENTRY_BUILDERS.get(type(obj))
+    if build is None or obj.id is None:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    ref = (PART if isinstance(obj, Part) else VEHICLE, obj.id)
+    pending[ref] = None if removed else build(obj)
+
+
+def track(db, obj) -> None:
+    """Index ``obj`` on commit after a bulk UPDATE (which bypasses the flush)."""
+    _stage(getattr(db, "sync_session", db), obj)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty):
+        _stage(session, obj)
+    for obj in session.deleted:
+        _stage(session, obj, removed=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        suggest_index.apply(list(pending.items()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,290 @@
+"""Denormalized work order totals.
+
+``items_parts_total``, ``items_labor_total`` and ``services_total`` on
+``work_orders`` are adjusted by mapper events with a delta UPDATE on the
+same connection (and therefore transaction) as the item or service write
+that caused them, so invoicing and list views read them without loading
+child rows. A service line is totalled at the ``unit_price`` copied from
+the service when it was added. Changing a service's ``base_price``, through
+the ORM or ``update_returning``, reprices its lines on open work orders;
+closed or invoiced ones keep the prices they were billed at. Other writes
+that bypass the ORM, such as bulk DELETEs, are not seen; report (and optionally repair) drift with:
+
+    python -m app.services.work_order_totals check [--fix]
+"""
+import argparse
+import asyncio
+import logging
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import Numeric, and_, bindparam, case, event, exists, func, inspect, literal, or_, select, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from ..db.models import WorkOrder, WorkOrderItem, WorkOrderService, WorkOrderStatus, ItemType, Service, Invoice
+from ..db.writes import on_update
+
+logger = logging.getLogger(__name__)
+
+ITEM_COLUMNS = {ItemType.PART: "items_parts_total", ItemType.LABOR: "items_labor_total"}
+TOTAL_COLUMNS = ("items_parts_total", "items_labor_total", "services_total")
+# Decimal places each total is compared at by the checker
+_SCALE = {"items_parts_total": 4, "items_labor_total": 4, "services_total": 2}
+
+_work_orders = WorkOrder.__table__
+_service_lines = WorkOrderService.__table__
+
+
+def line_total(qty, unit_price) -> Decimal:
+    return Decimal(str(qty or 0)) * Decimal(str(unit_price or 0))
+
+
+def work_order_subtotal(work_order: WorkOrder) -> Decimal:
+    """Items plus services, from the maintained totals."""
+    return sum(
+        (Decimal(str(getattr(work_order, name) or 0)) for name in TOTAL_COLUMNS),
+        Decimal("0")
+    )
+
+
+def _bump(connection, target, work_order_id: Optional[int], deltas: Dict[str, Decimal]) -> None:
+    """Add ``deltas`` to one work order's totals and sync its loaded instance."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if work_order_id is None or not deltas:
+        return
+    stmt = (
+        update(_work_orders)
+        .where(_work_orders.c.id == work_order_id)
+        .values({name: _work_orders.c[name] + delta for name, delta in deltas.items()})
+    )
+    columns = [_work_orders.c[name] for name in deltas]
+    if connection.dialect.update_returning:
+        row = connection.execute(stmt.returning(*columns)).first()
+    else:
+        connection.execute(stmt)
+        row = connection.execute(select(*columns).where(_work_orders.c.id == work_order_id)).first()
+
+    # The session keeps instances across commits: don't leave a loaded work order stale
+    session = object_session(target)
+    parent = session.identity_map.get(identity_key(WorkOrder, work_order_id)) if session else None
+    if parent is not None and row is not None:
+        for name, value in row._mapping.items():
+            set_committed_value(parent, name, value)
+
+
+def _item_values(connection, target) -> tuple:
+    """(work_order_id, item_type, qty, unit_price) without a lazy load mid-flush."""
+    names = ("work_order_id", "item_type", "qty", "unit_price")
+    loaded = inspect(target).dict
+    if all(name in loaded for name in names):
+        return tuple(loaded[name] for name in names)
+    table = WorkOrderItem.__table__
+    return tuple(connection.execute(
+        select(*(table.c[name] for name in names)).where(table.c.id == target.id)
+    ).one())
+
+
+def _service_price(connection, service_id: int) -> Decimal:
+    price = connection.execute(select(Service.base_price).where(Service.id == service_id)).scalar()
+    return Decimal(str(price or 0))
+
+
+# Items
+
+@event.listens_for(WorkOrderItem, "after_insert")
+def _item_inserted(mapper, connection, target):
+    work_order_id, item_type, qty, unit_price = _item_values(connection, target)
+    _bump(connection, target, work_order_id, {ITEM_COLUMNS[ItemType(item_type)]: line_total(qty, unit_price)})
+
+
+@event.listens_for(WorkOrderItem, "after_update")
+def _item_updated(mapper, connection, target):
+    state = inspect(target)
+    names = ("work_order_id", "item_type", "qty", "unit_price")
+    if not any(state.attrs[name].history.has_changes() for name in names):
+        return
+    new = _item_values(connection, target)
+    old = tuple(
+        state.attrs[name].history.deleted[0] if state.attrs[name].history.deleted else value
+        for name, value in zip(names, new)
+    )
+    _bump(connection, target, old[0], {ITEM_COLUMNS[ItemType(old[1])]: -line_total(old[2], old[3])})
+    _bump(connection, target, new[0], {ITEM_COLUMNS[ItemType(new[1])]: line_total(new[2], new[3])})
+
+
+@event.listens_for(WorkOrderItem, "before_delete")
+def _item_deleted(mapper, connection, target):
+    work_order_id, item_type, qty, unit_price = _item_values(connection, target)
+    _bump(connection, target, work_order_id, {ITEM_COLUMNS[ItemType(item_type)]: -line_total(qty, unit_price)})
+
+
+# Services
+
+@event.listens_for(WorkOrderService, "before_insert")
+def _service_priced(mapper, connection, target):
+    if target.unit_price is None:
+        target.unit_price = _service_price(connection, target.service_id)
+
+
+@event.listens_for(WorkOrderService, "after_insert")
+def _service_added(mapper, connection, target):
+    _bump(connection, target, target.work_order_id, {"services_total": Decimal(str(target.unit_price or 0))})
+
+
+@event.listens_for(WorkOrderService, "before_delete")
+def _service_removed(mapper, connection, target):
+    # Read the stored price: repricing rewrites it without touching loaded lines
+    price = connection.execute(
+        select(_service_lines.c.unit_price).where(_service_lines.c.id == target.id)
+    ).scalar()
+    _bump(connection, target, target.work_order_id, {"services_total": -Decimal(str(price or 0))})
+
+
+def _reprice(connection, service_id: int, old_price, new_price) -> None:
+    """Move the service's lines on open work orders to its new price."""
+    if Decimal(str(new_price or 0)) == Decimal(str(old_price or 0)):
+        return
+    # Closed or invoiced work orders keep the prices they were billed at
+    is_open = and_(
+        _work_orders.c.status != WorkOrderStatus.CLOSED,
+        ~exists().where(Invoice.work_order_id == _work_orders.c.id),
+    )
+    lines = and_(_service_lines.c.service_id == service_id, _service_lines.c.work_order_id == _work_orders.c.id)
+    delta = (
+        select(func.sum(
+            literal(Decimal(str(new_price or 0)), Numeric(12, 2)) - func.coalesce(_service_lines.c.unit_price, 0)
+        ))
+        .where(lines)
+        .scalar_subquery()
+    )
+    connection.execute(
+        update(_work_orders)
+        .where(exists().where(lines), is_open)
+        .values(services_total=_work_orders.c.services_total + delta)
+    )
+    connection.execute(
+        update(_service_lines)
+        .where(
+            _service_lines.c.service_id == service_id,
+            _service_lines.c.work_order_id.in_(select(_work_orders.c.id).where(is_open)),
+        )
+        .values(unit_price=new_price)
+    )
+
+
+@event.listens_for(Service, "after_update")
+def _service_repriced(mapper, connection, target):
+    history = inspect(target).attrs.base_price.history
+    if not history.has_changes() or not history.deleted:
+        return
+    _reprice(connection, target.id, history.deleted[0], target.base_price)
+
+
+@on_update(Service, "base_price")
+def _service_price_written(connection, old, new):
+    # PUT /services/{id} (update_returning)
+    _reprice(connection, new.id, old.base_price, new.base_price)
+
+
+# Consistency check
+
+def _expected_totals():
+    """Totals recomputed from the child rows, per work order id."""
+    line = WorkOrderItem.qty * WorkOrderItem.unit_price
+    items = (
+        select(
+            WorkOrderItem.work_order_id.label("id"),
+            func.sum(case((WorkOrderItem.item_type == ItemType.PART, line), else_=0)).label("parts"),
+            func.sum(case((WorkOrderItem.item_type == ItemType.LABOR, line), else_=0)).label("labor"),
+        )
+        .group_by(WorkOrderItem.work_order_id)
+        .subquery()
+    )
+    services = (
+        select(
+            WorkOrderService.work_order_id.label("id"),
+            func.sum(func.coalesce(WorkOrderService.unit_price, 0)).label("services"),
+        )
+        .group_by(WorkOrderService.work_order_id)
+        .subquery()
+    )
+    expected = {
+        "items_parts_total": func.coalesce(items.c.parts, 0),
+        "items_labor_total": func.coalesce(items.c.labor, 0),
+        "services_total": func.coalesce(services.c.services, 0),
+    }
+    # Read back at the stored columns' scale, not qty/unit_price's
+    expected = {name: type_coerce(value, _work_orders.c[name].type) for name, value in expected.items()}
+    return expected, items, services
+
+
+async def check_totals(db: AsyncSession, fix: bool = False) -> List[dict]:
+    """
+    Recompute every work order's totals from its items and services and
+    return the ones that differ from the stored values, one entry per
+    drifted column. With ``fix``, the stored totals are overwritten.
+    """
+    expected, items, services = _expected_totals()
+    stmt = (
+        select(
+            WorkOrder.id,
+            *(getattr(WorkOrder, name) for name in TOTAL_COLUMNS),
+            *(value.label(f"expected_{name}") for name, value in expected.items()),
+        )
+        .outerjoin(items, items.c.id == WorkOrder.id)
+        .outerjoin(services, services.c.id == WorkOrder.id)
+        .where(or_(*(
+            func.round(getattr(WorkOrder, name), _SCALE[name]) != func.round(value, _SCALE[name])
+            for name, value in expected.items()
+        )))
+        .order_by(WorkOrder.id)
+    )
+    rows = (await db.execute(stmt)).all()
+
+    drift = []
+    for row in rows:
+        for name in TOTAL_COLUMNS:
+            stored = Decimal(str(getattr(row, name) or 0))
+            actual = Decimal(str(getattr(row, f"expected_{name}") or 0))
+            if round(stored, _SCALE[name]) != round(actual, _SCALE[name]):
+                drift.append({"work_order_id": row.id, "column": name, "stored": stored, "actual": actual})
+    if drift:
+        logger.warning(
+            "Work order totals drift",
+            extra={"fields": {"work_orders": len(rows), "columns": len(drift), "fixed": fix}}
+        )
+
+    if fix and rows:
+        await db.execute(
+            update(_work_orders)
+            .where(_work_orders.c.id == bindparam("work_order_id"))
+            .values({name: bindparam(f"new_{name}") for name in TOTAL_COLUMNS}),
+            [
+                {"work_order_id": row.id, **{f"new_{name}": getattr(row, f"expected_{name}") for name in TOTAL_COLUMNS}}
+                for row in rows
+            ]
+        )
+        await db.commit()
+    return drift
+
+
+async def _main(args) -> None:
+    from ..db.session import AsyncSessionLocal, engine
+
+    async with AsyncSessionLocal() as db:
+        drift = await check_totals(db, fix=args.fix)
+    await engine.dispose()
+    for entry in drift:
+        print(f"work order {entry['work_order_id']}: {entry['column']} stored {entry['stored']}, actual {entry['actual']}")
+    print(f"{len(drift)} drifted totals" + (" fixed" if args.fix and drift else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Work order totals maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check = subparsers.add_parser("check", help="Recompute totals from items and services and report drift")
+    check.add_argument("--fix", action="store_true", help="Overwrite drifted totals with the recomputed values")
+    asyncio.run(_main(parser.parse_args()))
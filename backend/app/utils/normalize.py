@@ -0,0 +1,83 @@
+"""Search keys for names and phone numbers.
+
+Names are folded so spelling variants staff type interchangeably compare
+equal: Arabic diacritics and tatweel are dropped, alef/hamza forms, ya/alif
+maqsura, ta marbuta and Persian letter forms are unified, Latin text is
+case-folded and whitespace collapsed. Phones become E.164 digits (no "+").
+"""
+import re
+import unicodedata
+from typing import Optional
+
+from ..core.config import settings
+
+# Harakat, shadda, sukun, superscript alef and Quranic annotation marks
+_ARABIC_MARKS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]")
+_TATWEEL = "\u0640"
+_LETTER_FOLDS = str.maketrans({
+    "آ": "ا",  # alef with madda
+    "أ": "ا",  # alef with hamza above
+    "إ": "ا",  # alef with hamza below
+    "ٱ": "ا",  # alef wasla
+    "ى": "ي",  # alif maqsura -> ya
+    "ی": "ي",  # Persian yeh
+    "ئ": "ي",  # ya with hamza
+    "ؤ": "و",  # waw with hamza
+    "ة": "ه",  # ta marbuta -> ha
+    "ک": "ك",  # Persian kaf
+})
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+_WHITESPACE = re.compile(r"\s+")
+_NON_DIGITS = re.compile(r"\D")
+_LETTERS = re.compile(r"[^\W\d_]")
+
+
+def normalize_name(value: Optional[str]) -> Optional[str]:
+    """Fold a name (or name query) to its search key."""
+    if not value:
+        return None
+    value = unicodedata.normalize("NFKC", value)
+    value = _ARABIC_MARKS.sub("", value).replace(_TATWEEL, "")
+    value = value.translate(_LETTER_FOLDS).translate(_DIGITS).casefold()
+    return _WHITESPACE.sub(" ", value).strip() or None
+
+
+def normalize_phone(value: Optional[str], country_code: Optional[str] = None) -> Optional[str]:
+    """
+    A stored phone number as E.164 digits: "+967-1-234-567" and "01234567"
+    both become "9671234567". Numbers without an international prefix are
+    taken as national ones in ``settings.phone_default_country_code``.
+    """
+    if not value:
+        return None
+    value = value.translate(_DIGITS).strip()
+    country_code = country_code or settings.phone_default_country_code
+    digits = _NON_DIGITS.sub("", value)
+    if not digits:
+        return None
+    if value.startswith("+"):
+        return digits
+    if digits.startswith("00"):
+        return digits[2:] or None
+    if digits.startswith("0"):
+        return country_code + digits.lstrip("0")
+    if digits.startswith(country_code) and len(digits) > len(country_code) + 7:
+        return digits
+    return country_code + digits
+
+
+def phone_search_key(query: Optional[str]) -> Optional[str]:
+    """
+    The digits of a phone query, to match anywhere in a normalized phone.
+    International and trunk prefixes are dropped so "+967 1 234", "01234"
+    and "1234" all find 9671234567. None for queries that contain letters.
+    """
+    if not query:
+        return None
+    query = query.translate(_DIGITS).strip()
+    if _LETTERS.search(query):
+        return None
+    digits = _NON_DIGITS.sub("", query)
+    if not query.startswith("+"):
+        digits = digits[2:] if digits.startswith("00") else digits.lstrip("0")
+    return digits or None
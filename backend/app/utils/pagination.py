@@ -0,0 +1,41 @@
+"""Keyset (cursor) pagination helpers."""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+from sqlalchemy import and_, func, or_, literal
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode the (created_at, id) sort key of the last row into an opaque cursor."""
+    payload = json.dumps({"c": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode an opaque cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_before(created_col, id_col, created_at: datetime, row_id: int, dialect_name: str):
+    """
+    Build the seek predicate for a (created_at DESC, id DESC) ordering.
+
+    SQLite keeps timestamps as text, with a fractional part when written by
+    SQLAlchemy and without one from ``CURRENT_TIMESTAMP``, so both sides are
+    compared as Julian day numbers or equal keys would not compare equal.
+    """
+    bound = created_at
+    if dialect_name == "sqlite":
+        created_col = func.julianday(created_col)
+        bound = func.julianday(literal(created_at.replace(tzinfo=None).isoformat(sep=" ")))
+    return or_(
+        created_col < bound,
+        and_(created_col == bound, id_col < row_id)
+    )
@@ -0,0 +1,80 @@
+"""Micro-benchmark: per-invoice PDF render time, cold vs shared renderer.
+
+"cold" reproduces the old per-request behaviour (fonts registered and
+stylesheets rebuilt for every invoice); "shared" reuses the process-wide
+renderer returned by ``get_pdf_service()``.
+
+    cd backend && python -m benchmarks.bench_invoice_pdf [--runs 50] [--items 10]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.services.pdf import PDFService, get_pdf_service, reset_pdf_caches
+
+
+def make_invoice(items: int) -> SimpleNamespace:
+    """A detached invoice with the attributes the renderer reads."""
+    work_order = SimpleNamespace(
+        customer=SimpleNamespace(name="محمد علي", phone="+967 1 234 567"),
+        vehicle=SimpleNamespace(make="Toyota", model="Prius", plate_no="ABC-123"),
+        items=[
+            SimpleNamespace(name=f"قطعة غيار {i} / Part {i}", qty=Decimal("2"), unit_price=Decimal("12.50"))
+            for i in range(items)
+        ],
+        services=[],
+        media=[],
+    )
+    return SimpleNamespace(
+        id=1,
+        work_order_id=1,
+        work_order=work_order,
+        created_at=datetime(2025, 1, 1),
+        subtotal=Decimal("250.00"),
+        discount=Decimal("0.00"),
+        tax=Decimal("37.50"),
+        total=Decimal("287.50"),
+        paid=Decimal("100.00"),
+    )
+
+
+async def render_cold(invoice) -> bytes:
+    reset_pdf_caches()
+    return await PDFService().generate_invoice_pdf(invoice)
+
+
+async def render_shared(invoice) -> bytes:
+    return await get_pdf_service().generate_invoice_pdf(invoice)
+
+
+async def measure(render, invoice, runs: int) -> list:
+    await render(invoice)  # warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await render(invoice)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def main(runs: int, items: int) -> None:
+    invoice = make_invoice(items)
+    for label, render in (("cold", render_cold), ("shared", render_shared)):
+        timings = await measure(render, invoice, runs)
+        print(
+            f"{label:>6}: mean {statistics.mean(timings):7.2f} ms  "
+            f"median {statistics.median(timings):7.2f} ms  "
+            f"min {min(timings):7.2f} ms  ({runs} runs, {items} items)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Invoice PDF render benchmark")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--items", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.items))
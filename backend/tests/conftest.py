@@ -1,31 +1,47 @@
 """Test configuration and fixtures."""
+from contextlib import contextmanager
+
 import pytest
 import pytest_asyncio
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.main import app
+from app.core.security import get_password_hash
+from app.db.models import User, UserRole
 from app.db.session import AsyncSessionLocal
+from app.db.query_stats import track_queries
+
+
+TEST_PASSWORD = "Passw0rd!"
+TEST_USERS = {
+    "admin@yemenhybrid.com": ("Admin User", UserRole.admin),
+    "sales@yemenhybrid.com": ("Sales User", UserRole.sales),
+    "engineer@yemenhybrid.com": ("Engineer User", UserRole.engineer),
+}
+
+
+@pytest_asyncio.fixture
+async def test_users():
+    """Make sure the admin/sales/engineer login users exist."""
+    async with AsyncSessionLocal() as session:
+        existing = set((await session.execute(
+            select(User.email).where(User.email.in_(TEST_USERS))
+        )).scalars())
+        password_hash = get_password_hash(TEST_PASSWORD)
+        session.add_all([
+            User(full_name=name, email=email, role=role, password_hash=password_hash, is_active=True)
+            for email, (name, role) in TEST_USERS.items() if email not in existing
+        ])
+        await session.commit()
 
 
 @pytest_asyncio.fixture
-async def async_client():
-    """Create async test client."""
-    from fastapi.testclient import TestClient
-    with TestClient(app) as client:
-        # Convert TestClient to async interface for our tests
-        from httpx import AsyncClient
-        async with AsyncClient(base_url="http://testserver") as ac:
-            # Override methods to use the TestClient
-            original_request = ac.request
-            def sync_request(method, url, **kwargs):
-                return client.request(method, str(url), **kwargs)
-            ac.request = sync_request
-            ac.get = lambda url, **kwargs: client.get(str(url), **kwargs)
-            ac.post = lambda url, **kwargs: client.post(str(url), **kwargs)
-            ac.put = lambda url, **kwargs: client.put(str(url), **kwargs)
-            ac.delete = lambda url, **kwargs: client.delete(str(url), **kwargs)
-            yield ac
+async def async_client(test_users):
+    """Create async test client calling the app in-process."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
 
 
 @pytest_asyncio.fixture
@@ -42,7 +58,7 @@ async def auth_headers(async_client: AsyncClient):
         "/api/v1/auth/login",
         json={
             "email": "engineer@yemenhybrid.com",
-            "password": "Passw0rd!"
+            "password": TEST_PASSWORD
         }
     )
     assert login_response.status_code == 200
@@ -57,7 +73,7 @@ async def admin_auth_headers(async_client: AsyncClient):
         "/api/v1/auth/login",
         json={
             "email": "admin@yemenhybrid.com",
-            "password": "Passw0rd!"
+            "password": TEST_PASSWORD
         }
     )
     assert login_response.status_code == 200
@@ -72,7 +88,7 @@ async def sales_auth_headers(async_client: AsyncClient):
         "/api/v1/auth/login",
         json={
             "email": "sales@yemenhybrid.com",
-            "password": "Passw0rd!"
+            "password": TEST_PASSWORD
         }
     )
     assert login_response.status_code == 200
@@ -80,5 +96,23 @@ async def sales_auth_headers(async_client: AsyncClient):
     return {"Authorization": f"Bearer {token}"}
 
 
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when a block runs more SQL statements than declared:
+
+        with query_budget(3):
+            client.get("/api/v1/customers/")
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= max_queries, (
+            f"Query budget exceeded: {stats.count} statements, budget {max_queries}\n{stats.report()}"
+        )
+    return budget
+
+
 # Configure pytest to run async tests by default
 pytestmark = pytest.mark.asyncio
\ No newline at end of file
@@ -1,44 +1,14 @@
 """Authentication tests."""
 import pytest
-import pytest_asyncio
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.main import app
-from app.db.session import AsyncSessionLocal
 from app.db.models import User, UserRole
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash, verify_password
 
 # Configure pytest-asyncio
 pytestmark = pytest.mark.asyncio
 
 
-@pytest_asyncio.fixture
-async def async_client():
-    """Create async test client."""
-    from fastapi.testclient import TestClient
-    with TestClient(app) as client:
-        yield client
-
-
-@pytest_asyncio.fixture
-async def db_session():
-    """Create test database session."""
-    async with AsyncSessionLocal() as session:
-        yield session
-
-
-@pytest_asyncio.fixture
-async def test_users(db_session: AsyncSession):
-    """Create test users with different roles."""
-    # These should already exist from seed data, but let's ensure they exist
-    users = {
-        "admin": await db_session.get(User, 1),  # Should be admin from seed
-        "sales": await db_session.get(User, 2),  # Should be sales from seed  
-        "engineer": await db_session.get(User, 3)  # Should be engineer from seed
-    }
-    return users
-
-
 class TestAuthentication:
     """Test authentication endpoints."""
     
@@ -88,6 +58,36 @@ class TestAuthentication:
         data = response.json()
         assert data["detail"]["error"]["code"] == "INVALID_CREDENTIALS"
 
+    async def test_login_upgrades_outdated_hash(self, async_client: AsyncClient, db_session: AsyncSession):
+        """Test logging in rehashes a password stored below the configured cost."""
+        from passlib.context import CryptContext
+        weak_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("Passw0rd!")
+        user = User(
+            email="rehash@yemenhybrid.com",
+            full_name="Rehash User",
+            password_hash=weak_hash,
+            role=UserRole.engineer,
+        )
+        db_session.add(user)
+        await db_session.commit()
+
+        response = await async_client.post(
+            "/api/v1/auth/login",
+            json={"email": "rehash@yemenhybrid.com", "password": "Passw0rd!"}
+        )
+
+        assert response.status_code == 200
+        await db_session.refresh(user)
+        assert user.password_hash != weak_hash
+        assert verify_password("Passw0rd!", user.password_hash)
+
+        # The upgraded hash keeps working
+        response = await async_client.post(
+            "/api/v1/auth/login",
+            json={"email": "rehash@yemenhybrid.com", "password": "Passw0rd!"}
+        )
+        assert response.status_code == 200
+
     async def test_me_endpoint_authenticated(self, async_client: AsyncClient):
         """Test /auth/me endpoint with valid token."""
         # First login to get token
@@ -239,4 +239,95 @@ class TestRoleBasedAccess:
         
         for endpoint in endpoints:
             response = await async_client.get(endpoint)
-            assert response.status_code == 403  # HTTPBearer returns 403 for missing auth
\ No newline at end of file
+            assert response.status_code == 403  # HTTPBearer returns 403 for missing auth
+
+class TestUserCache:
+    """Test the authenticated-user snapshot cache."""
+
+    def _snapshot(self, user_id: int = 1, role: UserRole = UserRole.sales):
+        from app.core.user_cache import UserSnapshot
+        return UserSnapshot(id=user_id, role=role, is_active=True, full_name="Test", email=f"u{user_id}@example.com")
+
+    async def test_hit_and_miss_counters(self):
+        """Test lookups are counted and keyed by token iat."""
+        from app.core.user_cache import UserCache
+        cache = UserCache(ttl_seconds=60, max_size=10)
+        assert cache.get(1, 100) is None
+        cache.put(self._snapshot(), 100)
+        assert cache.get(1, 100).role == UserRole.sales
+        assert cache.get(1, 200) is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+
+    async def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full."""
+        from app.core.user_cache import UserCache
+        cache = UserCache(ttl_seconds=60, max_size=2)
+        cache.put(self._snapshot(1))
+        cache.put(self._snapshot(2))
+        cache.get(1)
+        cache.put(self._snapshot(3))
+        assert cache.get(2) is None
+        assert cache.get(1) is not None
+        assert cache.stats()["evictions"] == 1
+
+    async def test_ttl_expiry(self, monkeypatch):
+        """Test entries expire after the TTL."""
+        from types import SimpleNamespace
+        from app.core import user_cache as user_cache_module
+        clock = [1000.0]
+        # Only the cache's clock: the event loop keeps the real one
+        monkeypatch.setattr(user_cache_module, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+        cache = user_cache_module.UserCache(ttl_seconds=60, max_size=2)
+        cache.put(self._snapshot())
+
+        clock[0] += 59
+        assert cache.get(1) is not None
+        clock[0] += 2
+        assert cache.get(1) is None
+        assert cache.stats()["size"] == 0
+
+    async def test_disabled_cache_stores_nothing(self):
+        """Test a TTL of zero or less disables the cache."""
+        from app.core.user_cache import UserCache
+        cache = UserCache(ttl_seconds=-1, max_size=2)
+        cache.put(self._snapshot())
+        assert cache.get(1) is None
+
+    async def test_deactivation_invalidates(self, db_session: AsyncSession):
+        """Test committing a deactivation drops the cached snapshot."""
+        from app.core.user_cache import user_cache, UserSnapshot
+        user = User(
+            email="cached@yemenhybrid.com",
+            full_name="Cached User",
+            password_hash=get_password_hash("Passw0rd!"),
+            role=UserRole.engineer,
+        )
+        db_session.add(user)
+        await db_session.commit()
+        user_cache.put(UserSnapshot.from_user(user), 100)
+
+        user.is_active = False
+        await db_session.commit()
+
+        assert user_cache.get(user.id, 100) is None
+
+
+class TestPasswordHashingPool:
+    """Test password hashing on the dedicated executor."""
+
+    async def test_hash_and_verify_async(self):
+        """Test async hashing round-trips."""
+        from app.core.security import hash_password_async, verify_password_async
+        hashed = await hash_password_async("Passw0rd!")
+        assert await verify_password_async("Passw0rd!", hashed)
+        assert not await verify_password_async("wrong", hashed)
+
+    async def test_outdated_hash_is_upgraded(self):
+        """Test hashes below the configured cost are flagged for rehash."""
+        from passlib.context import CryptContext
+        from app.core.security import verify_and_update_password_async
+        weak_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("Passw0rd!")
+        valid, new_hash = await verify_and_update_password_async("Passw0rd!", weak_hash)
+        assert valid
+        assert new_hash is not None and new_hash != weak_hash
@@ -0,0 +1,111 @@
+"""Tests for the cross-entity search endpoint's service."""
+import asyncio
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from app.db.models import Customer, Vehicle, WorkOrder, Invoice, User, UserRole
+from app.db.schemas import SearchHit
+from app.services.global_search import global_search, parse_number
+
+
+@pytest_asyncio.fixture
+async def garage(db_session):
+    user = User(full_name="Search Desk", email="search-desk@example.com", role=UserRole.sales, password_hash="x")
+    customer = Customer(name="Globalsearch Ali", phone="+967 555 424242")
+    db_session.add_all([user, customer])
+    await db_session.flush()
+    vehicle = Vehicle(customer_id=customer.id, plate_no="GLS-4242", make="Toyota", model="Prius")
+    db_session.add(vehicle)
+    await db_session.flush()
+    older = WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, complaint="Globalsearch inverter fault", created_by=user.id)
+    db_session.add(older)
+    await db_session.flush()
+    newer = WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, complaint="Oil change", created_by=user.id)
+    db_session.add(newer)
+    await db_session.flush()
+    invoice = Invoice(work_order_id=newer.id, total=Decimal("120.00"))
+    db_session.add(invoice)
+    await db_session.commit()
+    ids = {"customer": customer.id, "vehicle": vehicle.id, "older": older.id, "newer": newer.id,
+           "invoice": invoice.id, "user": user.id}
+    yield ids
+    # Through the ORM, so the daily rollups are decremented again
+    for model, key in ((Invoice, "invoice"), (WorkOrder, "older"), (WorkOrder, "newer"),
+                       (Vehicle, "vehicle"), (Customer, "customer"), (User, "user")):
+        await db_session.delete(await db_session.get(model, ids[key]))
+        await db_session.flush()
+    await db_session.commit()
+
+
+def group_ids(response):
+    return {group.type: [hit.id for hit in group.items] for group in response.groups}
+
+
+class TestGlobalSearch:
+    """Grouped, ranked hits across entities."""
+
+    def test_parse_number(self):
+        assert parse_number("42") == parse_number("#42") == parse_number("WO-42") == parse_number("inv 42") == 42
+        assert parse_number("ABC-123") is None
+
+    @pytest.mark.asyncio
+    async def test_plate_finds_vehicle_its_work_orders_and_invoices(self, garage):
+        result = group_ids(await global_search("gls-4242"))
+
+        assert result["vehicles"] == [garage["vehicle"]]
+        # Most recent first
+        assert result["work_orders"] == [garage["newer"], garage["older"]]
+        assert result["invoices"] == [garage["invoice"]]
+        assert result["customers"] == []
+
+    @pytest.mark.asyncio
+    async def test_name_finds_customer_work_orders_and_invoices(self, garage):
+        response = await global_search("globalsearch ali", limit=1)
+        result = group_ids(response)
+
+        assert result["customers"] == [garage["customer"]]
+        assert result["work_orders"] == [garage["newer"]]
+        assert result["invoices"] == [garage["invoice"]]
+        assert response.incomplete == []
+
+    @pytest.mark.asyncio
+    async def test_complaint_and_number(self, garage):
+        assert group_ids(await global_search("inverter fault"))["work_orders"] == [garage["older"]]
+        result = group_ids(await global_search(f"#{garage['older']}"))
+        assert result["work_orders"][0] == garage["older"]
+
+    @pytest.mark.asyncio
+    async def test_budget_and_failures(self):
+        async def fast(db, q, number, dialect, limit):
+            return [SearchHit(id=1, title=q)]
+
+        async def slow(db, q, number, dialect, limit):
+            await asyncio.sleep(5)
+            return []
+
+        async def broken(db, q, number, dialect, limit):
+            raise RuntimeError("boom")
+
+        response = await global_search(
+            "anything", budget_ms=50,
+            groups={"customers": fast, "vehicles": slow, "invoices": broken}
+        )
+
+        assert [group.type for group in response.groups] == ["customers"]
+        assert sorted(response.incomplete) == ["invoices", "vehicles"]
+        assert response.took_ms < 1000
+
+    @pytest.mark.asyncio
+    async def test_groups_run_concurrently(self):
+        async def wait(db, q, number, dialect, limit):
+            await asyncio.sleep(0.2)
+            return []
+
+        response = await global_search(
+            "anything", budget_ms=2000,
+            groups={"customers": wait, "vehicles": wait, "work_orders": wait}
+        )
+        assert response.incomplete == []
+        assert response.took_ms < 500
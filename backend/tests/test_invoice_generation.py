@@ -423,4 +423,320 @@ class TestInvoiceGeneration:
         data = response.json()
         assert float(data["subtotal"]) == 0.00
         assert float(data["tax_amount"]) == 0.00
-        assert float(data["total"]) == 0.00
\ No newline at end of file
+        assert float(data["total"]) == 0.00
+
+class TestSharedPDFRenderer:
+    """Test that fonts and styles are set up once per process."""
+
+    def test_shared_service_is_reused(self):
+        """get_pdf_service returns one renderer with one stylesheet."""
+        from app.services.pdf import get_pdf_service, reset_pdf_caches
+
+        reset_pdf_caches()
+        service = get_pdf_service()
+        assert get_pdf_service() is service
+        assert service.get_styles() is service.get_styles()
+
+    def test_fonts_registered_once(self):
+        """Repeated PDFService construction does not re-register fonts."""
+        from app.services import pdf
+
+        pdf.reset_pdf_caches()
+        with patch.object(pdf.pdfmetrics, "registerFont", wraps=pdf.pdfmetrics.registerFont) as register:
+            pdf.PDFService()
+            calls = register.call_count
+            pdf.PDFService()
+            pdf.get_pdf_service()
+        assert register.call_count == calls
+
+
+class TestPDFRenderPool:
+    """Test off-loop invoice rendering from snapshots."""
+
+    @staticmethod
+    def _invoice(items=3):
+        from datetime import datetime
+        from types import SimpleNamespace
+
+        work_order = SimpleNamespace(
+            customer=SimpleNamespace(name="Test Customer", phone="123456"),
+            vehicle=SimpleNamespace(make="Toyota", model="Prius", plate_no="ABC-123"),
+            items=[SimpleNamespace(name=f"Part {i}", qty=Decimal("1"), unit_price=Decimal("10.00")) for i in range(items)],
+            media=[SimpleNamespace(path="workorders/1/after/a.jpg", mime=None),
+                   SimpleNamespace(path="workorders/1/after/b.txt", mime="text/plain")],
+        )
+        return SimpleNamespace(
+            id=1, work_order_id=1, work_order=work_order, created_at=datetime(2025, 1, 1),
+            subtotal=Decimal("30.00"), discount=None, tax=None, total=Decimal("30.00"), paid=None
+        )
+
+    def test_snapshot_is_picklable(self):
+        """Snapshots carry plain data only, so they can cross a process boundary."""
+        import pickle
+        from app.services.pdf import invoice_snapshot
+
+        snapshot = invoice_snapshot(self._invoice())
+        assert pickle.loads(pickle.dumps(snapshot)) == snapshot
+        assert snapshot["photos"] == ["workorders/1/after/a.jpg"]
+        assert snapshot["vehicle"]["plate_no"] == "ABC-123"
+
+    @pytest.mark.asyncio
+    async def test_render_and_timeout(self, monkeypatch):
+        """Renders return PDF bytes and overlong renders raise TimeoutError."""
+        import asyncio
+        from app.services import pdf
+
+        monkeypatch.setattr(pdf.settings, "pdf_render_workers", 0)
+        snapshot = pdf.invoice_snapshot(self._invoice())
+        content = await pdf.render_invoice_pdf(snapshot)
+        assert content.startswith(b"%PDF")
+
+        timeouts = pdf.render_stats()["timeouts"]
+        with pytest.raises(asyncio.TimeoutError):
+            await pdf.render_invoice_pdf(pdf.invoice_snapshot(self._invoice(items=2000)), timeout=0.001)
+        assert pdf.render_stats()["timeouts"] == timeouts + 1
+        assert pdf.render_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_recycles_stuck_worker(self, monkeypatch):
+        """A render that times out on a worker gets that worker terminated instead of left running."""
+        import asyncio
+        from app.services import pdf
+
+        monkeypatch.setattr(pdf.settings, "pdf_render_workers", 2)
+        pdf.shutdown_render_executor()
+        try:
+            assert (await pdf.render_invoice_pdf(pdf.invoice_snapshot(self._invoice()), timeout=60)).startswith(b"%PDF")
+            stuck = list(pdf._render_executor._processes.values())
+            recycles = pdf.render_stats()["recycles"]
+
+            oversized = asyncio.create_task(
+                pdf.render_invoice_pdf(pdf.invoice_snapshot(self._invoice(items=20000)), timeout=0.5)
+            )
+            # Running on the same pool when it is recycled: resubmitted, not failed
+            bystander = asyncio.create_task(
+                pdf.render_invoice_pdf(pdf.invoice_snapshot(self._invoice(items=500)), timeout=60)
+            )
+            with pytest.raises(asyncio.TimeoutError):
+                await oversized
+            assert (await bystander).startswith(b"%PDF")
+
+            assert pdf.render_stats()["recycles"] == recycles + 1
+            for process in stuck:
+                process.join(timeout=5)
+                assert not process.is_alive()
+            # Later renders get a fresh worker
+            assert (await pdf.render_invoice_pdf(pdf.invoice_snapshot(self._invoice()), timeout=60)).startswith(b"%PDF")
+        finally:
+            pdf.shutdown_render_executor()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects(self, monkeypatch):
+        """Renders beyond pdf_render_max_queued waiting ones are rejected rather than queued."""
+        import asyncio
+        import threading
+        from app.services import pdf
+
+        release = threading.Event()
+
+        def blocked_render(snapshot):
+            release.wait(5)
+            return b"%PDF-1.4"
+
+        monkeypatch.setattr(pdf.settings, "pdf_render_workers", 0)
+        monkeypatch.setattr(pdf.settings, "pdf_render_max_queued", 1)
+        monkeypatch.setattr(pdf, "_render_invoice_in_worker", blocked_render)
+        snapshot = pdf.invoice_snapshot(self._invoice())
+        rejected = pdf.render_stats()["rejected"]
+
+        running = [asyncio.create_task(pdf.render_invoice_pdf(snapshot)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert pdf.render_stats()["queued"] == 1
+        with pytest.raises(pdf.RenderQueueFull):
+            await pdf.render_invoice_pdf(snapshot)
+        assert pdf.render_stats()["rejected"] == rejected + 1
+
+        release.set()
+        assert await asyncio.gather(*running) == [b"%PDF-1.4", b"%PDF-1.4"]
+        assert pdf.render_stats()["in_flight"] == 0
+
+
+class TestInvoicePDFCache:
+    """Test the content hash used to key cached invoice PDFs."""
+
+    def test_digest_tracks_render_inputs(self):
+        """The digest is stable for equal inputs and changes with payments and items."""
+        from app.services.pdf import invoice_snapshot, invoice_pdf_digest, invoice_pdf_path
+
+        invoice = TestPDFRenderPool._invoice()
+        digest = invoice_pdf_digest(invoice_snapshot(invoice))
+        assert invoice_pdf_digest(invoice_snapshot(TestPDFRenderPool._invoice())) == digest
+        assert invoice_pdf_path(1, digest) == f"invoices/1/{digest}.pdf"
+
+        invoice.paid = Decimal("10.00")
+        paid_digest = invoice_pdf_digest(invoice_snapshot(invoice))
+        assert paid_digest != digest
+
+        invoice.work_order.items[0].qty = Decimal("2")
+        assert invoice_pdf_digest(invoice_snapshot(invoice)) != paid_digest
+
+    @staticmethod
+    async def _seed_invoice(db_session: AsyncSession, plate_no: str) -> Invoice:
+        customer = Customer(name="PDF Customer", phone="123456")
+        db_session.add(customer)
+        await db_session.flush()
+        vehicle = Vehicle(customer_id=customer.id, plate_no=plate_no, make="Toyota", model="Prius")
+        db_session.add(vehicle)
+        await db_session.flush()
+        workorder = WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, created_by=1)
+        db_session.add(workorder)
+        await db_session.flush()
+        invoice = Invoice(
+            work_order_id=workorder.id, subtotal=Decimal("100.00"), discount=Decimal("0.00"),
+            tax=Decimal("15.00"), total=Decimal("115.00"), paid=Decimal("0.00")
+        )
+        db_session.add(invoice)
+        await db_session.commit()
+        return invoice
+
+    @staticmethod
+    def _fake_renderer(monkeypatch, on_render=None):
+        """Replace the render pool with a stub that counts renders."""
+        renders = []
+
+        async def render(snapshot):
+            renders.append(snapshot)
+            if on_render:
+                await on_render()
+            return b"%PDF-1.4 " + str(snapshot["paid"]).encode()
+
+        monkeypatch.setattr("app.api.invoices.render_invoice_pdf", render)
+        return renders
+
+    @pytest.mark.asyncio
+    async def test_pdf_endpoint_reuses_cached_file(self, async_client: AsyncClient, sales_auth_headers: dict, db_session: AsyncSession, monkeypatch, tmp_path):
+        """The cached PDF is served until a render input changes; If-None-Match returns 304."""
+        from app.core.config import settings
+        from app.services.pdf import sweep_invoice_pdfs
+
+        monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+        renders = self._fake_renderer(monkeypatch)
+        invoice = await self._seed_invoice(db_session, "PDF-1")
+        url = f"/api/v1/invoices/{invoice.id}/pdf"
+
+        response = await async_client.get(url, headers=sales_auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        etag = response.headers["etag"]
+        await db_session.refresh(invoice)
+        first_path = invoice.pdf_path
+        assert first_path == f"invoices/{invoice.id}/{etag.strip(chr(34))}.pdf"
+        assert (tmp_path / first_path).exists()
+
+        # Served from the cached file
+        response = await async_client.get(url, headers=sales_auth_headers)
+        assert response.status_code == 200
+        assert response.headers["etag"] == etag
+        assert response.content == b"%PDF-1.4 0.00"
+        assert len(renders) == 1
+
+        response = await async_client.get(url, headers={**sales_auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+        assert len(renders) == 1
+
+        # A payment changes the digest: re-rendered, and the superseded file
+        # kept for requests still streaming it until the sweep's grace period ends
+        invoice.paid = Decimal("50.00")
+        await db_session.commit()
+        response = await async_client.get(url, headers={**sales_auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert len(renders) == 2
+        await db_session.refresh(invoice)
+        assert invoice.pdf_path != first_path
+        assert (tmp_path / invoice.pdf_path).exists()
+        assert (tmp_path / first_path).exists()
+
+        assert await sweep_invoice_pdfs(db_session, invoice.id) == 0
+        assert await sweep_invoice_pdfs(db_session, grace_seconds=0) == 1
+        assert not (tmp_path / first_path).exists()
+        assert (tmp_path / invoice.pdf_path).exists()
+
+    @pytest.mark.asyncio
+    async def test_pdf_endpoint_keeps_concurrent_render(self, async_client: AsyncClient, sales_auth_headers: dict, db_session: AsyncSession, monkeypatch, tmp_path):
+        """A render finishing after another request stored a newer PDF neither overwrites nor deletes it."""
+        from sqlalchemy import update
+        from app.core.config import settings
+        from app.db.session import AsyncSessionLocal
+
+        monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+        invoice = await self._seed_invoice(db_session, "PDF-2")
+        newer_path = f"invoices/{invoice.id}/newer.pdf"
+
+        async def concurrent_request():
+            # Another request stores its render while this one is rendering
+            (tmp_path / newer_path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / newer_path).write_bytes(b"%PDF-1.4 newer")
+            async with AsyncSessionLocal() as session:
+                await session.execute(update(Invoice).where(Invoice.id == invoice.id).values(pdf_path=newer_path))
+                await session.commit()
+
+        self._fake_renderer(monkeypatch, on_render=concurrent_request)
+
+        response = await async_client.get(f"/api/v1/invoices/{invoice.id}/pdf", headers=sales_auth_headers)
+        assert response.status_code == 200
+        assert response.content == b"%PDF-1.4 0.00"
+
+        await db_session.refresh(invoice)
+        assert invoice.pdf_path == newer_path
+        # The losing render was served from memory, not left on disk
+        assert [path.name for path in (tmp_path / newer_path).parent.iterdir()] == ["newer.pdf"]
+
+    @pytest.mark.asyncio
+    async def test_pdf_endpoint_keeps_identical_concurrent_render(self, async_client: AsyncClient, sales_auth_headers: dict, db_session: AsyncSession, monkeypatch, tmp_path):
+        """A lost race against a render of the same inputs keeps the file both requests share."""
+        from sqlalchemy import update
+        from app.core.config import settings
+        from app.db.session import AsyncSessionLocal
+        from app.services.pdf import invoice_pdf_digest, invoice_pdf_path
+
+        monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+        invoice = await self._seed_invoice(db_session, "PDF-3")
+        stored = []
+
+        async def render(snapshot):
+            # Another request stores the same render while this one is rendering
+            stored.append(invoice_pdf_path(invoice.id, invoice_pdf_digest(snapshot)))
+            async with AsyncSessionLocal() as session:
+                await session.execute(update(Invoice).where(Invoice.id == invoice.id).values(pdf_path=stored[0]))
+                await session.commit()
+            return b"%PDF-1.4 same"
+
+        monkeypatch.setattr("app.api.invoices.render_invoice_pdf", render)
+
+        response = await async_client.get(f"/api/v1/invoices/{invoice.id}/pdf", headers=sales_auth_headers)
+        assert response.status_code == 200
+        assert response.content == b"%PDF-1.4 same"
+
+        await db_session.refresh(invoice)
+        assert invoice.pdf_path == stored[0]
+        assert (tmp_path / stored[0]).exists()
+
+    @pytest.mark.asyncio
+    async def test_pdf_endpoint_full_render_queue(self, async_client: AsyncClient, sales_auth_headers: dict, db_session: AsyncSession, monkeypatch, tmp_path):
+        """A full render queue answers 503 instead of waiting."""
+        from app.core.config import settings
+        from app.services.pdf import RenderQueueFull
+
+        monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+        invoice = await self._seed_invoice(db_session, "PDF-4")
+
+        async def render(snapshot):
+            raise RenderQueueFull()
+
+        monkeypatch.setattr("app.api.invoices.render_invoice_pdf", render)
+
+        response = await async_client.get(f"/api/v1/invoices/{invoice.id}/pdf", headers=sales_auth_headers)
+        assert response.status_code == 503
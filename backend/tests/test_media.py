@@ -0,0 +1,89 @@
+"""Tests for media storage."""
+import hashlib
+import io
+import os
+
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from app.services.media import save_upload, guess_mime, UploadTooLargeError
+
+
+def _upload(data: bytes, filename: str = "photo.jpg", content_type: str = "image/jpeg") -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(data),
+        filename=filename,
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+class TestMediaStorage:
+    """Test streaming uploads to the media store."""
+
+    @pytest.mark.asyncio
+    async def test_save_upload_streams_and_hashes(self, tmp_path):
+        """The stored file matches the upload and its size and SHA-256 are reported."""
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        path = tmp_path / "workorders" / "1" / "before" / "photo.jpg"
+
+        stored = await save_upload(_upload(data), str(path))
+
+        assert path.read_bytes() == data
+        assert stored.size == len(data)
+        assert stored.sha256 == hashlib.sha256(data).hexdigest()
+        assert stored.mime == "image/jpeg"
+
+    @pytest.mark.asyncio
+    async def test_save_upload_rejects_oversized_files(self, tmp_path):
+        """Oversized uploads raise and leave nothing behind."""
+        path = tmp_path / "video.mp4"
+
+        with pytest.raises(UploadTooLargeError):
+            await save_upload(_upload(b"x" * 2048, "video.mp4", "video/mp4"), str(path), max_bytes=1024)
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_guess_mime_falls_back_to_extension(self):
+        """Generic client content types are replaced by the extension's type."""
+        assert guess_mime(_upload(b"", "walkaround.mp4", "application/octet-stream")) == "video/mp4"
+        assert guess_mime(_upload(b"", "notes.bin", "application/octet-stream")) == "application/octet-stream"
+
+
+class TestMediaRenditions:
+    """Test thumbnail rendition generation and selection."""
+
+    def test_render_image_renditions(self, tmp_path):
+        """Each width narrower than the original gets a WebP and a JPEG copy."""
+        from PIL import Image
+        from app.services.media import render_image_renditions
+
+        original = tmp_path / "workorders" / "1" / "before" / "photo.png"
+        original.parent.mkdir(parents=True)
+        Image.new("RGBA", (800, 600), (10, 20, 30, 128)).save(original)
+
+        renditions = render_image_renditions("workorders/1/before/photo.png", [200, 480, 1024], str(tmp_path))
+
+        assert sorted((r["width"], r["format"]) for r in renditions) == [
+            (200, "jpeg"), (200, "webp"), (480, "jpeg"), (480, "webp")
+        ]
+        for rendition in renditions:
+            with Image.open(tmp_path / rendition["path"]) as image:
+                assert image.size == (rendition["width"], rendition["height"])
+                assert image.format == ("WEBP" if rendition["format"] == "webp" else "JPEG")
+        assert renditions[0]["path"].startswith("workorders/1/before/renditions/photo_w200.")
+
+    def test_pick_rendition(self):
+        """The smallest rendition at least as wide as requested wins; otherwise the original."""
+        from types import SimpleNamespace
+        from app.services.media import pick_rendition
+
+        media = SimpleNamespace(renditions=[
+            SimpleNamespace(width=width, format=fmt, path=f"r_{width}.{fmt}")
+            for width in (200, 480, 1024) for fmt in ("webp", "jpeg")
+        ])
+
+        assert pick_rendition(media, 300, "image/webp,*/*").path == "r_480.webp"
+        assert pick_rendition(media, 300, "image/jpeg").path == "r_480.jpeg"
+        assert pick_rendition(media, 200, "").path == "r_200.jpeg"
+        assert pick_rendition(media, 2000, "image/webp") is None
+        assert pick_rendition(media, None, "image/webp") is None
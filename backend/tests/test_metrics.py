@@ -0,0 +1,96 @@
+"""Tests for the /metrics endpoint and metric types."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsRegistry, http_requests_total, http_request_duration_seconds, notifications_sent_total
+from app.core.middleware import MetricsMiddleware
+from app.main import app as main_app
+from app.services.notify import NotificationService, ConsoleEmailDriver, ConsoleWhatsAppDriver
+
+
+class TestMetricsRegistry:
+    """Text exposition format."""
+
+    def test_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs_total", "Jobs run.", ("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind='b"c')
+        registry.gauge("queue_depth", "Queued jobs.", lambda: 3)
+        registry.gauge("broken", "Raises.", lambda: 1 / 0)
+
+        text = registry.render()
+        assert "# TYPE jobs_total counter" in text
+        assert 'jobs_total{kind="a"} 1' in text
+        assert 'jobs_total{kind="b\\"c"} 2' in text
+        assert "queue_depth 3" in text
+        assert "# TYPE broken gauge" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, route="/x")
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/x",le="1"} 2' in text
+        assert 'latency_seconds_bucket{route="/x",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{route="/x"} 3' in text
+        assert 'latency_seconds_sum{route="/x"} 5.55' in text
+
+    def test_registering_twice_returns_existing_metric(self):
+        registry = MetricsRegistry()
+        assert registry.counter("a_total", "A.") is registry.counter("a_total", "A.")
+
+
+class TestMetricsMiddleware:
+    """Requests are labelled by route template, not raw path."""
+
+    def test_uses_route_template(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/things/{thing_id}")
+        async def get_thing(thing_id: int):
+            return {"id": thing_id}
+
+        client = TestClient(app)
+        before = http_requests_total.value(method="GET", route="/things/{thing_id}", status=200)
+        client.get("/things/1")
+        client.get("/things/2")
+        client.get("/nowhere")
+
+        assert http_requests_total.value(method="GET", route="/things/{thing_id}", status=200) == before + 2
+        assert http_requests_total.value(method="GET", route="<unmatched>", status=404) >= 1
+        assert http_request_duration_seconds.count(method="GET", route="/things/{thing_id}") >= 2
+
+    def test_metrics_endpoint(self):
+        client = TestClient(main_app)
+        client.get("/health")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
+        assert "# TYPE db_pool_checked_out gauge" in response.text
+        assert "# TYPE pdf_render_duration_seconds histogram" in response.text
+
+
+class TestNotificationMetrics:
+    """Notification sends are counted by channel, driver and outcome."""
+
+    @pytest.mark.asyncio
+    async def test_counts_sends(self):
+        service = NotificationService()
+        service.email_driver = ConsoleEmailDriver()
+        service.whatsapp_driver = ConsoleWhatsAppDriver()
+        email_before = notifications_sent_total.value(channel="email", driver="console", outcome="sent")
+        whatsapp_before = notifications_sent_total.value(channel="whatsapp", driver="console", outcome="sent")
+
+        await service.send_email("a@example.com", "Hi", "<p>Hi</p>")
+        await service.send_whatsapp_many([("+1", "Hi", []), ("+2", "Hi", [])])
+
+        assert notifications_sent_total.value(channel="email", driver="console", outcome="sent") == email_before + 1
+        assert notifications_sent_total.value(channel="whatsapp", driver="console", outcome="sent") == whatsapp_before + 2
@@ -0,0 +1,61 @@
+"""Tests for name and phone search keys."""
+from app.db.models import Customer
+from app.db.models.customer import search_key_values
+from app.utils.normalize import normalize_name, normalize_phone, phone_search_key
+
+
+class TestNormalizeName:
+    """Arabic spelling variants fold to one key."""
+
+    def test_diacritics_and_tatweel(self):
+        assert normalize_name("مُحَمَّد") == normalize_name("محمّد") == normalize_name("مـحـمـد") == "محمد"
+
+    def test_letter_variants(self):
+        assert normalize_name("أحمد") == normalize_name("إحمد") == normalize_name("احمد")
+        assert normalize_name("مصطفى") == normalize_name("مصطفي")
+        assert normalize_name("فاطمة") == normalize_name("فاطمه")
+
+    def test_latin_case_and_spaces(self):
+        assert normalize_name("  Mohammed   ALI ") == "mohammed ali"
+        assert normalize_name("") is None
+        assert normalize_name(None) is None
+
+
+class TestNormalizePhone:
+    """Phones as E.164 digits."""
+
+    def test_national_and_international_formats(self):
+        assert normalize_phone("+967-1-234-567") == "9671234567"
+        assert normalize_phone("01234567") == "9671234567"
+        assert normalize_phone("777 123 456") == "967777123456"
+        assert normalize_phone("00967777123456") == "967777123456"
+        assert normalize_phone("967777123456") == "967777123456"
+        assert normalize_phone("+1 (555) 010-9999") == "15550109999"
+
+    def test_arabic_indic_digits(self):
+        assert normalize_phone("٧٧٧١٢٣٤٥٦") == "967777123456"
+
+    def test_no_digits(self):
+        assert normalize_phone("n/a") is None
+        assert normalize_phone(None) is None
+
+    def test_search_key_drops_prefixes(self):
+        assert phone_search_key("01234") == "1234"
+        assert phone_search_key("+967 1 234") == "9671234"
+        assert phone_search_key("00967 777") == "967777"
+        assert phone_search_key("Ali") is None
+
+
+class TestCustomerSearchKeys:
+    """Shadow columns are kept in step with name and phone."""
+
+    def test_set_on_construction_and_assignment(self):
+        customer = Customer(name="أحمد", phone="01234567")
+        assert (customer.name_norm, customer.phone_norm) == ("احمد", "9671234567")
+        customer.phone = None
+        assert customer.phone_norm is None
+
+    def test_bulk_update_values(self):
+        assert search_key_values({"name": "مُحَمَّد", "email": "x@example.com"}) == {"name_norm": "محمد"}
+        assert search_key_values({"phone": "+967-1-234-567"}) == {"phone_norm": "9671234567"}
+        assert search_key_values({"address": "Sanaa"}) == {}
@@ -0,0 +1,84 @@
+"""Tests for the localized notification templates."""
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.notification_templates import (
+    NotificationTemplates, notification_templates, customer_language, money
+)
+
+
+def approval_context(**overrides):
+    context = {
+        "customer_name": "Ali <Saleh>",
+        "vehicle": "2020 Toyota Prius (ABC-123)",
+        "work_order_id": 42,
+        "complaint": None,
+        "est_total": Decimal("150.5"),
+        "approval_url": "http://localhost:5000/public/approve/token",
+    }
+    context.update(overrides)
+    return context
+
+
+class TestNotificationTemplates:
+    """Template registry loading and rendering."""
+
+    def test_loads_every_message_in_both_languages(self):
+        registry = NotificationTemplates()
+        assert registry.load() == 8
+        for name in ("approval_email", "approval_whatsapp", "pickup_email", "pickup_whatsapp"):
+            for language in ("ar", "en"):
+                assert registry.get(name, language) is not None
+
+    def test_email_exports_subject_and_escapes_html(self):
+        message = notification_templates.render("approval_email", "en", approval_context())
+        assert message.subject == "Service Approval Required - Work Order #42"
+        assert "Ali &lt;Saleh&gt;" in message.body
+        assert "$150.50" in message.body
+        assert "Service required" in message.body
+
+    def test_whatsapp_is_plain_text(self):
+        message = notification_templates.render("approval_whatsapp", "en", approval_context(est_total=None))
+        assert message.subject is None
+        assert message.body.startswith("🔧 *Yemen Hybrid Service Center*")
+        assert "Ali <Saleh>" in message.body
+        assert "*Total Estimate:* TBD" in message.body
+
+    def test_arabic_variant(self):
+        message = notification_templates.render("approval_email", "ar", approval_context())
+        assert message.subject == "مطلوب الموافقة على الخدمة - أمر العمل رقم 42"
+        assert 'dir="rtl"' in message.body
+
+    def test_pickup_photos_use_renditions(self):
+        context = approval_context(final_cost=Decimal("99"), photo_urls=["http://x/a.jpg", "http://x/b.jpg"])
+        message = notification_templates.render("pickup_email", "en", context)
+        assert 'src="http://x/a.jpg?w=480"' in message.body
+        assert message.body.count("<img") == 2
+        assert "$99.00" in message.body
+
+    def test_unknown_language_falls_back_to_default(self):
+        message = notification_templates.render("pickup_whatsapp", "fr", approval_context(final_cost=None, photo_urls=[]))
+        assert "Final cost TBD" in message.body
+
+    def test_missing_context_raises(self):
+        with pytest.raises(Exception):
+            notification_templates.render("approval_whatsapp", "en", {"customer_name": "Ali"})
+
+
+class TestCustomerLanguage:
+    """Language selection per customer."""
+
+    def test_stored_preference_wins(self):
+        assert customer_language(SimpleNamespace(name="علي", language="en")) == "en"
+
+    def test_arabic_name_without_preference(self):
+        assert customer_language(SimpleNamespace(name="علي صالح", language=None)) == "ar"
+
+    def test_default_language(self):
+        assert customer_language(SimpleNamespace(name="Ali Saleh", language=None)) == "en"
+
+    def test_money(self):
+        assert money(Decimal("12.3")) == "$12.30"
+        assert money(None) is None
@@ -0,0 +1,265 @@
+"""Tests for notification drivers."""
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from app.core.config import settings
+from app.services.notify import SMTPConnectionPool, SMTPEmailDriver, TwilioWhatsAppDriver, TokenBucket
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, MAIL, RCPT, DATA, NOOP, RSET, QUIT."""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 localhost SMTP stand-in")
+        in_data, lines = False, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line.rstrip(b"\r\n") == b".":
+                    in_data = False
+                    with server.lock:
+                        server.messages.append(b"".join(lines))
+                    lines = []
+                    self.reply("250 OK queued")
+                    if server.drop_after_message:
+                        return
+                else:
+                    lines.append(line)
+                continue
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250-localhost")
+                self.reply("250 8BITMIME")
+            elif command == "NOOP":
+                with server.lock:
+                    server.noops += 1
+                self.reply("250 OK")
+            elif command == "DATA":
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            elif command.startswith("RCPT") and any(to.upper() in command for to in server.rejected_recipients):
+                self.reply("550 No such user here")
+            elif command.split(" ")[0] in ("HELO", "MAIL", "RCPT", "RSET"):
+                self.reply("250 OK")
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.noops = 0
+        self.messages = []
+        self.drop_after_message = False
+        self.rejected_recipients = set()
+
+
+@pytest.fixture
+def smtp_server():
+    server = _SMTPStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _driver(server, **pool_options) -> SMTPEmailDriver:
+    host, port = server.server_address
+    pool = SMTPConnectionPool(host, port, starttls=False, timeout=5, **pool_options)
+    driver = SMTPEmailDriver(pool=pool)
+    driver.smtp_user = "workshop@example.com"
+    return driver
+
+
+class TestSMTPConnectionPool:
+    """Test pooled SMTP sessions against a local stand-in server."""
+
+    @pytest.mark.asyncio
+    async def test_send_many_reuses_sessions(self, smtp_server):
+        """A batch goes over at most pool-size connections."""
+        driver = _driver(smtp_server, size=2)
+        try:
+            results = await driver.send_many([
+                (f"customer{i}@example.com", f"Reminder {i}", f"<p>Invoice {i} is due</p>") for i in range(20)
+            ])
+        finally:
+            driver.close()
+
+        assert results == [True] * 20
+        assert len(smtp_server.messages) == 20
+        assert smtp_server.connections <= 2
+        assert b"Subject: Reminder 7" in b"".join(smtp_server.messages)
+
+    @pytest.mark.asyncio
+    async def test_idle_sessions_are_probed_and_replaced(self, smtp_server):
+        """Idle sessions get a NOOP, and dead ones are replaced transparently."""
+        driver = _driver(smtp_server, size=1, noop_after=0)
+        try:
+            assert await driver.send_email("a@example.com", "One", "<p>1</p>")
+            assert await driver.send_email("b@example.com", "Two", "<p>2</p>")
+            assert smtp_server.noops == 1
+            assert smtp_server.connections == 1
+
+            smtp_server.drop_after_message = True
+            assert await driver.send_email("c@example.com", "Three", "<p>3</p>")
+            assert await driver.send_email("d@example.com", "Four", "<p>4</p>")
+        finally:
+            driver.close()
+
+        assert len(smtp_server.messages) == 4
+        assert smtp_server.connections == 2
+
+    @pytest.mark.asyncio
+    async def test_send_retries_on_dropped_connection(self, smtp_server):
+        """A session the server closed is reconnected without failing the send."""
+        driver = _driver(smtp_server, size=1, noop_after=3600)
+        try:
+            smtp_server.drop_after_message = True
+            assert await driver.send_email("a@example.com", "One", "<p>1</p>")
+            assert await driver.send_email("b@example.com", "Two", "<p>2</p>")
+        finally:
+            driver.close()
+
+        assert len(smtp_server.messages) == 2
+        assert smtp_server.connections == 2
+
+    @pytest.mark.asyncio
+    async def test_rejected_recipient_keeps_session(self, smtp_server):
+        """A refused recipient fails that send only; the session is reused, not reconnected."""
+        smtp_server.rejected_recipients.add("nobody@example.com")
+        driver = _driver(smtp_server, size=1, noop_after=3600)
+        try:
+            assert await driver.send_email("nobody@example.com", "One", "<p>1</p>") is False
+            assert await driver.send_email("a@example.com", "Two", "<p>2</p>")
+        finally:
+            driver.close()
+
+        assert len(smtp_server.messages) == 1
+        assert smtp_server.connections == 1
+
+
+class _TwilioHandler(BaseHTTPRequestHandler):
+    """Accepts POST .../Messages.json like the Twilio API, on keep-alive connections."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.peers.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(0.01)
+            form = parse_qs(body.decode())
+            with server.lock:
+                server.requests.append((self.path, self.headers.get("Authorization"), form))
+                sid = f"SM{len(server.requests):032d}"
+            payload = json.dumps({"sid": sid}).encode()
+            self.send_response(201)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+class _TwilioStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _TwilioHandler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.peers = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+@pytest.fixture
+def twilio_server():
+    server = _TwilioStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestTwilioWhatsAppDriver:
+    """Test batched WhatsApp sends against a local Twilio API stand-in."""
+
+    @pytest.mark.asyncio
+    async def test_send_whatsapp_many_is_limited_and_throttled(self, twilio_server, monkeypatch):
+        """Batches reuse connections, respect the concurrency limit and the rate limit."""
+        monkeypatch.setattr(settings, "whatsapp_sid", "AC123")
+        monkeypatch.setattr(settings, "whatsapp_token", "secret")
+        monkeypatch.setattr(settings, "whatsapp_from", "+15550000000")
+        monkeypatch.setattr(settings, "whatsapp_max_concurrency", 3)
+        monkeypatch.setattr(settings, "whatsapp_rate_per_second", 100.0)
+        monkeypatch.setattr(settings, "whatsapp_burst", 5)
+        host, port = twilio_server.server_address
+        driver = TwilioWhatsAppDriver(api_base=f"http://{host}:{port}")
+
+        started = time.monotonic()
+        try:
+            results = await driver.send_whatsapp_many([
+                (f"+96770000{i:04d}", f"Reminder {i}", ["http://example.com/a.jpg"] if i == 0 else [])
+                for i in range(40)
+            ])
+        finally:
+            await driver.aclose()
+        elapsed = time.monotonic() - started
+
+        assert results == [True] * 40
+        assert len(twilio_server.requests) == 40
+        assert twilio_server.max_in_flight <= 3
+        assert len(twilio_server.peers) <= 3
+        # 5 burst tokens, then 100/s for the other 35
+        assert elapsed >= 0.3
+
+        path, authorization, form = twilio_server.requests[0]
+        assert path == "/2010-04-01/Accounts/AC123/Messages.json"
+        assert authorization.startswith("Basic ")
+        assert form["From"] == ["whatsapp:+15550000000"]
+        assert any(r[2].get("MediaUrl") == ["http://example.com/a.jpg"] for r in twilio_server.requests)
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_allows_burst_then_rate(self):
+        """The bucket lets a burst through immediately and spaces out the rest."""
+        bucket = TokenBucket(rate=50.0, capacity=5)
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        assert time.monotonic() - started < 0.05
+        for _ in range(5):
+            await bucket.acquire()
+        assert time.monotonic() - started >= 0.09
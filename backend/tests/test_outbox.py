@@ -0,0 +1,92 @@
+"""Tests for the notification outbox."""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import NotificationOutbox, OutboxStatus
+from app.services.outbox import OutboxDispatcher, enqueue_email, enqueue_whatsapp, backoff_delay, utcnow
+
+
+class FakeSender:
+    """Stands in for the notification service, failing the first ``failures`` sends."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.sent = []
+
+    async def send_email(self, to, subject, html):
+        return self._record(("email", to, subject))
+
+    async def send_whatsapp(self, to, text, media_urls=None):
+        return self._record(("whatsapp", to, tuple(media_urls or ())))
+
+    def _record(self, message):
+        if self.failures > 0:
+            self.failures -= 1
+            return False
+        self.sent.append(message)
+        return True
+
+
+async def _make_due(db_session: AsyncSession, message: NotificationOutbox) -> None:
+    await db_session.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id == message.id)
+        .values(next_attempt_at=utcnow() - timedelta(seconds=1))
+    )
+    await db_session.commit()
+
+
+class TestNotificationOutbox:
+    """Test queuing and dispatching outbox messages."""
+
+    @pytest.mark.asyncio
+    async def test_dispatch_sends_committed_messages(self, db_session: AsyncSession):
+        """Committed messages are sent once and marked sent."""
+        email = enqueue_email(db_session, "outbox@example.com", "Ready", "<p>Ready</p>", "work_order", 1)
+        whatsapp = enqueue_whatsapp(db_session, "+967700000000", "Ready", ["http://x/a.jpg"])
+        await db_session.commit()
+
+        sender = FakeSender()
+        dispatcher = OutboxDispatcher(sender=sender)
+        while await dispatcher.dispatch_once():
+            pass
+
+        await db_session.refresh(email)
+        await db_session.refresh(whatsapp)
+        assert email.status == OutboxStatus.SENT.value
+        assert whatsapp.status == OutboxStatus.SENT.value
+        assert ("email", "outbox@example.com", "Ready") in sender.sent
+        assert ("whatsapp", "+967700000000", ("http://x/a.jpg",)) in sender.sent
+
+    @pytest.mark.asyncio
+    async def test_failures_back_off_then_dead_letter(self, db_session: AsyncSession, monkeypatch):
+        """Failed sends are rescheduled with backoff and dead-lettered after the last attempt."""
+        monkeypatch.setattr(settings, "outbox_max_attempts", 2)
+        message = enqueue_email(db_session, "retry@example.com", "Retry", "<p>Retry</p>")
+        await db_session.commit()
+
+        dispatcher = OutboxDispatcher(sender=FakeSender(failures=100))
+        await dispatcher.dispatch_once()
+        await db_session.refresh(message)
+        assert message.status == OutboxStatus.PENDING.value
+        assert message.attempts == 1
+        assert message.last_error
+        assert message.next_attempt_at.replace(tzinfo=None) > utcnow().replace(tzinfo=None)
+
+        await _make_due(db_session, message)
+        await dispatcher.dispatch_once()
+        await db_session.refresh(message)
+        assert message.status == OutboxStatus.DEAD.value
+        assert message.attempts == 2
+
+    def test_backoff_grows_and_is_capped(self, monkeypatch):
+        """Backoff doubles per attempt within jitter bounds and never exceeds the cap."""
+        monkeypatch.setattr(settings, "outbox_backoff_base_seconds", 10.0)
+        monkeypatch.setattr(settings, "outbox_backoff_max_seconds", 60.0)
+        assert 5.0 <= backoff_delay(1) <= 10.0
+        assert 10.0 <= backoff_delay(2) <= 20.0
+        assert 30.0 <= backoff_delay(10) <= 60.0
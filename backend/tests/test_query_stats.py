@@ -0,0 +1,82 @@
+"""Tests for per-request SQL statement stats and query budgets."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.middleware import QueryStatsMiddleware
+from app.db.query_stats import QueryStats, fingerprint, current_query_stats, track_queries
+from app.db.session import AsyncSessionLocal
+
+
+def make_app(queries: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, server_timing=True)
+
+    @app.get("/queries")
+    async def run_queries():
+        async with AsyncSessionLocal() as db:
+            for i in range(queries):
+                await db.execute(text("SELECT :n"), {"n": i})
+        return {"seen": current_query_stats().count}
+
+    return app
+
+
+class TestQueryStats:
+    """Fingerprints and repeated-statement detection."""
+
+    def test_fingerprint_collapses_whitespace_and_in_lists(self):
+        assert fingerprint("SELECT *\n  FROM a WHERE id IN (?, ?, ?)") == "SELECT * FROM a WHERE id IN (...)"
+        assert fingerprint("SELECT * FROM a WHERE id IN ($1, $2)") == fingerprint("SELECT * FROM a WHERE id IN ($1, $2, $3)")
+
+    def test_repeated(self):
+        stats = QueryStats()
+        for _ in range(3):
+            stats.record("SELECT * FROM parts WHERE id = ?", 1000)
+        stats.record("SELECT 1", 1000)
+        assert stats.count == 4
+        assert stats.repeated() == [("SELECT * FROM parts WHERE id = ?", 3)]
+        assert "3x SELECT * FROM parts" in stats.report()
+
+    @pytest.mark.asyncio
+    async def test_track_queries(self, db_session):
+        with track_queries() as stats:
+            for _ in range(3):
+                await db_session.execute(text("SELECT 1"))
+        assert stats.count == 3
+        assert stats.total_ns > 0
+
+
+class TestQueryStatsMiddleware:
+    """Per-request stats and the Server-Timing header."""
+
+    def test_server_timing_header(self):
+        client = TestClient(make_app(queries=4))
+        response = client.get("/queries")
+
+        assert response.json() == {"seen": 4}
+        header = response.headers["server-timing"]
+        assert header.startswith("db;dur=")
+        assert 'desc="4 queries, 4 repeated"' in header
+
+    def test_header_disabled(self):
+        app = FastAPI()
+        app.add_middleware(QueryStatsMiddleware, server_timing=False)
+
+        @app.get("/")
+        async def root():
+            return {}
+
+        assert "server-timing" not in TestClient(app).get("/").headers
+
+    def test_query_budget_passes(self, query_budget):
+        client = TestClient(make_app(queries=2))
+        with query_budget(2):
+            client.get("/queries")
+
+    def test_query_budget_fails(self, query_budget):
+        client = TestClient(make_app(queries=3))
+        with pytest.raises(AssertionError, match="Query budget exceeded: 3 statements, budget 2"):
+            with query_budget(2):
+                client.get("/queries")
@@ -0,0 +1,110 @@
+"""Tests for the work order report endpoint."""
+import pytest
+from datetime import datetime
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.customer import Customer
+from app.db.models.vehicle import Vehicle
+from app.db.models.work_order import WorkOrder, WorkOrderStatus
+from app.db.models import User, UserRole
+
+
+async def _seed(db_session: AsyncSession, email: str, plate_no: str) -> tuple:
+    """A technician with work orders over three days; the report is filtered by tech to isolate them."""
+    tech = User(full_name="Report Tech", email=email, role=UserRole.engineer, password_hash="x")
+    customer = Customer(name="Report Customer", phone="123456")
+    db_session.add_all([tech, customer])
+    await db_session.flush()
+
+    vehicle = Vehicle(customer_id=customer.id, plate_no=plate_no, make="Toyota", model="Prius")
+    db_session.add(vehicle)
+    await db_session.flush()
+
+    seeded = [
+        (datetime(2025, 3, 1, 8, 0), WorkOrderStatus.NEW),
+        (datetime(2025, 3, 1, 23, 30), WorkOrderStatus.DONE),
+        (datetime(2025, 3, 2, 10, 0), WorkOrderStatus.DONE),
+        (datetime(2025, 3, 2, 10, 0), WorkOrderStatus.CLOSED),
+        (datetime(2025, 3, 2, 10, 0), WorkOrderStatus.DONE),
+        (datetime(2025, 3, 4, 0, 15), WorkOrderStatus.NEW),
+        (datetime(2025, 3, 4, 16, 45), WorkOrderStatus.DONE),
+    ]
+    workorders = [
+        WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, created_by=tech.id, created_at=created_at, status=status)
+        for created_at, status in seeded
+    ]
+    db_session.add_all(workorders)
+    await db_session.commit()
+    return tech, workorders
+
+
+class TestWorkOrderReport:
+    """Test /reports/workorders series and pagination."""
+
+    @pytest.mark.asyncio
+    async def test_series_match_seeded_data(self, async_client: AsyncClient, auth_headers: dict, db_session: AsyncSession):
+        """Test by_status and by_day count the seeded work orders."""
+        tech, _ = await _seed(db_session, "report-tech-1@example.com", "RPT-1")
+
+        response = await async_client.get("/api/v1/reports/workorders", params={"tech": tech.id}, headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_count"] == 7
+        assert {entry["label"]: entry["value"] for entry in data["by_status"]} == {"new": 2, "done": 4, "closed": 1}
+        assert data["by_day"] == [
+            {"label": "2025-03-01", "value": 2},
+            {"label": "2025-03-02", "value": 3},
+            {"label": "2025-03-04", "value": 2},
+        ]
+
+        # Filters apply to the series as well as the list
+        response = await async_client.get(
+            "/api/v1/reports/workorders", params={"tech": tech.id, "status": "done"}, headers=auth_headers
+        )
+        data = response.json()
+        assert data["total_count"] == 4
+        assert data["by_day"] == [
+            {"label": "2025-03-01", "value": 1},
+            {"label": "2025-03-02", "value": 2},
+            {"label": "2025-03-04", "value": 1},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_cursor_walks_every_work_order(self, async_client: AsyncClient, auth_headers: dict, db_session: AsyncSession):
+        """Test following next_cursor returns each work order once, newest first."""
+        tech, workorders = await _seed(db_session, "report-tech-2@example.com", "RPT-2")
+        expected = [
+            workorder.id
+            for workorder in sorted(workorders, key=lambda workorder: (workorder.created_at, workorder.id), reverse=True)
+        ]
+
+        seen_ids = []
+        cursor = None
+        for _ in range(len(workorders)):
+            params = {"tech": tech.id, "size": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await async_client.get("/api/v1/reports/workorders", params=params, headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()
+            # The series always cover the whole filter, not the page
+            assert data["total_count"] == len(workorders)
+            seen_ids.extend(item["id"] for item in data["work_orders"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        assert seen_ids == expected
+        assert cursor is None
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self, async_client: AsyncClient, auth_headers: dict):
+        """Test a malformed cursor is rejected."""
+        response = await async_client.get(
+            "/api/v1/reports/workorders", params={"cursor": "not-a-cursor"}, headers=auth_headers
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
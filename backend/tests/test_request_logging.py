@@ -0,0 +1,96 @@
+"""Tests for structured logging and the request-logging middleware."""
+import io
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.logging_config import JsonFormatter
+from app.core.middleware import RequestLoggingMiddleware
+
+
+def make_app(sample_rate: float = 1.0) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, sample_rate=sample_rate)
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/missing")
+    async def missing():
+        raise HTTPException(status_code=404, detail="Not found")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+def request_records(caplog):
+    return [r for r in caplog.records if r.name == "app.requests"]
+
+
+class TestRequestLoggingMiddleware:
+    """One structured record per request."""
+
+    def test_logs_one_record_per_request(self, caplog):
+        caplog.set_level(logging.INFO, logger="app.requests")
+        client = TestClient(make_app())
+        assert client.get("/ok?x=1").status_code == 200
+
+        records = request_records(caplog)
+        assert len(records) == 1
+        fields = records[0].fields
+        assert fields["method"] == "GET"
+        assert fields["path"] == "/ok"
+        assert fields["query"] == "x=1"
+        assert fields["status_code"] == 200
+        assert fields["duration_ms"] >= 0
+
+    def test_samples_only_successful_requests(self, caplog):
+        caplog.set_level(logging.INFO, logger="app.requests")
+        client = TestClient(make_app(sample_rate=0.0))
+        client.get("/ok")
+        client.get("/missing")
+
+        records = request_records(caplog)
+        assert [r.fields["status_code"] for r in records] == [404]
+        assert records[0].levelno == logging.WARNING
+
+    def test_unhandled_error_returns_json_500(self, caplog):
+        caplog.set_level(logging.INFO, logger="app.requests")
+        client = TestClient(make_app())
+        response = client.get("/boom")
+
+        assert response.status_code == 500
+        assert response.json()["error"]["code"] == "INTERNAL_ERROR"
+        records = request_records(caplog)
+        assert len(records) == 1
+        assert records[0].levelno == logging.ERROR
+        assert records[0].exc_info is not None
+
+
+class TestJsonFormatter:
+    """Log lines are valid JSON with the structured fields merged in."""
+
+    def test_formats_fields(self):
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JsonFormatter())
+        test_logger = logging.getLogger("tests.json_formatter")
+        test_logger.addHandler(handler)
+        test_logger.propagate = False
+        try:
+            test_logger.warning('said "hi"', extra={"fields": {"path": "/x", "status_code": 404}})
+        finally:
+            test_logger.removeHandler(handler)
+
+        entry = json.loads(stream.getvalue())
+        assert entry["message"] == 'said "hi"'
+        assert entry["level"] == "WARNING"
+        assert entry["path"] == "/x"
+        assert entry["status_code"] == 404
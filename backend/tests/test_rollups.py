@@ -0,0 +1,177 @@
+"""Tests for daily KPI rollup maintenance."""
+import pytest
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from app.db.models.customer import Customer
+from app.db.models.vehicle import Vehicle
+from app.db.models.work_order import WorkOrder, WorkOrderStatus
+from app.db.models import Invoice, DailyWorkOrderStatus, DailyRevenue, User, UserRole
+from app.api.workorders import finish_workorder, close_workorder
+from app.services.rollups import rebuild_rollups, start_of_day, utc_today
+
+
+async def _status_total(db_session: AsyncSession, status: WorkOrderStatus) -> int:
+    result = await db_session.execute(
+        select(func.coalesce(func.sum(DailyWorkOrderStatus.count), 0))
+        .where(DailyWorkOrderStatus.status == status.value)
+    )
+    return int(result.scalar())
+
+
+class TestDailyRollups:
+    """Test rollups follow work order and invoice writes."""
+
+    @pytest.mark.asyncio
+    async def test_status_change_moves_bucket(self, db_session: AsyncSession):
+        """Test creating and finishing a work order updates status rollups."""
+        customer = Customer(name="Rollup Customer", phone="123456")
+        db_session.add(customer)
+        await db_session.flush()
+
+        vehicle = Vehicle(customer_id=customer.id, plate_no="RLP-1", make="Toyota", model="Prius")
+        db_session.add(vehicle)
+        await db_session.flush()
+
+        new_before = await _status_total(db_session, WorkOrderStatus.NEW)
+        done_before = await _status_total(db_session, WorkOrderStatus.DONE)
+
+        workorder = WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, created_by=1)
+        db_session.add(workorder)
+        await db_session.commit()
+        assert await _status_total(db_session, WorkOrderStatus.NEW) == new_before + 1
+
+        workorder.status = WorkOrderStatus.DONE
+        await db_session.commit()
+        assert await _status_total(db_session, WorkOrderStatus.NEW) == new_before
+        assert await _status_total(db_session, WorkOrderStatus.DONE) == done_before + 1
+
+    @pytest.mark.asyncio
+    async def test_rebuild_matches_incremental(self, db_session: AsyncSession):
+        """Test a rebuild reproduces the incrementally maintained revenue."""
+        customer = Customer(name="Rollup Customer", phone="123456")
+        db_session.add(customer)
+        await db_session.flush()
+
+        vehicle = Vehicle(customer_id=customer.id, plate_no="RLP-2", make="Toyota", model="Prius")
+        db_session.add(vehicle)
+        await db_session.flush()
+
+        workorder = WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, created_by=1)
+        db_session.add(workorder)
+        await db_session.flush()
+
+        db_session.add(Invoice(work_order_id=workorder.id, subtotal=Decimal("100.00"), total=Decimal("115.00"), paid=Decimal("0.00")))
+        await db_session.commit()
+
+        revenue_query = select(func.sum(DailyRevenue.invoiced), func.sum(DailyRevenue.invoice_count))
+        incremental = (await db_session.execute(revenue_query)).one()
+
+        await rebuild_rollups(db_session)
+        rebuilt = (await db_session.execute(revenue_query)).one()
+
+        assert rebuilt == incremental
+
+    @pytest.mark.asyncio
+    async def test_endpoint_transitions_move_bucket(self, db_session: AsyncSession):
+        """Test status changes made by the workorders endpoints update status rollups."""
+        admin = User(full_name="Rollup Admin", email="rollup-admin@example.com", role=UserRole.admin, password_hash="x")
+        customer = Customer(name="Rollup Customer", phone="123456")
+        db_session.add_all([admin, customer])
+        await db_session.flush()
+
+        vehicle = Vehicle(customer_id=customer.id, plate_no="RLP-3", make="Toyota", model="Prius")
+        db_session.add(vehicle)
+        await db_session.flush()
+
+        workorder = WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, created_by=admin.id)
+        db_session.add(workorder)
+        await db_session.commit()
+        totals = {status: await _status_total(db_session, status) for status in WorkOrderStatus}
+
+        await finish_workorder(workorder.id, current_user=admin, db=db_session)
+        assert await _status_total(db_session, WorkOrderStatus.NEW) == totals[WorkOrderStatus.NEW] - 1
+        assert await _status_total(db_session, WorkOrderStatus.DONE) == totals[WorkOrderStatus.DONE] + 1
+
+        await close_workorder(workorder.id, current_user=admin, db=db_session)
+        assert await _status_total(db_session, WorkOrderStatus.DONE) == totals[WorkOrderStatus.DONE]
+        assert await _status_total(db_session, WorkOrderStatus.CLOSED) == totals[WorkOrderStatus.CLOSED] + 1
+
+        # Closing again leaves the buckets alone
+        await close_workorder(workorder.id, current_user=admin, db=db_session)
+        assert await _status_total(db_session, WorkOrderStatus.CLOSED) == totals[WorkOrderStatus.CLOSED] + 1
+
+    @pytest.mark.asyncio
+    async def test_buckets_by_utc_day(self, db_session: AsyncSession):
+        """Test inserts, updates and rebuilds all bucket by the same UTC day."""
+        customer = Customer(name="Rollup Customer", phone="123456")
+        db_session.add(customer)
+        await db_session.flush()
+
+        vehicle = Vehicle(customer_id=customer.id, plate_no="RLP-4", make="Toyota", model="Prius")
+        db_session.add(vehicle)
+        await db_session.flush()
+
+        today = utc_today()
+        assert start_of_day(today).tzinfo == timezone.utc
+        today_query = select(DailyWorkOrderStatus.status, DailyWorkOrderStatus.count).where(
+            DailyWorkOrderStatus.day == today, DailyWorkOrderStatus.count != 0
+        ).order_by(DailyWorkOrderStatus.status)
+        before = dict((await db_session.execute(today_query)).all())
+
+        workorder = WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, created_by=1)
+        db_session.add(workorder)
+        await db_session.commit()
+        workorder.status = WorkOrderStatus.IN_PROGRESS
+        await db_session.commit()
+
+        incremental = dict((await db_session.execute(today_query)).all())
+        assert incremental.get("in_progress", 0) == before.get("in_progress", 0) + 1
+        assert incremental.get("new", 0) == before.get("new", 0)
+
+        await rebuild_rollups(db_session, today, today)
+        assert dict((await db_session.execute(today_query)).all()) == incremental
+
+    @pytest.mark.asyncio
+    async def test_explicit_created_at_buckets_by_that_day(self, db_session: AsyncSession):
+        """Test imported rows count on their created_at day, so later changes net out there."""
+        customer = Customer(name="Rollup Customer", phone="123456")
+        db_session.add(customer)
+        await db_session.flush()
+
+        vehicle = Vehicle(customer_id=customer.id, plate_no="RLP-5", make="Toyota", model="Prius")
+        db_session.add(vehicle)
+        await db_session.flush()
+
+        imported_day = date(2019, 7, 14)
+        status_query = select(DailyWorkOrderStatus.status, DailyWorkOrderStatus.count).where(
+            DailyWorkOrderStatus.day == imported_day, DailyWorkOrderStatus.count != 0
+        )
+        revenue_query = select(DailyRevenue.invoiced, DailyRevenue.invoice_count).where(DailyRevenue.day == imported_day)
+        today_before = await _status_total(db_session, WorkOrderStatus.NEW)
+
+        workorder = WorkOrder(
+            customer_id=customer.id, vehicle_id=vehicle.id, created_by=1,
+            created_at=datetime(2019, 7, 14, 23, 30, tzinfo=timezone.utc)
+        )
+        db_session.add(workorder)
+        await db_session.flush()
+        db_session.add(Invoice(
+            work_order_id=workorder.id, subtotal=Decimal("40.00"), total=Decimal("46.00"), paid=Decimal("0.00"),
+            created_at=datetime(2019, 7, 14, 23, 45, tzinfo=timezone.utc)
+        ))
+        await db_session.commit()
+        assert dict((await db_session.execute(status_query)).all()) == {"new": 1}
+        assert (await db_session.execute(revenue_query)).one() == (Decimal("46.00"), 1)
+
+        workorder.status = WorkOrderStatus.DONE
+        await db_session.commit()
+        assert dict((await db_session.execute(status_query)).all()) == {"done": 1}
+        # Only the status moved: nothing was added to or taken from today
+        assert await _status_total(db_session, WorkOrderStatus.NEW) == today_before
+
+        await rebuild_rollups(db_session, imported_day, imported_day)
+        assert dict((await db_session.execute(status_query)).all()) == {"done": 1}
+        assert (await db_session.execute(revenue_query)).one() == (Decimal("46.00"), 1)
@@ -0,0 +1,95 @@
+"""Tests for indexed customer/vehicle/part search."""
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql
+
+from app.db.models import Customer
+from app.db.models.customer import search_key_values
+from app.db.models.service import Part
+from app.db.search import apply_search
+
+
+@pytest_asyncio.fixture
+async def customers(db_session):
+    customers = [
+        Customer(name="Search Ali Hassan", phone="+967 555 918273"),
+        Customer(name="Search Mohammed Ali", phone="733999888", email="mo@search.example"),
+        Customer(name="Search محمد صالح", phone="711222333"),
+    ]
+    db_session.add_all(customers)
+    await db_session.commit()
+    ids = [c.id for c in customers]
+    yield customers
+    await db_session.execute(delete(Customer).where(Customer.id.in_(ids)))
+    await db_session.commit()
+
+
+async def search(db_session, model, q):
+    dialect = db_session.get_bind().dialect.name
+    result = await db_session.execute(apply_search(select(model.id), model, q, dialect).order_by(model.id))
+    return result.scalars().all()
+
+
+class TestSearch:
+    """Substring matching through the trigram index."""
+
+    @pytest.mark.asyncio
+    async def test_matches_any_column_case_insensitively(self, db_session, customers):
+        ids = [c.id for c in customers]
+        assert set(await search(db_session, Customer, "search ALI")) == {ids[0]}
+        assert set(await search(db_session, Customer, "mo@search")) == {ids[1]}
+        assert set(await search(db_session, Customer, "محمد")) == {ids[2]}
+        assert set(await search(db_session, Customer, "918273")) == {ids[0]}
+
+    @pytest.mark.asyncio
+    async def test_count_matches_list(self, db_session, customers):
+        dialect = db_session.get_bind().dialect.name
+        count = await db_session.scalar(
+            apply_search(select(func.count(Customer.id)), Customer, "Search", dialect, rank=False)
+        )
+        assert count == len(await search(db_session, Customer, "Search")) >= 3
+
+    @pytest.mark.asyncio
+    async def test_index_follows_updates_and_deletes(self, db_session, customers):
+        first, second = customers[0].id, customers[1].id
+        values = {"name": "Search Saleh Omar"}
+        await db_session.execute(update(Customer).where(Customer.id == first).values(**values, **search_key_values(values)))
+        await db_session.execute(delete(Customer).where(Customer.id == second))
+        await db_session.commit()
+
+        assert first not in await search(db_session, Customer, "Ali Hassan")
+        assert first in await search(db_session, Customer, "saleh omar")
+        assert second not in await search(db_session, Customer, "Mohammed")
+
+    @pytest.mark.asyncio
+    async def test_customer_spelling_and_phone_variants(self, db_session, customers):
+        arabic = customers[2].id
+        assert arabic in await search(db_session, Customer, "مُحَمَّد")
+        assert arabic in await search(db_session, Customer, "محمّد")
+        assert arabic in await search(db_session, Customer, "0711 222")
+        assert arabic in await search(db_session, Customer, "+967-711-222-333")
+
+    @pytest.mark.asyncio
+    async def test_short_and_quoted_queries(self, db_session, customers):
+        assert customers[0].id in await search(db_session, Customer, "Al")
+        assert await search(db_session, Customer, 'x"y') == []
+
+    @pytest.mark.asyncio
+    async def test_unindexed_update_keeps_index(self, db_session):
+        part = Part(name="Search Inverter Pump", part_no="SRCH-1", stock=1)
+        db_session.add(part)
+        await db_session.commit()
+        part_id = part.id
+        await db_session.execute(update(Part).where(Part.id == part_id).values(stock=5))
+        await db_session.commit()
+
+        assert await search(db_session, Part, "inverter") == [part_id]
+        await db_session.execute(delete(Part).where(Part.id == part_id))
+        await db_session.commit()
+
+    def test_postgresql_uses_trigram_operators(self):
+        stmt = apply_search(select(Customer.id), Customer, "ali", "postgresql")
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert "ILIKE" in sql
+        assert "greatest(word_similarity" in sql
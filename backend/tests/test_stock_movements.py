@@ -0,0 +1,175 @@
+"""Tests for atomic stock adjustment and bulk stock movements."""
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+
+from app.api.parts import adjust_part_stock, apply_stock_movements
+from app.db.models import User, UserRole, StockMovement
+from app.db.models.service import Part
+from app.db.query_stats import track_queries
+from app.db.session import AsyncSessionLocal
+from app.db.schemas import PartStockAdjustment, StockMovementBatch
+
+
+@pytest_asyncio.fixture
+async def user(db_session):
+    user = User(full_name="Stock Clerk", email="stock-clerk@example.com", role=UserRole.engineer, password_hash="x")
+    db_session.add(user)
+    await db_session.commit()
+    user_id = user.id
+    yield user
+    await db_session.execute(delete(User).where(User.id == user_id))
+    await db_session.commit()
+
+
+@pytest_asyncio.fixture
+async def parts(db_session):
+    parts = [Part(name=f"Stock Test {i}", part_no=f"STOCK-{i}", stock=5) for i in range(3)]
+    db_session.add_all(parts)
+    await db_session.commit()
+    ids = [part.id for part in parts]
+    yield parts
+    await db_session.execute(delete(StockMovement).where(StockMovement.part_id.in_(ids)))
+    await db_session.execute(delete(Part).where(Part.id.in_(ids)))
+    await db_session.commit()
+
+
+async def stock_of(db_session, part_id):
+    return await db_session.scalar(select(Part.stock).where(Part.id == part_id))
+
+
+async def ledger(db_session, part_id):
+    result = await db_session.execute(
+        select(StockMovement).where(StockMovement.part_id == part_id).order_by(StockMovement.id)
+    )
+    return result.scalars().all()
+
+
+class TestAdjustStock:
+    """Single conditional UPDATE plus a ledger entry."""
+
+    @pytest.mark.asyncio
+    async def test_adjust_records_movement(self, db_session, user, parts):
+        adjustment = PartStockAdjustment(delta=-2, reason="damage", note="dropped")
+        part = await adjust_part_stock(parts[0].id, adjustment, current_user=user, db=db_session)
+
+        assert part.stock == 3
+        [movement] = await ledger(db_session, parts[0].id)
+        assert (movement.delta, movement.stock_after, movement.reason) == (-2, 3, "damage")
+        assert movement.created_by == user.id
+
+    @pytest.mark.asyncio
+    async def test_adjust_below_zero_is_refused(self, db_session, user, parts):
+        with pytest.raises(HTTPException) as exc:
+            await adjust_part_stock(parts[0].id, PartStockAdjustment(delta=-6), current_user=user, db=db_session)
+        assert exc.value.status_code == 400
+
+
+class TestStockMovements:
+    """Bulk deltas applied all-or-nothing."""
+
+    @pytest.mark.asyncio
+    async def test_batch_applies_and_records_every_line(self, db_session, user, parts):
+        movements = [{"part_id": parts[i % 2].id, "delta": 1} for i in range(200)]
+        movements.append({"part_id": parts[0].id, "delta": -10, "note": "stocktake correction"})
+        batch = StockMovementBatch(reason="receipt", ref="DN-42", movements=movements)
+
+        with track_queries() as stats:
+            result = await apply_stock_movements(batch, current_user=user, db=db_session)
+
+        assert result.movements == 201
+        assert {level.id: level.stock for level in result.parts} == {parts[0].id: 95, parts[1].id: 105}
+        if db_session.get_bind().dialect.update_returning:
+            assert sum(n for sql, n in stats.fingerprints.items() if sql.startswith("UPDATE")) == 1
+        assert await stock_of(db_session, parts[2].id) == 5
+
+        entries = await ledger(db_session, parts[0].id)
+        assert len(entries) == 101
+        assert [e.stock_after for e in entries[:2]] == [6, 7]
+        assert (entries[-1].delta, entries[-1].stock_after, entries[-1].ref) == (-10, 95, "DN-42")
+
+    @pytest.mark.asyncio
+    async def test_negative_result_rolls_back_whole_batch(self, db_session, user, parts):
+        # The rollback expires loaded objects; keep plain ids
+        ids = [part.id for part in parts]
+        batch = StockMovementBatch(reason="stocktake", movements=[
+            {"part_id": ids[0], "delta": 3},
+            {"part_id": ids[1], "delta": -6},
+        ])
+        with pytest.raises(HTTPException) as exc:
+            await apply_stock_movements(batch, current_user=user, db=db_session)
+
+        assert exc.value.status_code == 400
+        assert exc.value.detail.endswith(str(ids[1]))
+        assert await stock_of(db_session, ids[0]) == 5
+        assert await ledger(db_session, ids[0]) == []
+
+    @pytest.mark.asyncio
+    async def test_intermediate_negative_stock_is_refused(self, db_session, user, parts):
+        ids = [part.id for part in parts]
+        # Nets to zero, but the ledger would record stock_after = -5 for the first line
+        batch = StockMovementBatch(reason="adjustment", movements=[
+            {"part_id": ids[0], "delta": -10},
+            {"part_id": ids[0], "delta": 10},
+        ])
+        with pytest.raises(HTTPException) as exc:
+            await apply_stock_movements(batch, current_user=user, db=db_session)
+
+        assert exc.value.status_code == 400
+        assert exc.value.detail.endswith(str(ids[0]))
+        assert await ledger(db_session, ids[0]) == []
+
+        # The same lines in the other order never dip below zero
+        batch = StockMovementBatch(reason="adjustment", movements=[
+            {"part_id": ids[0], "delta": 10},
+            {"part_id": ids[0], "delta": -10},
+        ])
+        await db_session.refresh(user)
+        await apply_stock_movements(batch, current_user=user, db=db_session)
+        assert [e.stock_after for e in await ledger(db_session, ids[0])] == [15, 5]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_restock_gives_conflict(self, db_session, user, parts, monkeypatch):
+        part_id = parts[0].id
+        rollback = db_session.rollback
+
+        async def rollback_then_restock():
+            await rollback()
+            # Another request replenishes the part before the failure is explained
+            async with AsyncSessionLocal() as other:
+                await other.execute(update(Part).where(Part.id == part_id).values(stock=50))
+                await other.commit()
+
+        monkeypatch.setattr(db_session, "rollback", rollback_then_restock)
+        batch = StockMovementBatch(reason="damage", movements=[{"part_id": part_id, "delta": -6}])
+        with pytest.raises(HTTPException) as exc:
+            await apply_stock_movements(batch, current_user=user, db=db_session)
+
+        assert exc.value.status_code == 409
+        assert exc.value.detail
+
+    @pytest.mark.asyncio
+    async def test_unknown_part(self, db_session, user, parts):
+        part_id = parts[0].id
+        batch = StockMovementBatch(reason="receipt", movements=[
+            {"part_id": part_id, "delta": 1},
+            {"part_id": 10**9, "delta": 1},
+        ])
+        with pytest.raises(HTTPException) as exc:
+            await apply_stock_movements(batch, current_user=user, db=db_session)
+
+        assert exc.value.status_code == 404
+        assert await stock_of(db_session, part_id) == 5
+
+    @pytest.mark.asyncio
+    async def test_fallback_without_returning(self, db_session, user, parts, monkeypatch):
+        monkeypatch.setattr(db_session.get_bind().dialect, "update_returning", False)
+        batch = StockMovementBatch(reason="receipt", movements=[{"part_id": parts[0].id, "delta": 4}])
+        result = await apply_stock_movements(batch, current_user=user, db=db_session)
+        assert result.parts[0].stock == 9
+
+        batch = StockMovementBatch(reason="damage", movements=[{"part_id": parts[0].id, "delta": -20}])
+        with pytest.raises(HTTPException) as exc:
+            await apply_stock_movements(batch, current_user=user, db=db_session)
+        assert exc.value.status_code == 400
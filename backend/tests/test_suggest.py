@@ -0,0 +1,120 @@
+"""Tests for the in-memory typeahead index."""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.db.models.service import Part
+from app.db.query_stats import track_queries
+from app.db.writes import update_returning
+from app.services.suggest import SuggestIndex, part_entry, suggest_index, track, vehicle_entry
+
+
+def part(id, name, part_no=None):
+    return part_entry(SimpleNamespace(id=id, name=name, part_no=part_no))
+
+
+def vehicle(id, plate_no, vin=None):
+    return vehicle_entry(SimpleNamespace(id=id, plate_no=plate_no, vin=vin, make="Toyota", model="Prius"))
+
+
+def labels(results):
+    return [s.label for s in results]
+
+
+@pytest.fixture
+def index():
+    index = SuggestIndex(session_factory=object)
+    index.replace([
+        part(1, "Hybrid Battery Module", "HB-100"),
+        part(2, "Battery Fan", "BF-7"),
+        part(3, "Inverter Coolant Pump", "IC-1"),
+        vehicle(1, "ABC-1234", "JTDKB20U793456789"),
+        vehicle(2, "ABD-77"),
+    ])
+    return index
+
+
+class TestSuggestIndex:
+    """Prefix matching and ranking."""
+
+    def test_identifiers_ignore_case_and_separators(self, index):
+        assert labels(index.search("hb1")) == ["Hybrid Battery Module"]
+        assert labels(index.search("abc12")) == ["ABC-1234"]
+        assert labels(index.search("jtdkb")) == ["ABC-1234"]
+
+    def test_name_words_and_ranking(self, index):
+        # Whole-name match ranks above a later-word match
+        assert labels(index.search("batt")) == ["Battery Fan", "Hybrid Battery Module"]
+        assert labels(index.search("coolant pu")) == ["Inverter Coolant Pump"]
+
+    def test_types_and_limit(self, index):
+        assert [s.type for s in index.search("ab", types=["vehicle"])] == ["vehicle", "vehicle"]
+        assert index.search("ab", types=["part"]) == []
+        assert len(index.search("ab", limit=1)) == 1
+        assert index.search("  -- ") == []
+
+    def test_incremental_upsert_and_remove(self, index):
+        index.apply([(("part", 2), part(2, "Inverter Fan", "BF-7")), (("vehicle", 1), None)])
+        assert labels(index.search("batt")) == ["Hybrid Battery Module"]
+        assert labels(index.search("inv")) == ["Inverter Fan", "Inverter Coolant Pump"]
+        assert labels(index.search("abc")) == []
+        assert len(index) == 4
+
+
+class TestSuggestIndexSync:
+    """Committed ORM writes reach the process index."""
+
+    @pytest.mark.asyncio
+    async def test_commit_rollback_and_bulk_update(self, db_session):
+        kept = Part(name="Suggest Regen Brake Sensor", part_no="SUGG-1")
+        discarded = Part(name="Suggest Rolled Back Part", part_no="SUGG-2")
+        db_session.add(kept)
+        await db_session.commit()
+        kept_id = kept.id
+        db_session.add(discarded)
+        await db_session.flush()
+        await db_session.rollback()
+
+        assert labels(suggest_index.search("sugg")) == ["Suggest Regen Brake Sensor"]
+
+        updated = await update_returning(db_session, Part, kept_id, {"name": "Suggest Regen Brake Actuator"})
+        track(db_session, updated)
+        await db_session.commit()
+        assert labels(suggest_index.search("suggestregenbrakea")) == ["Suggest Regen Brake Actuator"]
+
+        await db_session.delete(updated)
+        await db_session.commit()
+        assert suggest_index.search("sugg") == []
+
+    @pytest.mark.asyncio
+    async def test_load_from_database(self, db_session):
+        db_session.add(Part(name="Suggest Load Test", part_no="SUGG-LOAD"))
+        await db_session.commit()
+        index = SuggestIndex()
+        try:
+            assert await index.load() >= 1
+            with track_queries() as stats:
+                assert labels(index.search("sugg-load")) == ["Suggest Load Test"]
+            assert stats.count == 0
+        finally:
+            await db_session.execute(delete(Part).where(Part.part_no == "SUGG-LOAD"))
+            await db_session.commit()
+
+    @pytest.mark.asyncio
+    async def test_startup_survives_failed_load(self, monkeypatch):
+        from app.main import app, lifespan
+
+        async def unreachable():
+            raise OSError("connection refused")
+
+        async def stopped():
+            pass
+
+        started = []
+        monkeypatch.setattr(suggest_index, "load", unreachable)
+        monkeypatch.setattr(suggest_index, "start", lambda: started.append(True))
+        monkeypatch.setattr(suggest_index, "stop", stopped)
+        async with lifespan(app):
+            # The background reloads still get started to retry
+            assert started == [True]
@@ -0,0 +1,170 @@
+"""Tests for incrementally maintained work order totals."""
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, select, update
+
+from app.api.invoices import create_invoice
+from app.api.services import update_service
+from app.api.workorders import add_workorder_item, delete_workorder_item
+from app.db.models import (
+    Customer, Vehicle, WorkOrder, WorkOrderItem, WorkOrderService, ItemType, Invoice, Service, User, UserRole
+)
+from app.db.query_stats import track_queries
+from app.db.schemas import ServiceUpdate, WorkOrderItemCreate
+from app.db.schemas.invoices import InvoiceCreate
+from app.services.work_order_totals import check_totals
+
+
+@pytest_asyncio.fixture
+async def workorder(db_session):
+    user = User(full_name="Totals Desk", email="totals-desk@example.com", role=UserRole.sales, password_hash="x")
+    customer = Customer(name="Totals Customer", phone="+967 555 737373")
+    service = Service(name="Totals Hybrid Check", base_price=Decimal("40.00"))
+    db_session.add_all([user, customer, service])
+    await db_session.flush()
+    vehicle = Vehicle(customer_id=customer.id, plate_no="TOT-7373", make="Toyota", model="Prius")
+    db_session.add(vehicle)
+    await db_session.flush()
+    workorder = WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, created_by=user.id)
+    db_session.add(workorder)
+    await db_session.commit()
+    ids = {"user": user.id, "customer": customer.id, "vehicle": vehicle.id, "service": service.id}
+    yield workorder, user, service
+    # Through the ORM, so the daily rollups are decremented again
+    invoice = await db_session.scalar(select(Invoice).where(Invoice.work_order_id == workorder.id))
+    if invoice is not None:
+        await db_session.delete(invoice)
+        await db_session.flush()
+    await db_session.delete(await db_session.get(WorkOrder, workorder.id))
+    await db_session.flush()
+    for model, key in ((Vehicle, "vehicle"), (Customer, "customer"), (Service, "service")):
+        await db_session.delete(await db_session.get(model, ids[key]))
+        await db_session.flush()
+    await db_session.execute(delete(User).where(User.id == ids["user"]))
+    await db_session.commit()
+
+
+async def stored_totals(db_session, workorder_id):
+    row = (await db_session.execute(
+        select(WorkOrder.items_parts_total, WorkOrder.items_labor_total, WorkOrder.services_total)
+        .where(WorkOrder.id == workorder_id)
+    )).one()
+    return tuple(Decimal(str(value)) for value in row)
+
+
+class TestWorkOrderTotals:
+    """Totals follow item and service writes in the same transaction."""
+
+    @pytest.mark.asyncio
+    async def test_items_update_totals(self, db_session, workorder):
+        workorder, user, _ = workorder
+        part = await add_workorder_item(
+            workorder.id,
+            WorkOrderItemCreate(item_type=ItemType.PART, name="Inverter", qty=Decimal("1.5"), unit_price=Decimal("3.33")),
+            current_user=user, db=db_session
+        )
+        await add_workorder_item(
+            workorder.id,
+            WorkOrderItemCreate(item_type=ItemType.LABOR, name="Fitting", qty=Decimal("2"), unit_price=Decimal("25.00")),
+            current_user=user, db=db_session
+        )
+
+        assert await stored_totals(db_session, workorder.id) == (Decimal("4.995"), Decimal("50"), Decimal("0"))
+        # The loaded instance is kept in step
+        assert workorder.items_labor_total == Decimal("50")
+
+        await delete_workorder_item(part.id, current_user=user, db=db_session)
+        assert await stored_totals(db_session, workorder.id) == (Decimal("0"), Decimal("50"), Decimal("0"))
+
+    @pytest.mark.asyncio
+    async def test_services_and_repricing(self, db_session, workorder):
+        workorder, _, service = workorder
+        link = WorkOrderService(work_order_id=workorder.id, service_id=service.id)
+        db_session.add(link)
+        await db_session.commit()
+        assert (await stored_totals(db_session, workorder.id))[2] == Decimal("40")
+
+        service.base_price = Decimal("55.00")
+        await db_session.commit()
+        assert (await stored_totals(db_session, workorder.id))[2] == Decimal("55")
+
+        await db_session.delete(link)
+        await db_session.commit()
+        assert (await stored_totals(db_session, workorder.id))[2] == Decimal("0")
+
+    @pytest.mark.asyncio
+    async def test_update_service_endpoint_reprices(self, db_session, workorder):
+        workorder, user, service = workorder
+        db_session.add_all([
+            WorkOrderService(work_order_id=workorder.id, service_id=service.id),
+            WorkOrderService(work_order_id=workorder.id, service_id=service.id),
+        ])
+        await db_session.commit()
+        assert (await stored_totals(db_session, workorder.id))[2] == Decimal("80")
+
+        await update_service(service.id, ServiceUpdate(base_price=Decimal("25.00")), current_user=user, db=db_session)
+        assert (await stored_totals(db_session, workorder.id))[2] == Decimal("50")
+        # Other fields leave the totals alone
+        await update_service(service.id, ServiceUpdate(name="Totals Hybrid Check II"), current_user=user, db=db_session)
+        assert (await stored_totals(db_session, workorder.id))[2] == Decimal("50")
+
+        invoice = await create_invoice(InvoiceCreate(work_order_id=workorder.id), current_user=user, db=db_session)
+        assert invoice.subtotal == Decimal("50.00")
+
+    @pytest.mark.asyncio
+    async def test_repricing_skips_invoiced_work_orders(self, db_session, workorder):
+        workorder, user, service = workorder
+        db_session.add(WorkOrderService(work_order_id=workorder.id, service_id=service.id))
+        await db_session.commit()
+        invoice = await create_invoice(InvoiceCreate(work_order_id=workorder.id), current_user=user, db=db_session)
+        assert invoice.subtotal == Decimal("40.00")
+
+        await update_service(service.id, ServiceUpdate(base_price=Decimal("70.00")), current_user=user, db=db_session)
+        service.base_price = Decimal("90.00")
+        await db_session.commit()
+
+        # Still billed at the price it was invoiced with, and not reported as drift
+        assert (await stored_totals(db_session, workorder.id))[2] == Decimal("40")
+        line_price = await db_session.scalar(
+            select(WorkOrderService.unit_price).where(WorkOrderService.work_order_id == workorder.id)
+        )
+        assert line_price == Decimal("40.00")
+        assert [d for d in await check_totals(db_session) if d["work_order_id"] == workorder.id] == []
+
+    @pytest.mark.asyncio
+    async def test_invoice_reads_totals(self, db_session, workorder):
+        workorder, user, service = workorder
+        db_session.add_all([
+            WorkOrderItem(work_order_id=workorder.id, item_type=ItemType.PART, name="Cell", qty=Decimal("3"), unit_price=Decimal("20.00")),
+            WorkOrderService(work_order_id=workorder.id, service_id=service.id),
+        ])
+        await db_session.commit()
+
+        with track_queries() as stats:
+            invoice = await create_invoice(InvoiceCreate(work_order_id=workorder.id), current_user=user, db=db_session)
+
+        assert invoice.subtotal == Decimal("100.00")
+        assert invoice.total == Decimal("115.00")
+        # No item or service rows loaded
+        assert not any("work_order_items" in sql or "work_order_services" in sql for sql in stats.fingerprints)
+
+    @pytest.mark.asyncio
+    async def test_check_reports_and_fixes_drift(self, db_session, workorder):
+        workorder, _, _ = workorder
+        workorder_id = workorder.id
+        db_session.add(WorkOrderItem(work_order_id=workorder_id, item_type=ItemType.LABOR, name="Diag", qty=1, unit_price=Decimal("30.00")))
+        await db_session.commit()
+        assert [d for d in await check_totals(db_session) if d["work_order_id"] == workorder_id] == []
+
+        # A bulk UPDATE bypasses the mapper events
+        await db_session.execute(update(WorkOrderItem).where(WorkOrderItem.work_order_id == workorder_id).values(qty=2))
+        await db_session.commit()
+
+        drift = [d for d in await check_totals(db_session, fix=True) if d["work_order_id"] == workorder_id]
+        assert [(d["column"], d["stored"], d["actual"]) for d in drift] == [
+            ("items_labor_total", Decimal("30"), Decimal("60"))
+        ]
+        assert [d for d in await check_totals(db_session) if d["work_order_id"] == workorder_id] == []
+        assert (await stored_totals(db_session, workorder_id))[1] == Decimal("60")
@@ -8,6 +8,7 @@ from decimal import Decimal
 from app.db.models.customer import Customer
 from app.db.models.vehicle import Vehicle
 from app.db.models.work_order import WorkOrder, WorkOrderStatus, WorkOrderItem, ItemType
+from app.utils.pagination import decode_cursor, encode_cursor
 
 
 class TestWorkOrdersAPI:
@@ -106,6 +107,82 @@ class TestWorkOrdersAPI:
         for item in data["items"]:
             assert item["status"] == "new"
 
+    @pytest.mark.asyncio
+    async def test_get_workorders_cursor_pagination(self, async_client: AsyncClient, auth_headers: dict, db_session: AsyncSession):
+        """Test walking work orders with next_cursor visits each row once."""
+        customer = Customer(name="Test Customer", phone="123456")
+        db_session.add(customer)
+        await db_session.flush()
+
+        vehicle = Vehicle(customer_id=customer.id, plate_no="ABC-123", make="Toyota", model="Prius")
+        db_session.add(vehicle)
+        await db_session.flush()
+
+        for i in range(5):
+            db_session.add(WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, complaint=f"Issue {i}", created_by=1))
+        await db_session.commit()
+
+        seen_ids = []
+        cursor = None
+        while True:
+            url = f"/api/v1/workorders/?customer_id={customer.id}&size=2&include_total=false"
+            if cursor:
+                url += f"&cursor={cursor}"
+            response = await async_client.get(url, headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] is None
+            seen_ids.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        assert len(seen_ids) == 5
+        assert len(set(seen_ids)) == 5
+
+    @pytest.mark.asyncio
+    async def test_cursor_pagination_with_equal_timestamps(self, async_client: AsyncClient, auth_headers: dict, db_session: AsyncSession):
+        """Test rows sharing a created_at are split across pages by id, none skipped or repeated."""
+        customer = Customer(name="Test Customer", phone="123456")
+        db_session.add(customer)
+        await db_session.flush()
+
+        vehicle = Vehicle(customer_id=customer.id, plate_no="ABC-124", make="Toyota", model="Prius")
+        db_session.add(vehicle)
+        await db_session.flush()
+
+        created_at = datetime(2025, 1, 15, 9, 30)
+        workorders = [
+            WorkOrder(customer_id=customer.id, vehicle_id=vehicle.id, created_by=1, created_at=created_at)
+            for _ in range(5)
+        ]
+        db_session.add_all(workorders)
+        await db_session.commit()
+        expected = sorted((workorder.id for workorder in workorders), reverse=True)
+
+        seen_ids = []
+        cursor = None
+        for _ in range(5):
+            params = {"customer_id": customer.id, "size": 2, "include_total": "false"}
+            if cursor:
+                params["cursor"] = cursor
+            response = await async_client.get("/api/v1/workorders/", params=params, headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()
+            seen_ids.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        assert seen_ids == expected
+        assert decode_cursor(encode_cursor(created_at, 7)) == (created_at, 7)
+
+    @pytest.mark.asyncio
+    async def test_get_workorders_invalid_cursor(self, async_client: AsyncClient, auth_headers: dict):
+        """Test a malformed cursor is rejected."""
+        response = await async_client.get("/api/v1/workorders/?cursor=not-a-cursor", headers=auth_headers)
+        assert response.status_code == 400
+
     @pytest.mark.asyncio
     async def test_set_workorder_estimate(self, async_client: AsyncClient, auth_headers: dict, db_session: AsyncSession):
         """Test setting work order estimate."""
@@ -0,0 +1,60 @@
+"""Tests for the RETURNING-based write helper."""
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete
+
+from app.db.models.service import Part
+from app.db.query_stats import track_queries
+from app.db import writes
+from app.db.writes import on_update, update_returning
+
+
+@pytest_asyncio.fixture
+async def part(db_session):
+    part = Part(name="Test Cell", part_no="WRITE-TEST", stock=5)
+    db_session.add(part)
+    await db_session.commit()
+    yield part
+    await db_session.execute(delete(Part).where(Part.id == part.id))
+    await db_session.commit()
+
+
+class TestUpdateReturning:
+    """UPDATE ... RETURNING with conditions and the select fallback."""
+
+    @pytest.mark.asyncio
+    async def test_updates_in_one_statement(self, db_session, part):
+        with track_queries() as stats:
+            updated = await update_returning(db_session, Part, part.id, {"stock": Part.stock + 3})
+        assert updated.stock == 8
+        assert updated is part
+        if db_session.get_bind().dialect.update_returning:
+            assert stats.count == 1
+
+    @pytest.mark.asyncio
+    async def test_condition_not_met_returns_none(self, db_session, part):
+        assert await update_returning(db_session, Part, part.id, {"stock": 0}, Part.stock > 100) is None
+        assert await update_returning(db_session, Part, 10**9, {"stock": 0}) is None
+
+    @pytest.mark.asyncio
+    async def test_empty_values_selects(self, db_session, part):
+        assert (await update_returning(db_session, Part, part.id, {})).id == part.id
+
+    @pytest.mark.asyncio
+    async def test_fallback_without_returning(self, db_session, part, monkeypatch):
+        monkeypatch.setattr(db_session.get_bind().dialect, "update_returning", False)
+        updated = await update_returning(db_session, Part, part.id, {"stock": Part.stock - 1})
+        assert updated.stock == 4
+        assert await update_returning(db_session, Part, part.id, {"stock": 0}, Part.stock > 100) is None
+
+    @pytest.mark.asyncio
+    async def test_hooks_see_old_and_new_values(self, db_session, part, monkeypatch):
+        calls = []
+        monkeypatch.setattr(writes, "_update_hooks", {})
+        on_update(Part, "stock")(lambda connection, old, new: calls.append((old.stock, new.stock)))
+
+        await update_returning(db_session, Part, part.id, {"stock": Part.stock + 3})
+        await update_returning(db_session, Part, part.id, {"name": "Renamed Cell"})
+        assert await update_returning(db_session, Part, part.id, {"stock": 0}, Part.stock > 100) is None
+
+        assert calls == [(5, 8)]